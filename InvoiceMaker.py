@@ -8,21 +8,365 @@ Requirements:
 Usage:
     generator = InvoiceGenerator()
     generator.generate_invoice(student_name, course, lessons, rate_per_lesson)
+
+    # Month-end billing: render many invoices across a process pool
+    results = generator.generate_invoices(batch, workers=4)
+
+    # Many invoices for one client in a single PDF
+    book = generator.generate_statement_book(batch)
+
+    # Same invoice sections drawn with FPDF instead of ReportLab
+    InvoiceGenerator(backend='fpdf').generate_invoice(student_name, course, lessons, rate_per_lesson)
+
+    # In memory, e.g. for a web response or email attachment
+    pdf_bytes = generator.generate_invoice_bytes(student_name, course, lessons, rate_per_lesson)['pdf']
+
+    # Byte-for-byte identical PDFs for identical invoices, for dedup and caching
+    InvoiceGenerator(reproducible=True).generate_invoice(student_name, course, lessons, rate_per_lesson)
+
+    # What was billed, from the SQLite ledger every invoice file is recorded in
+    generator.get_ledger('invoices').find(student='Bella Grasso', month='2024-09')
+
+Command line:
+    python -m InvoiceMaker run lessons.csv [--rate 350] [--workers 4] [--statement-book] [--per-lesson]
+    python -m InvoiceMaker totals lessons.csv [--rate 350] [--per-lesson]
+    python -m InvoiceMaker validate lessons.csv
+    python -m InvoiceMaker ledger find --student "Bella Grasso" --month 2024-09
+    python invoice_watch.py lessons.csv     # keep draft invoices in step with the log
+    python invoice_delivery.py send --month 2024-09   # email the month's invoices to their clients
+
+    The lesson log is a CSV with a header row, or JSON Lines, with the fields
+    student, date, course, hours and client (optional: rate, client_email).
+    Rows without a client, or with the TTI client name, are billed to TTI.
+    With --per-lesson every lesson gets its own line, and long logs run over
+    as many numbered pages as they need.
+
+    Only run renders PDFs. ReportLab (or FPDF) is imported when the first
+    invoice is rendered, so totals, validate, ledger and scripts that only
+    price or look up invoices start without it.
 """
 
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from contextlib import contextmanager
 from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+import argparse
+import csv
+import hashlib
+import inspect
+import io
+import json
 import os
+import sys
+import threading
+import time
+import traceback
+
+from invoice_ledger import InvoiceLedger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Bump whenever generated invoices or result dicts change shape
+__version__ = '1.2'
+
+# Modules whose code decides what an invoice looks like; a digest of their
+# source is part of every skip-unchanged key, so an edit that forgets to bump
+# __version__ still re-renders
+_OUTPUT_MODULES = ('InvoiceMaker.py', 'invoice_reportlab.py', 'invoice_fpdf.py')
+_output_digest = None
+
+SEQUENCE_FILENAME = '.invoice_sequence'
+MANIFEST_FILENAME = '.invoice_manifest.jsonl'
+
+# Branded header: the company logo, printed this wide (1.25in, in points)
+DEFAULT_LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Yolymatics_logo_transparent.png')
+LOGO_WIDTH = 1.25 * 72
+
+# Names that moved to invoice_reportlab, still importable from here (see __getattr__)
+_REPORTLAB_NAMES = ('ReportLabInvoiceBackend', 'STORY_WIDTH', 'FROM_CELL_WIDTH', 'LOGO_DPI')
+
+# Sections of every invoice, in page order. InvoiceGenerator.invoice_sections
+# describes them as plain data and each backend renders them its own way.
+INVOICE_SECTIONS = ('header', 'parties', 'details', 'services', 'totals', 'terms', 'banking', 'footer')
+
+PAYMENT_TERMS = [
+    'Payment is due within 5 days of invoice date',
+    'Please reference the invoice number when making payment',
+    'Late payments may incur additional charges',
+]
+THANK_YOU_TEXT = 'Thank you for choosing Yolymatics Tutorials for your educational needs.'
+BIBLE_VERSE_TEXT = ('"For I know the plans I have for you," declares the Lord, "plans to prosper you '
+                    'and not to harm you, to give you hope and a future." - Jeremiah 29:11')
+
+
+@contextmanager
+def _locked_file(path):
+    """Open (creating if needed) and exclusively lock a small state file"""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    with os.fdopen(fd, 'r+') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield handle
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class InvoiceNumberAllocator:
+    """
+    Hands out unique invoice sequence numbers from a counter file
+
+    The counter file holds the last number reserved. Reservations take an
+    exclusive file lock, so any number of threads, worker processes or
+    separate runs sharing the same output directory never receive the same
+    number. Numbers are reserved block_size at a time and then handed out
+    from memory; unused numbers in a block are skipped if the process exits.
+    """
+
+    def __init__(self, directory, block_size=1):
+        self.path = os.path.join(directory, SEQUENCE_FILENAME)
+        self.block_size = max(1, block_size)
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # A copy sent to another process must reserve its own block
+        state = self.__dict__.copy()
+        state['_next'] = state['_end'] = 0
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def next_number(self):
+        """Return the next unique sequence number"""
+        with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = self._reserve(self.block_size)
+            number = self._next
+            self._next += 1
+            return number
+
+    def reserve(self, count):
+        """Reserve count consecutive numbers at once and return them as a range"""
+        if count <= 0:
+            return range(0)
+        with self._lock:
+            start, end = self._reserve(count)
+        return range(start, end)
+
+    def _reserve(self, count):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with _locked_file(self.path) as handle:
+            last = int(handle.read().strip() or 0)
+            # Fixed-width record, so the file is overwritten in place
+            handle.seek(0)
+            handle.write(f"{last + count:020d}\n")
+            handle.flush()
+        return last + 1, last + count + 1
+
+
+class InvoiceManifest:
+    """
+    Records which inputs produced which invoice, for incremental reruns
+
+    Each rendered invoice appends one JSON line (input hash plus result dict)
+    to a manifest file in the output directory, under a file lock so pool
+    workers can record concurrently. Lookups read only the lines added since
+    the previous lookup; the latest entry for a hash wins.
+    """
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, MANIFEST_FILENAME)
+        self._entries = {}
+        self._offset = 0
+
+    def __getstate__(self):
+        # Workers re-read the file rather than receive a copy of the index
+        state = self.__dict__.copy()
+        state['_entries'] = {}
+        state['_offset'] = 0
+        return state
+
+    def lookup(self, key, invoice_number=None):
+        """
+        Return the recorded result for an input hash if its PDF still exists
+
+        When invoice_number is given, only a result with that number matches.
+        """
+        self._refresh()
+        result = self._entries.get(key)
+        if result is None or not os.path.exists(result['filename']):
+            return None
+        if invoice_number is not None and result['invoice_number'] != invoice_number:
+            return None
+        return result
+
+    def record(self, key, result):
+        """Append the result produced for an input hash"""
+        line = json.dumps({'key': key, 'result': result}, sort_keys=True) + '\n'
+        with _locked_file(self.path + '.lock'):
+            with open(self.path, 'a', encoding='utf-8') as handle:
+                handle.write(line)
+        self._entries[key] = dict(result)
+
+    def _refresh(self):
+        try:
+            with open(self.path, 'rb') as handle:
+                handle.seek(self._offset)
+                data = handle.read()
+        except FileNotFoundError:
+            return
+        # Ignore a trailing line that is still being written
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                self._entries[entry['key']] = entry['result']
+        self._offset += end
+
+
+CENT = Decimal('0.01')
+
+
+def _to_decimal(value):
+    """Convert a number to Decimal via its shortest repr (so 0.1 stays 0.1)"""
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _number_key(value):
+    """Canonical text of a number for input hashes, so 350, 350.0 and '350' agree"""
+    if isinstance(value, (list, tuple)):
+        return [_number_key(item) for item in value]
+    try:
+        return format(_to_decimal(value).normalize(), 'f')
+    except (ArithmeticError, ValueError):
+        return value  # not a number; pricing reports it
+
+
+def compute_invoice_amounts(quantities, rates, vat_rate=0):
+    """
+    Work out line amounts, subtotal, VAT and total in exact decimal arithmetic
+
+    Every line amount is rounded to the cent (half up) once, and the subtotal
+    is the sum of those rounded amounts, so the lines printed on an invoice
+    always add up to its totals.
+
+    Args:
+        quantities (list): Hours (or lessons) per line
+        rates (float or list): One rate for every line, or a rate per line
+        vat_rate (float): VAT rate as a fraction (0.15 for 15%)
+
+    Returns:
+        dict: 'line_amounts' (list of Decimal), 'subtotal', 'vat_amount' and
+            'total_amount' (Decimal, all in Rands to the cent)
+    """
+    if isinstance(rates, (list, tuple)):
+        if len(rates) != len(quantities):
+            raise ValueError(f"{len(rates)} rates given for {len(quantities)} lines")
+        line_rates = map(_to_decimal, rates)
+    else:
+        rate = _to_decimal(rates)
+        line_rates = (rate for _ in quantities)
+
+    line_amounts = []
+    append = line_amounts.append
+    subtotal = Decimal(0)
+    for quantity, rate in zip(map(_to_decimal, quantities), line_rates):
+        amount = (quantity * rate).quantize(CENT, ROUND_HALF_UP)
+        append(amount)
+        subtotal += amount
+
+    vat_amount = (subtotal * _to_decimal(vat_rate)).quantize(CENT, ROUND_HALF_UP)
+    return {
+        'line_amounts': line_amounts,
+        'subtotal': subtotal,
+        'vat_amount': vat_amount,
+        'total_amount': subtotal + vat_amount
+    }
+
+
+def __getattr__(name):
+    if name in _REPORTLAB_NAMES:
+        import invoice_reportlab
+        return getattr(invoice_reportlab, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _output_code_digest():
+    """Hash of the source of _OUTPUT_MODULES, read once per process"""
+    global _output_digest
+    if _output_digest is None:
+        digest = hashlib.sha256()
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for name in _OUTPUT_MODULES:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                with open(path, 'rb') as handle:
+                    digest.update(name.encode('utf-8') + b'\0' + handle.read())
+        _output_digest = digest.hexdigest()
+    return _output_digest
+
+
+def _make_backend(name, template_mode=False, reproducible=False, compress=True):
+    """Create the rendering backend called name ('reportlab' or 'fpdf')"""
+    # Each backend's library is imported only once an invoice is rendered
+    if name == 'reportlab':
+        from invoice_reportlab import ReportLabInvoiceBackend
+        return ReportLabInvoiceBackend(template_mode, reproducible, compress)
+    if name == 'fpdf':
+        from invoice_fpdf import FPDFInvoiceBackend
+        return FPDFInvoiceBackend(reproducible, compress)
+    raise ValueError(f"unknown invoice backend {name!r} (expected 'reportlab' or 'fpdf')")
 
 
 class InvoiceGenerator:
-    def __init__(self):
-        """Initialize the invoice generator with company information"""
+    def __init__(self, template_mode=False, metrics_callback=None, logo_path=None, backend='reportlab',
+                 ledger=True, reproducible=False, compress=True):
+        """
+        Initialize the invoice generator with company information
+
+        Args:
+            template_mode (bool): Lay out the parts that are identical on every
+                invoice (FROM block, payment terms, banking page) once and reuse
+                them, so each invoice only lays out its own details
+            metrics_callback (callable, optional): Called as
+                metrics_callback(timings, result) after every rendered invoice,
+                with the per-phase timings in seconds. Must be picklable (a
+                module-level function) to be used with generate_invoices.
+            logo_path (str, optional): Image to print at the top of every
+                invoice (e.g. DEFAULT_LOGO_PATH); downsampled to print
+                resolution once and reused across builds
+            backend (str): 'reportlab' (default) or 'fpdf' (needs the fpdf
+                package). Both render the same invoice_sections; statement
+                books always use ReportLab.
+            ledger (bool): Record every invoice written to a file in the
+                InvoiceLedger of its output directory (in-memory invoices
+                are only recorded when given a ledger)
+            reproducible (bool): Render identical invoices to identical bytes:
+                a fixed creation date and a document ID hashed from the
+                file's content instead of the current time and a random ID
+            compress (bool): Deflate page content streams (on by default;
+                turn off to read the raw drawing operators). Invoices use
+                the standard PDF fonts, which are never embedded, so there
+                are no font files to subset.
+        """
         self.company_info = {
             'name': 'YOLYMATICS TUTORIALS (PTY) LTD',
             'registration_number': '2024/838115/07',
@@ -54,575 +398,990 @@ class InvoiceGenerator:
         }
         
         self.vat_rate = 0.0  # No VAT for this invoice
+
+        # Invoice number allocators, one per output directory
+        self.invoice_block_size = 1
+        self._allocators = {}
+
+        # Incremental-run manifests, one per output directory
+        self._manifests = {}
+
+        # Invoice ledgers, one per output directory
+        self.ledger = ledger
+        self._ledgers = {}
+
+        self.template_mode = template_mode
+        self._static_content_cache = None
+        self._static_content_key = None
+
+        self.metrics_callback = metrics_callback
+        self.logo_path = logo_path
+
+        # Rendering backends, created on first use
+        self.backend = backend
+        self.reproducible = reproducible
+        self.compress = compress
+        self._backends = {}
+
+    def __getstate__(self):
+        # Backends hold laid-out ReportLab objects; workers rebuild them
+        state = self.__dict__.copy()
+        state['_backends'] = {}
+        return state
         
     def generate_invoice(self, student_name, courses, lessons_per_course, rate_per_lesson, 
                         invoice_number=None, invoice_date=None, 
-                        client_info=None, use_tti_default=True, output_dir="invoices"):
+                        client_info=None, use_tti_default=True, output_dir="invoices",
+                        skip_unchanged=False, output=None, profile=False, lesson_items=None, ledger=None):
         """
         Generate a professional PDF invoice with clear TTI Group billing
         
         Args:
             student_name (str): Name of the student
-            course (str): Course/subject name
-            lessons (int): Number of lessons
-            rate_per_lesson (float): Rate per lesson in Rands
+            courses (list): Course/subject names
+            lessons_per_course (list): Hours for each course
+            rate_per_lesson (float or list): Rate per lesson in Rands, or one
+                rate per course
             invoice_number (str, optional): Custom invoice number
             invoice_date (str, optional): Custom invoice date (YYYY-MM-DD)
             client_info (dict, optional): Alternative client information
             use_tti_default (bool): Use TTI Group as default client
             output_dir (str): Directory to save invoices
+            skip_unchanged (bool): If an invoice was already generated in
+                output_dir from identical inputs, return its recorded result
+                (marked 'unchanged': True) instead of rendering again.
+                Only applies to invoices written to output_dir.
+            output (file-like, optional): Write the PDF to this binary stream
+                instead of a file in output_dir. output_dir then only holds
+                the invoice number sequence, and 'filename' is None.
+            profile (bool): Run the invoice under cProfile and add the report
+                (top functions by cumulative time) to the result as 'profile'
+            lesson_items (list, optional): Bill lesson by lesson instead of per
+                course: dicts with 'date', 'course', 'hours' and optionally
+                'rate'. The service table then lists every lesson and splits
+                across pages with repeated headings and carried-forward
+                subtotals, and pages are numbered. courses and
+                lessons_per_course may be None; they are derived from the
+                lessons.
+            ledger (InvoiceLedger or bool, optional): Ledger to record the
+                invoice in, or True for the one in output_dir. By default
+                invoices written to output_dir are recorded there (unless the
+                generator keeps no ledger) and invoices written to output
+                are not recorded.
             
         Returns:
-            dict: Invoice details including filename and totals
+            dict: Invoice details including filename and totals. Rendered
+                invoices also carry 'size' (bytes of PDF) and 'timings':
+                seconds spent numbering and totalling ('prepare'), building the story ('story'), the
+                backend's layout and PDF serialisation ('layout'), writing the file
+                ('write') and overall ('total').
         """
         
-        # Create output directory if it doesn't exist
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-        
-        # Generate invoice number and date if not provided
-        if invoice_number is None:
-            invoice_number = f"INV-{datetime.now().strftime('%Y%m%d')}-{self._get_next_invoice_number()}"
-        
+        if profile:
+            import cProfile
+            profiler = cProfile.Profile()
+            result = profiler.runcall(
+                self.generate_invoice, student_name, courses, lessons_per_course, rate_per_lesson,
+                invoice_number=invoice_number, invoice_date=invoice_date, client_info=client_info,
+                use_tti_default=use_tti_default, output_dir=output_dir,
+                skip_unchanged=skip_unchanged, output=output, lesson_items=lesson_items, ledger=ledger
+            )
+            result['profile'] = _format_profile(profiler)
+            return result
+
+        started = time.perf_counter()
         if invoice_date is None:
             invoice_date = datetime.now().strftime('%Y-%m-%d')
         
         # Select client information (TTI Group by default)
-        bill_to = (
-            self.default_client_info.copy()
-            if (use_tti_default and client_info is None)
-            else (client_info or self.default_client_info)
-        )
-        
-        # Calculate totals for multiple courses
-        subtotal = sum(lessons_per_course) * rate_per_lesson
-        vat_amount = round(subtotal * self.vat_rate, 2)
-        total_amount = round(subtotal + vat_amount, 2)
+        bill_to = self._select_bill_to(client_info, use_tti_default)
 
-        # Create filename
-        safe_student_name = student_name.replace(" ", "_").replace("/", "_")
-        filename = os.path.join(output_dir, f"Invoice_{invoice_number}_{safe_student_name}.pdf")
+        # Reuse the previous invoice when none of its inputs changed
+        input_key = self._invoice_input_key(student_name, courses, lessons_per_course, rate_per_lesson,
+                                            invoice_date, bill_to, lesson_items)
+        if skip_unchanged and output is None:
+            previous = self._get_manifest(output_dir).lookup(input_key, invoice_number)
+            if previous is not None:
+                return dict(previous, unchanged=True)
+        
+        result = self._prepare_invoice(student_name, courses, lessons_per_course, rate_per_lesson,
+                                       invoice_number, invoice_date, bill_to, output_dir, lesson_items)
 
-        # Create PDF document
-        doc = SimpleDocTemplate(filename, pagesize=A4, rightMargin=72, leftMargin=72, 
-                              topMargin=72, bottomMargin=18)
+        if output is None:
+            # Create output directory if it doesn't exist
+            if not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+
+            # Create filename
+            safe_student_name = student_name.replace(" ", "_").replace("/", "_")
+            filename = os.path.join(output_dir, f"Invoice_{result['invoice_number']}_{safe_student_name}.pdf")
+        else:
+            filename = None
+        result = dict(filename=filename, **result)
+        prepared = time.perf_counter()
 
         # Build the invoice content
-        story = self._build_invoice_content_multi(
-            invoice_number, invoice_date, student_name, courses, 
-            lessons_per_course, rate_per_lesson, subtotal, vat_amount, total_amount, bill_to
-        )
+        backend = self._get_backend()
+        story = backend.build_story(self.invoice_sections(result))
+        built_story = time.perf_counter()
+
+        # Create PDF document; it is laid out in memory first so the file (or
+        # stream) write is a single, separately timed step
+        buffer = io.BytesIO()
+        backend.render(story, buffer, numbered=lesson_items is not None)
+        pdf = buffer.getvalue()
+        result['size'] = len(pdf)
+        laid_out = time.perf_counter()
+
+        if output is None:
+            with open(filename, 'wb') as handle:
+                handle.write(pdf)
+            self._get_manifest(output_dir).record(input_key, result)
+        else:
+            output.write(pdf)
+        ledger = self._select_ledger(ledger, output_dir, output)
+        if ledger is not None:
+            ledger.record(result)
+        finished = time.perf_counter()
+
+        timings = {
+            'prepare': prepared - started,
+            'story': built_story - prepared,
+            'layout': laid_out - built_story,
+            'write': finished - laid_out,
+            'total': finished - started
+        }
+        result['timings'] = timings
+        if self.metrics_callback is not None:
+            self.metrics_callback(timings, result)
+        return result
+
+    def generate_invoice_bytes(self, *args, **kwargs):
+        """
+        Generate an invoice in memory, without writing a PDF file
+
+        Takes the same arguments as generate_invoice (apart from output).
+        Nothing is written to disk unless a ledger is passed, or the invoice
+        number is left to the output_dir sequence.
+
+        Returns:
+            dict: Invoice details as from generate_invoice, with the PDF
+                document in 'pdf' (bytes) and 'filename' None
+        """
+        buffer = io.BytesIO()
+        result = self.generate_invoice(*args, output=buffer, **kwargs)
+        result['pdf'] = buffer.getvalue()
+        return result
+
+    def generate_statement_book(self, batch, filename=None, client_info=None, use_tti_default=True,
+                                statement_date=None, output_dir="invoices", output=None, ledger=None,
+                                skip_unchanged=False):
+        """
+        Generate many invoices for one client as a single PDF
+
+        The book opens with a summary page listing every invoice and the
+        amount due, followed by each invoice starting on a new page. The whole
+        book is laid out in one document build and written in one go.
+
+        Args:
+            batch (list): Invoice specs, each a dict with student_name, courses,
+                lessons_per_course, rate_per_lesson and optionally
+                invoice_number, invoice_date and lesson_items
+            filename (str, optional): Output path (defaults to a statement file
+                named after the client in output_dir)
+            client_info (dict, optional): Client billed for every invoice
+            use_tti_default (bool): Use TTI Group as default client
+            statement_date (str, optional): Statement date (YYYY-MM-DD)
+            output_dir (str): Directory for the book and the invoice sequence
+            output (file-like, optional): Write the book to this binary stream
+                instead of a file; 'filename' is then None
+            ledger (InvoiceLedger or bool, optional): Where to record the
+                invoices, as for generate_invoice
+            skip_unchanged (bool): Give invoices already generated in
+                output_dir from identical inputs their recorded number
+                instead of a new one, so a rerun does not bill the same work
+                twice. If every invoice is unchanged and already in this
+                book, the book is not rendered again and is returned marked
+                'unchanged': True. Only applies to books written to a file.
+
+        Returns:
+            dict: Book details: filename, statement_date, bill_to, invoices
+                (one generate_invoice-style result per spec), total_amount,
+                size (bytes of PDF)
+        """
+        if statement_date is None:
+            statement_date = datetime.now().strftime('%Y-%m-%d')
+        bill_to = self._select_bill_to(client_info, use_tti_default)
+        if output is None and filename is None:
+            safe_client_name = bill_to['name'].replace(" ", "_").replace("/", "_")
+            filename = os.path.join(output_dir, f"Statement_{statement_date}_{safe_client_name}.pdf")
+        elif output is not None:
+            filename = None
+
+        batch = list(batch)
+        keys = [self._invoice_input_key(spec['student_name'], spec.get('courses'), spec.get('lessons_per_course'),
+                                        spec['rate_per_lesson'], spec.get('invoice_date') or statement_date,
+                                        bill_to, spec.get('lesson_items'))
+                for spec in batch]
+        previous = [None] * len(batch)
+        if skip_unchanged and output is None:
+            manifest = self._get_manifest(output_dir)
+            previous = [manifest.lookup(key, spec.get('invoice_number')) for key, spec in zip(keys, batch)]
+            if batch and all(entry is not None and entry['filename'] == filename for entry in previous):
+                invoices = [dict(entry, unchanged=True) for entry in previous]
+                return {
+                    'filename': filename,
+                    'statement_date': statement_date,
+                    'bill_to': bill_to,
+                    'invoices': invoices,
+                    'total_amount': float(sum(_to_decimal(invoice['total_amount']) for invoice in invoices)),
+                    'size': os.path.getsize(filename),
+                    'unchanged': True
+                }
+
+        # Unchanged invoices keep their number; only new work is numbered
+        numbers = iter(self._get_allocator(output_dir).reserve(
+            sum(1 for spec, entry in zip(batch, previous) if spec.get('invoice_number') is None and entry is None)))
+        invoices = []
+        for spec, entry in zip(batch, previous):
+            invoice_number = spec.get('invoice_number')
+            if entry is not None:
+                invoice_number = entry['invoice_number']
+            elif invoice_number is None:
+                invoice_number = self._format_invoice_number(next(numbers))
+            invoices.append(self._prepare_invoice(
+                spec['student_name'], spec.get('courses'), spec.get('lessons_per_course'), spec['rate_per_lesson'],
+                invoice_number, spec.get('invoice_date') or statement_date, bill_to, output_dir,
+                spec.get('lesson_items')))
+
+        if output is None and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        for invoice in invoices:
+            invoice['filename'] = filename
+        total_amount = float(sum(_to_decimal(invoice['total_amount']) for invoice in invoices))
+
+        backend = self._get_backend('reportlab')
+        story = backend.build_statement_story(statement_date, bill_to, invoices, total_amount,
+                                              [self.invoice_sections(invoice) for invoice in invoices])
 
-        # Generate PDF
-        doc.build(story)
+        buffer = io.BytesIO()
+        backend.render(story, buffer)
+        pdf = buffer.getvalue()
+        if output is None:
+            with open(filename, 'wb') as handle:
+                handle.write(pdf)
+            manifest = self._get_manifest(output_dir)
+            for key, invoice in zip(keys, invoices):
+                manifest.record(key, invoice)
+        else:
+            output.write(pdf)
+        ledger = self._select_ledger(ledger, output_dir, output)
+        if ledger is not None:
+            ledger.record_many(invoices)
 
         return {
             'filename': filename,
+            'statement_date': statement_date,
+            'bill_to': bill_to,
+            'invoices': invoices,
+            'total_amount': total_amount,
+            'size': len(pdf)
+        }
+
+    def generate_invoices(self, batch, workers=None, progress=None):
+        """
+        Generate a batch of invoices in parallel across a process pool
+
+        Args:
+            batch (list): Invoice specs, each a dict of keyword arguments
+                for generate_invoice
+            workers (int, optional): Number of worker processes (defaults to
+                the number of CPUs; 1 renders in this process)
+            progress (callable, optional): Called as progress(done, total, result)
+                each time an invoice finishes, in completion order
+
+        Returns:
+            list: One entry per spec, in batch order. Successful entries are the
+                generate_invoice result dict; failed entries are a dict with
+                'index', 'error', 'traceback' and 'spec' keys.
+        """
+        batch = list(batch)
+        total = len(batch)
+        results = [None] * total
+        if total == 0:
+            return results
+
+        # Unchanged invoices are answered from the manifest without a worker
+        pending = []
+        done = 0
+        for index, spec in enumerate(batch):
+            previous = self._find_unchanged(spec)
+            if previous is None:
+                pending.append(index)
+                continue
+            results[index] = previous
+            done += 1
+            if progress is not None:
+                progress(done, total, previous)
+        if not pending:
+            return results
+
+        # Number the whole batch up front, in batch order, with one
+        # reservation per output directory
+        unnumbered = {}
+        for index in pending:
+            spec = batch[index]
+            if spec.get('invoice_number') is None:
+                unnumbered.setdefault(spec.get('output_dir', 'invoices'), []).append(index)
+        for output_dir, indices in unnumbered.items():
+            numbers = self._get_allocator(output_dir).reserve(len(indices))
+            for index, number in zip(indices, numbers):
+                batch[index] = dict(batch[index], invoice_number=self._format_invoice_number(number))
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(pending)))
+
+        if workers == 1:
+            for index in pending:
+                results[index] = _render_invoice_spec(self, index, batch[index])
+                done += 1
+                if progress is not None:
+                    progress(done, total, results[index])
+            return results
+
+        # The pool machinery (multiprocessing, logging) is only loaded for batches
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        # Each worker gets the generator once and keeps it warm: its backends
+        # and laid-out template blocks, ledger and manifests are reused
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as pool:
+            futures = {
+                pool.submit(_render_in_worker, index, batch[index]): index
+                for index in pending
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except Exception as exc:  # worker died or spec failed to pickle
+                    results[index] = _invoice_failure(index, batch[index], exc)
+                done += 1
+                if progress is not None:
+                    progress(done, total, results[index])
+
+        return results
+
+    def _prepare_invoice(self, student_name, courses, lessons_per_course, rate_per_lesson,
+                         invoice_number, invoice_date, bill_to, output_dir, lesson_items=None):
+        """Number an invoice and work out its totals"""
+        # Generate invoice number if not provided
+        if invoice_number is None:
+            invoice_number = self._format_invoice_number(self._get_next_invoice_number(output_dir))
+        
+        # Calculate line amounts and totals in exact cents; the result keeps
+        # floats (exact to the cent) for callers that format or serialise them
+        if lesson_items is None:
+            amounts = compute_invoice_amounts(lessons_per_course, rate_per_lesson, self.vat_rate)
+            line_amounts = amounts['line_amounts']
+        else:
+            lesson_items, courses, lessons_per_course, line_amounts, amounts = self._price_lessons(
+                lesson_items, rate_per_lesson)
+
+        result = {
             'invoice_number': invoice_number,
             'invoice_date': invoice_date,
             'student_name': student_name,
             'courses': courses,
             'lessons_per_course': lessons_per_course,
             'rate_per_lesson': rate_per_lesson,
-            'subtotal': subtotal,
-            'vat_amount': vat_amount,
-            'total_amount': total_amount,
+            'line_amounts': [float(amount) for amount in line_amounts],
+            'subtotal': float(amounts['subtotal']),
+            'vat_amount': float(amounts['vat_amount']),
+            'total_amount': float(amounts['total_amount']),
             'bill_to': bill_to
         }
-    def _build_invoice_content_multi(self, invoice_number, invoice_date, student_name, courses,
-                              lessons_per_course, rate_per_lesson, subtotal, vat_amount, total_amount, bill_to):
-        """Build the PDF content structure for multiple courses with improved formatting"""
-        
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Define custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=28,
-            spaceAfter=20,
-            alignment=TA_CENTER,
-            textColor=colors.darkblue,
-            fontName='Helvetica-Bold'
-        )
-        
-        header_style = ParagraphStyle(
-            'HeaderStyle',
-            parent=styles['Normal'],
-            fontSize=12,
-            fontName='Helvetica-Bold',
-            textColor=colors.darkblue,
-            spaceAfter=8,
-            spaceBefore=8
-        )
-        
-        # Updated address styles with better spacing
-        address_style = ParagraphStyle(
-            'AddressStyle',
-            parent=styles['Normal'],
-            fontSize=10,
-            spaceAfter=4,
-            alignment=TA_LEFT,
-            leftIndent=8,  # Added left indent for better spacing
-            rightIndent=8  # Added right indent for better spacing
-        )
-        
-        footer_style = ParagraphStyle(
-            'FooterStyle',
-            parent=styles['Normal'],
-            fontSize=10,
-            alignment=TA_LEFT,
-            spaceAfter=6
-        )
-        
-        # Main invoice title
-        story.append(Paragraph("INVOICE", title_style))
-        story.append(Spacer(1, 20))
-        
-        # FROM and BILL TO header sections with improved formatting
-        from_header = Paragraph("<b>FROM:</b>", header_style)
-        bill_to_header = Paragraph("<b>BILL TO:</b>", header_style)
+        if lesson_items is not None:
+            result['lesson_items'] = lesson_items
+        return result
+
+    def _price_lessons(self, lesson_items, rate_per_lesson):
+        """
+        Price lesson-by-lesson billing
+
+        Returns:
+            tuple: (lessons with 'rate' and 'amount' filled in, courses, hours
+                per course, amount per course, compute_invoice_amounts totals)
+        """
+        rates = [item.get('rate', rate_per_lesson) for item in lesson_items]
+        amounts = compute_invoice_amounts([item['hours'] for item in lesson_items], rates, self.vat_rate)
+
+        priced = []
+        course_hours = {}
+        course_amounts = {}
+        for item, rate, amount in zip(lesson_items, rates, amounts['line_amounts']):
+            course = item['course']
+            priced.append({
+                'date': item.get('date', ''),
+                'course': course,
+                'hours': item['hours'],
+                'rate': rate,
+                'amount': float(amount)
+            })
+            course_hours[course] = course_hours.get(course, Decimal(0)) + _to_decimal(item['hours'])
+            course_amounts[course] = course_amounts.get(course, Decimal(0)) + amount
+
+        courses = list(course_hours)
+        lessons_per_course = [_parse_hours(hours) for hours in course_hours.values()]
+        return priced, courses, lessons_per_course, list(course_amounts.values()), amounts
+
+    def invoice_sections(self, invoice):
+        """
+        Describe a prepared invoice section by section, for any backend
         
-        # FROM section (Your company) - better formatted
-        from_lines = [
-            f"<b>{self.company_info['name']}</b>",
-            f"Reg No: {self.company_info['registration_number']}",
-            self.company_info['address'],
-            f"Tel: {self.company_info['contact']}",
-            f"Email: {self.company_info['email']}",
-            self.company_info['website']
-        ]
-        from_paragraph = Paragraph("<br/>".join(from_lines), address_style)
+        Args:
+            invoice (dict): Invoice details as returned by _prepare_invoice
         
-        # BILL TO section - better formatted with proper spacing
+        Returns:
+            list: (name, content) pairs in INVOICE_SECTIONS order. Content is
+                plain data (text lines, table rows); the 'terms', 'banking'
+                and 'footer' sections and the FROM lines are built once and
+                shared by every invoice, so backends can cache what they make
+                from them.
+        """
+        static = self._static_content()
+        bill_to = invoice['bill_to']
         bill_lines = [
-            f"<b>{bill_to['name']}</b>",
+            bill_to['name'],
             bill_to.get('address_line1', ''),
             bill_to.get('address_line2', ''),
             bill_to.get('city', ''),
             f"Postal Code: {bill_to.get('postal_code', '')}",
             f"VAT No: {bill_to.get('vat_no', '')}"
         ]
-        # Remove empty lines
-        bill_lines = [line for line in bill_lines if line.strip() and line.strip() != ',']
-        bill_paragraph = Paragraph("<br/>".join(bill_lines), address_style)
-        
-        # Create two-column table for FROM and BILL TO with improved spacing
-        header_table = Table([
-            [from_header, bill_to_header],
-            [from_paragraph, bill_paragraph]
-        ], colWidths=[3.25*inch, 3.25*inch])
-        
-        header_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 12),  # Increased left padding
-            ('RIGHTPADDING', (0, 0), (-1, -1), 12),  # Increased right padding
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            # Enhanced border styling for BILL TO section
-            ('BOX', (1, 0), (1, -1), 2, colors.darkblue),
-            ('BACKGROUND', (1, 0), (1, 0), colors.lightblue),
-            # Add some spacing around the content
-            ('LEFTPADDING', (1, 1), (1, 1), 15),
-            ('RIGHTPADDING', (1, 1), (1, 1), 15),
-            ('TOPPADDING', (1, 1), (1, 1), 12),
-            ('BOTTOMPADDING', (1, 1), (1, 1), 12),
-        ]))
-        
-        story.append(header_table)
-        story.append(Spacer(1, 30))
-        
-        # Invoice details section
-        story.append(Paragraph("INVOICE DETAILS", header_style))
         
-        invoice_details = [
-            ['Invoice Number:', invoice_number],
-            ['Invoice Date:', invoice_date],
-            ['Student Name:', student_name],
-            ['Courses:', ', '.join(courses)]
-        ]
-        
-        invoice_table = Table(invoice_details, colWidths=[2*inch, 4*inch])
-        invoice_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('LEFTPADDING', (0, 0), (-1, -1), 12),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-            ('BACKGROUND', (0, 0), (-1, -1), colors.lightyellow),
-        ]))
-        
-        story.append(invoice_table)
-        story.append(Spacer(1, 25))
-        
-        # Service details table for multiple courses
-        story.append(Paragraph("SERVICE DETAILS", header_style))
-        
-        service_data = [
-            ['Description', 'Quantity (hours)', 'Rate (ZAR/hour)', 'Amount (ZAR)']
-        ]
-        
-        for course, hours in zip(courses, lessons_per_course):
-            service_data.append([
-                f'{course}',
-                str(hours),
-                f'R {rate_per_lesson:,.2f}',
-                f'R {hours * rate_per_lesson:,.2f}'
-            ])
-        
-        # Make Description column narrower and other columns wider and more equal
-        service_table = Table(service_data, colWidths=[2*inch, 2*inch, 1.5*inch, 1.5*inch])
-        service_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-        ]))
-        
-        story.append(service_table)
-        story.append(Spacer(1, 20))
-        
-        # Totals table (only show if VAT > 0, otherwise just show total)
-        if vat_amount > 0:
-            totals_data = [
-                ['Subtotal:', f'R {subtotal:,.2f}'],
-                ['VAT (15%):', f'R {vat_amount:,.2f}'],
-                ['TOTAL AMOUNT:', f'R {total_amount:,.2f}']
+        if invoice['vat_amount'] > 0:
+            totals = [
+                ['Subtotal:', f"R {invoice['subtotal']:,.2f}"],
+                ['VAT (15%):', f"R {invoice['vat_amount']:,.2f}"],
+                ['TOTAL AMOUNT:', f"R {invoice['total_amount']:,.2f}"]
             ]
         else:
-            totals_data = [
-                ['TOTAL AMOUNT:', f'R {total_amount:,.2f}']
+            totals = [
+                ['TOTAL AMOUNT:', f"R {invoice['total_amount']:,.2f}"]
             ]
         
-        totals_table = Table(totals_data, colWidths=[4.25*inch, 1.75*inch])
-        totals_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, -2), 'Helvetica'),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('FONTSIZE', (0, -1), (-1, -1), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('LEFTPADDING', (0, 0), (-1, -1), 12),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-            ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-        ]))
-        
-        story.append(totals_table)
-        story.append(Spacer(1, 30))
-        
-        # Payment terms
-        story.append(Paragraph("PAYMENT TERMS", header_style))
-        payment_terms_text = """
-        • Payment is due within 5 days of invoice date<br/>
-        • Please reference the invoice number when making payment<br/>
-        • Late payments may incur additional charges<br/>
-        """
-        story.append(Paragraph(payment_terms_text, footer_style))
-        story.append(Spacer(1, 20))
-        
-        # Force page break before banking details
-        story.append(PageBreak())
-        
-        # Banking details in a well-formatted table
-        story.append(Paragraph("BANKING DETAILS", header_style))
-        
-        banking_data = [
-            ['Bank Name:', self.banking_details['bank_name']],
-            ['Account Name:', self.banking_details['account_name']],
-            ['Account Number:', self.banking_details['account_number']],
-            ['Branch:', self.banking_details['branch']],
-            ['Branch Code:', self.banking_details['branch_code']],
-            ['Account Type:', self.banking_details['account_type']]
+        sections = {
+            'header': {'title': 'INVOICE', 'logo_path': self.logo_path, 'logo_width': LOGO_WIDTH},
+            'parties': {
+                'from': static['from'],
+                # Remove empty lines
+                'bill_to': [line for line in bill_lines if line.strip() and line.strip() != ',']
+            },
+            'details': [
+                ['Invoice Number:', invoice['invoice_number']],
+                ['Invoice Date:', invoice['invoice_date']],
+                ['Student Name:', invoice['student_name']],
+                ['Courses:', ', '.join(invoice['courses'])]
+            ],
+            'services': self._service_content(invoice),
+            'totals': totals,
+            'terms': static['terms'],
+            'banking': static['banking'],
+            'footer': static['footer'],
+        }
+        return [(name, sections[name]) for name in INVOICE_SECTIONS]
+
+    def _service_content(self, invoice):
+        """Service table rows: one per course, or one per lesson for lesson-by-lesson billing"""
+        if 'lesson_items' in invoice:
+            items = invoice['lesson_items']
+            amounts = [_to_decimal(item['amount']) for item in items]
+            rows = [
+                [item['date'], item['course'], str(item['hours']), f"R {item['rate']:,.2f}", f'R {amount:,.2f}']
+                for item, amount in zip(items, amounts)
+            ]
+            return {
+                'headings': ['Date', 'Description', 'Hours', 'Rate (ZAR/hour)', 'Amount (ZAR)'],
+                'rows': rows,
+                'amounts': amounts,
+                'per_lesson': True
+            }
+        
+        rate_per_lesson = invoice['rate_per_lesson']
+        if isinstance(rate_per_lesson, (list, tuple)):
+            line_rates = rate_per_lesson
+        else:
+            line_rates = [rate_per_lesson] * len(invoice['courses'])
+        amounts = [_to_decimal(amount) for amount in invoice['line_amounts']]
+        rows = [
+            [f'{course}', str(hours), f'R {rate:,.2f}', f'R {amount:,.2f}']
+            for course, hours, rate, amount in zip(invoice['courses'], invoice['lessons_per_course'],
+                                                   line_rates, amounts)
         ]
-        
-        banking_table = Table(banking_data, colWidths=[2.5*inch, 3.5*inch])
-        banking_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('LEFTPADDING', (0, 0), (-1, -1), 15),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-            ('GRID', (0, 0), (-1, -1), 1.5, colors.darkblue),
-            ('BACKGROUND', (0, 0), (-1, -1), colors.aliceblue),
-            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.aliceblue, colors.white]),
-        ]))
-        
-        story.append(banking_table)
-        story.append(Spacer(1, 20))
-        
-        # Thank you message
-        thank_you_text = "<b>Thank you for choosing Yolymatics Tutorials for your educational needs.</b>"
-        story.append(Paragraph(thank_you_text, footer_style))
-        story.append(Spacer(1, 30))
-        
-        # Bible verse at the bottom
-        bible_verse_style = ParagraphStyle(
-            'BibleVerseStyle',
-            parent=styles['Normal'],
-            fontSize=10,
-            alignment=TA_CENTER,
-            spaceAfter=6,
-            fontName='Helvetica-Oblique',
-            textColor=colors.darkblue
-        )
-        bible_verse_text = '<i>"For I know the plans I have for you," declares the Lord, "plans to prosper you and not to harm you, to give you hope and a future." - Jeremiah 29:11</i>'
-        story.append(Paragraph(bible_verse_text, bible_verse_style))
-        
-        return story
-    
-    def _get_next_invoice_number(self):
-        """Generate a sequential invoice number"""
-        return f"{datetime.now().strftime('%H%M%S')}"
+        return {
+            'headings': ['Description', 'Quantity (hours)', 'Rate (ZAR/hour)', 'Amount (ZAR)'],
+            'rows': rows,
+            'amounts': amounts,
+            'per_lesson': False
+        }
+
+    def _static_content(self):
+        """Return the sections shared by every invoice, rebuilding them if company details changed"""
+        key = repr((sorted(self.company_info.items()), sorted(self.banking_details.items())))
+        if self._static_content_cache is None or self._static_content_key != key:
+            self._static_content_cache = {
+                'from': [
+                    self.company_info['name'],
+                    f"Reg No: {self.company_info['registration_number']}",
+                    self.company_info['address'],
+                    f"Tel: {self.company_info['contact']}",
+                    f"Email: {self.company_info['email']}",
+                    self.company_info['website']
+                ],
+                'terms': {
+                    'title': 'PAYMENT TERMS',
+                    'lines': PAYMENT_TERMS
+                },
+                'banking': {
+                    'title': 'BANKING DETAILS',
+                    'rows': [
+                        ['Bank Name:', self.banking_details['bank_name']],
+                        ['Account Name:', self.banking_details['account_name']],
+                        ['Account Number:', self.banking_details['account_number']],
+                        ['Branch:', self.banking_details['branch']],
+                        ['Branch Code:', self.banking_details['branch_code']],
+                        ['Account Type:', self.banking_details['account_type']]
+                    ]
+                },
+                'footer': {
+                    'thank_you': THANK_YOU_TEXT,
+                    'verse': BIBLE_VERSE_TEXT
+                },
+            }
+            self._static_content_key = key
+        return self._static_content_cache
+
+    def _get_backend(self, name=None):
+        """Return the (cached) rendering backend, by default the generator's own"""
+        key = (name or self.backend, self.template_mode, self.reproducible, self.compress)
+        backend = self._backends.get(key)
+        if backend is None:
+            backend = self._backends[key] = _make_backend(*key)
+        return backend
     
-    def _build_invoice_content(self, invoice_number, invoice_date, student_name, course,
-                              lessons, rate_per_lesson, subtotal, vat_amount, total_amount, bill_to):
-        """Build the PDF content structure with improved formatting"""
-        
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Define custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=28,
-            spaceAfter=20,
-            alignment=TA_CENTER,
-            textColor=colors.darkblue,
-            fontName='Helvetica-Bold'
-        )
-        
-        header_style = ParagraphStyle(
-            'HeaderStyle',
-            parent=styles['Normal'],
-            fontSize=12,
-            fontName='Helvetica-Bold',
-            textColor=colors.darkblue,
-            spaceAfter=8,
-            spaceBefore=8
-        )
-        
-        # Updated address styles with better spacing
-        address_style = ParagraphStyle(
-            'AddressStyle',
-            parent=styles['Normal'],
-            fontSize=10,
-            spaceAfter=4,
-            alignment=TA_LEFT,
-            leftIndent=8,  # Added left indent for better spacing
-            rightIndent=8  # Added right indent for better spacing
-        )
-        
-        footer_style = ParagraphStyle(
-            'FooterStyle',
-            parent=styles['Normal'],
-            fontSize=10,
-            alignment=TA_LEFT,
-            spaceAfter=6
+    def _select_bill_to(self, client_info, use_tti_default):
+        """Select client information (TTI Group by default)"""
+        return (
+            self.default_client_info.copy()
+            if (use_tti_default and client_info is None)
+            else (client_info or self.default_client_info)
         )
-        
-        # Main invoice title
-        story.append(Paragraph("INVOICE", title_style))
-        story.append(Spacer(1, 20))
-        
-        # FROM and BILL TO header sections with improved formatting
-        from_header = Paragraph("<b>FROM:</b>", header_style)
-        bill_to_header = Paragraph("<b>BILL TO:</b>", header_style)
-        
-        # FROM section (Your company) - better formatted
-        from_lines = [
-            f"<b>{self.company_info['name']}</b>",
-            f"Reg No: {self.company_info['registration_number']}",
-            self.company_info['address'],
-            f"Tel: {self.company_info['contact']}",
-            f"Email: {self.company_info['email']}",
-            self.company_info['website']
-        ]
-        from_paragraph = Paragraph("<br/>".join(from_lines), address_style)
-        
-        # BILL TO section (TTI Group) - better formatted with proper spacing
-        bill_lines = [
-            f"<b>{bill_to['name']}</b>",
-            bill_to.get('address_line1', ''),
-            bill_to.get('address_line2', ''),
-            f"{bill_to.get('city', '')}, {bill_to.get('country', '')}",
-            f"Postal Code: {bill_to.get('postal_code', '')}",
-            f"Email: {bill_to.get('email', '')}"
-        ]
-        bill_paragraph = Paragraph("<br/>".join(bill_lines), address_style)
-        
-        # Create two-column table for FROM and BILL TO with improved spacing
-        header_table = Table([
-            [from_header, bill_to_header],
-            [from_paragraph, bill_paragraph]
-        ], colWidths=[3.25*inch, 3.25*inch])
-        
-        header_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 12),  # Increased left padding
-            ('RIGHTPADDING', (0, 0), (-1, -1), 12),  # Increased right padding
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            # Enhanced border styling for BILL TO section
-            ('BOX', (1, 0), (1, -1), 2, colors.darkblue),
-            ('BACKGROUND', (1, 0), (1, 0), colors.lightblue),
-            # Add some spacing around the content
-            ('LEFTPADDING', (1, 1), (1, 1), 15),
-            ('RIGHTPADDING', (1, 1), (1, 1), 15),
-            ('TOPPADDING', (1, 1), (1, 1), 12),
-            ('BOTTOMPADDING', (1, 1), (1, 1), 12),
-        ]))
-        
-        story.append(header_table)
-        story.append(Spacer(1, 30))
-        
-        # Invoice details section
-        story.append(Paragraph("INVOICE DETAILS", header_style))
-        
-        invoice_details = [
-            ['Invoice Number:', invoice_number],
-            ['Invoice Date:', invoice_date],
-            ['Student Name:', student_name],
-            ['Course:', course]
-        ]
-        
-        invoice_table = Table(invoice_details, colWidths=[2*inch, 4*inch])
-        invoice_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('LEFTPADDING', (0, 0), (-1, -1), 12),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
-            ('BACKGROUND', (0, 0), (-1, -1), colors.lightyellow),
-        ]))
-        
-        story.append(invoice_table)
-        story.append(Spacer(1, 25))
-        
-        # Service details table
-        story.append(Paragraph("SERVICE DETAILS", header_style))
-        
-        service_data = [
-            ['Description', 'Quantity', 'Rate (ZAR)', 'Amount (ZAR)'],
-            [f'{course} Tutoring Sessions', 
-             str(lessons), 
-             f'R {rate_per_lesson:,.2f}', 
-             f'R {subtotal:,.2f}']
-        ]
-        
-        service_table = Table(service_data, colWidths=[3*inch, 1*inch, 1.25*inch, 1.25*inch])
-        service_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ('TOPPADDING', (0, 0), (-1, -1), 12),
-            ('LEFTPADDING', (0, 0), (-1, -1), 8),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('ALIGN', (0, 1), (0, 1), 'LEFT'),
-            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-        ]))
-        
-        story.append(service_table)
-        story.append(Spacer(1, 20))
-        
-        # Totals table
-        totals_data = [
-            ['Subtotal:', f'R {subtotal:,.2f}'],
-            ['VAT (15%):', f'R {vat_amount:,.2f}'],
-            ['TOTAL AMOUNT:', f'R {total_amount:,.2f}']
-        ]
-        
-        totals_table = Table(totals_data, colWidths=[4.25*inch, 1.75*inch])
-        totals_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 1), 'Helvetica'),
-            ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('FONTSIZE', (0, 2), (-1, 2), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('LEFTPADDING', (0, 0), (-1, -1), 12),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 12),
-            ('LINEABOVE', (0, 2), (-1, 2), 2, colors.black),
-            ('BACKGROUND', (0, 2), (-1, 2), colors.lightgrey),
-        ]))
-        
-        story.append(totals_table)
-        story.append(Spacer(1, 30))
-        
-        # Payment terms
-        story.append(Paragraph("PAYMENT TERMS", header_style))
-        payment_terms_text = """
-        • Payment is due within 5 days of invoice date<br/>
-        • Please reference the invoice number when making payment<br/>
-        • Late payments may incur additional charges<br/>
-        """
-        story.append(Paragraph(payment_terms_text, footer_style))
-        story.append(Spacer(1, 20))
-        
-        # Banking details in a well-formatted table
-        story.append(Paragraph("BANKING DETAILS", header_style))
-        
-        banking_data = [
-            ['Bank Name:', self.banking_details['bank_name']],
-            ['Account Name:', self.banking_details['account_name']],
-            ['Account Number:', self.banking_details['account_number']],
-            ['Branch:', self.banking_details['branch']],
-            ['Branch Code:', self.banking_details['branch_code']],
-            ['Account Type:', self.banking_details['account_type']]
-        ]
-        
-        banking_table = Table(banking_data, colWidths=[2.5*inch, 3.5*inch])
-        banking_table.setStyle(TableStyle([
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-            ('TOPPADDING', (0, 0), (-1, -1), 10),
-            ('LEFTPADDING', (0, 0), (-1, -1), 15),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-            ('GRID', (0, 0), (-1, -1), 1.5, colors.darkblue),
-            ('BACKGROUND', (0, 0), (-1, -1), colors.aliceblue),
-            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.aliceblue, colors.white]),
-        ]))
-        
-        story.append(banking_table)
-        story.append(Spacer(1, 20))
-        
-        # Thank you message
-        thank_you_text = "<b>Thank you for choosing Yolymatics Tutorials for your educational needs.</b>"
-        story.append(Paragraph(thank_you_text, footer_style))
-        
-        return story
 
+    def _invoice_input_key(self, student_name, courses, lessons_per_course, rate_per_lesson,
+                           invoice_date, bill_to, lesson_items=None):
+        """Hash everything that determines an invoice's content apart from its number"""
+        inputs = {
+            'version': __version__,
+            'code': _output_code_digest(),
+            'student_name': student_name,
+            'courses': list(courses or ()),
+            'lessons_per_course': _number_key(list(lessons_per_course or ())),
+            'lesson_items': None if lesson_items is None else [
+                dict(item, **{field: _number_key(item[field]) for field in ('hours', 'rate') if field in item})
+                for item in lesson_items],
+            'rate_per_lesson': _number_key(rate_per_lesson),
+            'invoice_date': invoice_date,
+            'bill_to': bill_to,
+            'vat_rate': _number_key(self.vat_rate),
+            'company_info': self.company_info,
+            'banking_details': self.banking_details,
+            'logo_path': self.logo_path,
+            'backend': self.backend,
+            'reproducible': self.reproducible,
+            'compress': self.compress,
+        }
+        encoded = json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _find_unchanged(self, spec):
+        """Return the recorded result for a batch spec with skip_unchanged and unchanged inputs"""
+        try:
+            bound = inspect.signature(self.generate_invoice).bind(**spec)
+        except TypeError:
+            return None  # let the worker report the bad spec
+        bound.apply_defaults()
+        args = bound.arguments
+        if not args['skip_unchanged']:
+            return None
+        invoice_date = args['invoice_date'] or datetime.now().strftime('%Y-%m-%d')
+        bill_to = self._select_bill_to(args['client_info'], args['use_tti_default'])
+        key = self._invoice_input_key(args['student_name'], args['courses'], args['lessons_per_course'],
+                                      args['rate_per_lesson'], invoice_date, bill_to, args['lesson_items'])
+        previous = self._get_manifest(args['output_dir']).lookup(key, args['invoice_number'])
+        return None if previous is None else dict(previous, unchanged=True)
 
-# Example usage
-if __name__ == "__main__":
+    def _get_manifest(self, output_dir):
+        """Return the incremental-run manifest for an output directory"""
+        key = os.path.abspath(output_dir)
+        manifest = self._manifests.get(key)
+        if manifest is None:
+            manifest = self._manifests[key] = InvoiceManifest(output_dir)
+        return manifest
+
+    def get_ledger(self, output_dir="invoices"):
+        """Return the InvoiceLedger for an output directory"""
+        key = os.path.abspath(output_dir)
+        ledger = self._ledgers.get(key)
+        if ledger is None:
+            ledger = self._ledgers[key] = InvoiceLedger(output_dir)
+        return ledger
+
+    def _select_ledger(self, ledger, output_dir, output):
+        """The ledger an invoice is recorded in, or None to not record it"""
+        if ledger is None:
+            # Streamed and in-memory invoices stay off disk unless asked for
+            ledger = self.ledger and output is None
+        if ledger is True:
+            return self.get_ledger(output_dir)
+        return None if ledger is False else ledger
+
+    def _get_allocator(self, output_dir):
+        """Return the invoice number allocator for an output directory"""
+        key = os.path.abspath(output_dir)
+        allocator = self._allocators.get(key)
+        if allocator is None:
+            allocator = InvoiceNumberAllocator(output_dir, block_size=self.invoice_block_size)
+            self._allocators[key] = allocator
+        return allocator
+
+    def _get_next_invoice_number(self, output_dir="invoices"):
+        """Generate a sequential invoice number, unique within output_dir"""
+        return self._get_allocator(output_dir).next_number()
+
+    def _format_invoice_number(self, number):
+        """Format a sequence number as an invoice number"""
+        return f"INV-{datetime.now().strftime('%Y%m%d')}-{number:06d}"
+
+
+def _format_profile(profiler, limit=25):
+    """Render the top of a cProfile run as text"""
+    import pstats
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
+
+
+def summarize_timings(results):
+    """
+    Aggregate the per-phase timings of a batch of generate_invoice results
+
+    Failed and unchanged entries carry no timings and are skipped.
+
+    Args:
+        results (list): Results from generate_invoice or generate_invoices
+
+    Returns:
+        dict: For each phase, a dict with 'count', 'total', 'mean', 'p50',
+            'p95' and 'max' in seconds
+    """
+    samples = {}
+    for result in results:
+        for phase, seconds in result.get('timings', {}).items():
+            samples.setdefault(phase, []).append(seconds)
+
+    summary = {}
+    for phase, values in samples.items():
+        values.sort()
+        count = len(values)
+        summary[phase] = {
+            'count': count,
+            'total': sum(values),
+            'mean': sum(values) / count,
+            'p50': values[(count - 1) // 2],
+            'p95': values[min(count - 1, int(count * 0.95))],
+            'max': values[-1]
+        }
+    return summary
+
+
+def _invoice_failure(index, spec, exc):
+    """Describe a failed invoice so the rest of the batch can carry on"""
+    return {
+        'index': index,
+        'error': f"{type(exc).__name__}: {exc}",
+        'traceback': ''.join(traceback.format_exception(type(exc), exc, exc.__traceback__)),
+        'spec': spec
+    }
+
+
+def _render_invoice_spec(generator, index, spec):
+    """Render one batch entry, reporting a failure instead of raising"""
+    try:
+        return generator.generate_invoice(**spec)
+    except Exception as exc:
+        return _invoice_failure(index, spec, exc)
+
+
+# Set in each pool worker by _init_worker
+_worker_generator = None
+
+
+def _init_worker(generator):
+    """Keep one warm generator per worker process"""
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _render_in_worker(index, spec):
+    """Render one batch entry inside a worker process"""
+    return _render_invoice_spec(_worker_generator, index, spec)
+
+
+def _parse_hours(value):
+    """Parse an hours value, keeping whole numbers as ints (2 rather than 2.0)"""
+    hours = float(value)
+    return int(hours) if hours.is_integer() else hours
+
+
+def is_jsonl_log(path):
+    """Lesson logs ending in .jsonl, .ndjson or .json hold one JSON object per line"""
+    return os.path.splitext(path)[1].lower() in ('.jsonl', '.ndjson', '.json')
+
+
+def iter_lesson_rows(path):
+    """
+    Stream lesson records from a CSV or JSON Lines lesson log
+
+    Files ending in .jsonl, .ndjson or .json are read as one JSON object per
+    line; anything else as CSV with a header row.
+
+    Args:
+        path (str): Path to the lesson log
+
+    Yields:
+        dict: Lesson with 'student', 'date', 'course', 'hours' and 'client' keys
+            (plus 'rate' and 'client_email' when present)
+    """
+    with open(path, newline='', encoding='utf-8') as handle:
+        yield from parse_lesson_rows(handle, is_jsonl_log(path), source=path)
+
+
+def parse_lesson_rows(lines, is_jsonl, source='lesson log', fieldnames=None, first_record=1):
+    """
+    Parse lesson records from lines of a lesson log (see iter_lesson_rows)
+
+    Args:
+        lines (iterable): Text lines
+        is_jsonl (bool): JSON Lines rather than CSV
+        source (str): Name used in error messages
+        fieldnames (list, optional): CSV column names, for lines that
+            continue a log whose header was read earlier
+        first_record (int): Number of the first record, for error messages
+
+    Yields:
+        dict: Lessons as from iter_lesson_rows
+    """
+    records = (json.loads(line) for line in lines if line.strip()) if is_jsonl else csv.DictReader(
+        lines, fieldnames=fieldnames)
+    for line_number, record in enumerate(records, start=first_record):
+        record = {key.strip().lower(): value for key, value in record.items() if key}
+        try:
+            lesson = {
+                'student': str(record['student']).strip(),
+                'date': str(record.get('date') or '').strip(),
+                'course': str(record['course']).strip(),
+                'hours': _parse_hours(record['hours']),
+                'client': str(record.get('client') or '').strip(),
+            }
+            if record.get('rate') not in (None, ''):
+                lesson['rate'] = float(record['rate'])
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"{source}: bad lesson record {line_number}: {exc}") from None
+        if record.get('client_email'):
+            lesson['client_email'] = str(record['client_email']).strip()
+        yield lesson
+
+
+def group_lessons(lessons, rate_per_lesson=350.0, default_client_name=None, per_lesson=False,
+                  **invoice_options):
+    """
+    Group a stream of lessons into one invoice spec per student and client
+
+    Only running totals per (student, client) and (course, rate) are kept, so
+    memory depends on the number of students, not the length of the log. A
+    course billed at two rates appears as two lines.
+
+    Args:
+        lessons (iterable): Lesson dicts as produced by iter_lesson_rows
+        rate_per_lesson (float): Rate for lessons without their own 'rate'
+        default_client_name (str, optional): Client name that means the
+            generator's default (TTI) client
+        per_lesson (bool): Keep every lesson and bill them line by line
+            (generate_invoice's lesson_items) instead of one line per course;
+            memory then grows with the length of the log
+        **invoice_options: Extra generate_invoice arguments for every spec
+
+    Returns:
+        list: Invoice specs for generate_invoice/generate_invoices, in the
+            order each student first appears in the log
+    """
+    groups = {}
+    for lesson in lessons:
+        client = lesson['client']
+        if client == default_client_name:
+            client = ''
+        key = (lesson['student'], client)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {'hours': {}, 'lessons': [], 'client_email': ''}
+        line = (lesson['course'], lesson.get('rate', rate_per_lesson))
+        # Sum in Decimal so fractional hours do not pick up float noise
+        hours = group['hours'].get(line, Decimal(0)) + _to_decimal(lesson['hours'])
+        group['hours'][line] = hours
+        group['client_email'] = lesson.get('client_email', group['client_email'])
+        if per_lesson:
+            group['lessons'].append({'date': lesson['date'], 'course': lesson['course'],
+                                     'hours': lesson['hours'], 'rate': line[1]})
+
+    specs = []
+    for (student, client), group in groups.items():
+        lines = list(group['hours'].items())
+        rates = [rate for (course, rate), hours in lines]
+        spec = dict(invoice_options,
+                    student_name=student,
+                    courses=[course for (course, rate), hours in lines],
+                    lessons_per_course=[_parse_hours(hours) for line, hours in lines],
+                    rate_per_lesson=rates[0] if len(set(rates)) == 1 else rates)
+        if per_lesson:
+            spec.update(courses=None, lessons_per_course=None, rate_per_lesson=rate_per_lesson,
+                        lesson_items=group['lessons'])
+        if client:
+            spec['client_info'] = {'name': client, 'email': group['client_email']}
+            spec['use_tti_default'] = False
+        specs.append(spec)
+    return specs
+
+
+def _format_size(size):
+    """Byte count as B/KiB/MiB for progress lines"""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KiB"
+    return f"{size / (1024 * 1024):.1f} MiB"
+
+
+def _run_command(args):
+    """Bill every student in a lesson log"""
+    generator = InvoiceGenerator(template_mode=True, logo_path=DEFAULT_LOGO_PATH if args.logo else None,
+                                 reproducible=args.reproducible)
+    specs = group_lessons(iter_lesson_rows(args.lessons), rate_per_lesson=args.rate,
+                          default_client_name=generator.default_client_info['name'],
+                          per_lesson=args.per_lesson, output_dir=args.output_dir,
+                          skip_unchanged=not args.force)
+
+    def report(done, total, result):
+        if 'error' in result:
+            print(f"[{done}/{total}] FAILED {result['spec']['student_name']}: {result['error']}",
+                  file=sys.stderr)
+        else:
+            status = ' (unchanged)' if result.get('unchanged') else ''
+            size = f"  {_format_size(result['size'])}" if result.get('size') is not None else ''
+            print(f"[{done}/{total}] {result['filename']}  R{result['total_amount']:,.2f}{size}{status}")
+
+    if args.statement_book:
+        return _run_statement_books(generator, specs, args.output_dir, skip_unchanged=not args.force)
+
+    results = generator.generate_invoices(specs, workers=args.workers, progress=report)
+    failures = sum(1 for result in results if 'error' in result)
+    unchanged = sum(1 for result in results if result.get('unchanged'))
+    billed = sum(_to_decimal(result['total_amount']) for result in results if 'error' not in result)
+    written = sum(result.get('size') or 0 for result in results
+                  if 'error' not in result and not result.get('unchanged'))
+    print(f"{len(results) - failures - unchanged} invoice(s) generated ({_format_size(written)}), "
+          f"{unchanged} unchanged, {failures} failed, total R{billed:,.2f}")
+    if args.timings:
+        for phase, stats in summarize_timings(results).items():
+            print(f"  {phase:<8} mean {stats['mean'] * 1000:7.1f} ms  p95 {stats['p95'] * 1000:7.1f} ms  "
+                  f"total {stats['total']:7.2f} s")
+    return 1 if failures else 0
+
+
+def _price_spec(generator, spec):
+    """Totals for a group_lessons spec, without numbering or rendering it"""
+    if spec.get('lesson_items') is not None:
+        return generator._price_lessons(spec['lesson_items'], spec['rate_per_lesson'])[4]
+    return compute_invoice_amounts(spec['lessons_per_course'], spec['rate_per_lesson'], generator.vat_rate)
+
+
+def _totals_command(args):
+    """Print what each student would be billed, without rendering invoices"""
+    generator = InvoiceGenerator()
+    default_client = generator.default_client_info['name']
+    specs = group_lessons(iter_lesson_rows(args.lessons), rate_per_lesson=args.rate,
+                          default_client_name=default_client, per_lesson=args.per_lesson)
+    billed = Decimal(0)
+    for spec in specs:
+        amounts = _price_spec(generator, spec)
+        client = spec['client_info']['name'] if 'client_info' in spec else default_client
+        if spec.get('lesson_items') is not None:
+            hours = sum(_to_decimal(item['hours']) for item in spec['lesson_items'])
+        else:
+            hours = sum(map(_to_decimal, spec['lessons_per_course']))
+        print(f"{spec['student_name']:<28} {client:<28} {hours:>7} h  R{amounts['total_amount']:>12,.2f}")
+        billed += amounts['total_amount']
+    print(f"{len(specs)} invoice(s), total R{billed:,.2f}")
+    return 0
+
+
+def _validate_command(args):
+    """Check a lesson log parses and every lesson can be billed"""
+    problems = []
+    lessons = 0
+    students = set()
+    try:
+        for number, lesson in enumerate(iter_lesson_rows(args.lessons), start=1):
+            lessons += 1
+            students.add(lesson['student'])
+            for field in ('student', 'course'):
+                if not lesson[field]:
+                    problems.append(f"lesson {number}: no {field}")
+            if lesson['hours'] <= 0:
+                problems.append(f"lesson {number}: hours must be positive, not {lesson['hours']}")
+    except ValueError as exc:
+        problems.append(str(exc))
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    print(f"{lessons} lesson(s) for {len(students)} student(s), {len(problems)} problem(s)")
+    return 1 if problems else 0
+
+
+def _ledger_command(argv):
+    """Query the invoice ledger (see invoice_ledger.py)"""
+    from invoice_ledger import main as ledger_main
+    return ledger_main(argv)
+
+
+def _run_statement_books(generator, specs, output_dir, skip_unchanged=True):
+    """Bill each client with one statement book covering all their students"""
+    by_client = {}
+    for spec in specs:
+        client_info = spec.get('client_info')
+        key = client_info['name'] if client_info else None
+        by_client.setdefault(key, (client_info, []))[1].append(spec)
+
+    for client_info, client_specs in by_client.values():
+        book = generator.generate_statement_book(client_specs, client_info=client_info,
+                                                 use_tti_default=client_info is None,
+                                                 output_dir=output_dir, skip_unchanged=skip_unchanged)
+        status = ' (unchanged)' if book.get('unchanged') else ''
+        print(f"{book['filename']}  {len(book['invoices'])} invoice(s)  R{book['total_amount']:,.2f}  "
+              f"{_format_size(book['size'])}{status}")
+    return 0
+
+
+def _example():
+    """Generate the example invoice for Bella Grasso"""
     generator = InvoiceGenerator()
 
     # Rosaria Grasso billing info
@@ -651,3 +1410,65 @@ if __name__ == "__main__":
     print(f"Invoice generated: {result['filename']}")
     print(f"Total Amount: R{result['total_amount']:,.2f}")
     print(f"Billed to: {result['bill_to']['name']}")
+    return 0
+
+
+def main(argv=None):
+    """Command line entry point; with no command, generates the example invoice"""
+    parser = argparse.ArgumentParser(prog='python -m InvoiceMaker',
+                                     description='Yolymatics Tutorials invoice generator')
+    commands = parser.add_subparsers(dest='command')
+
+    run = commands.add_parser('run', help='generate invoices from a CSV/JSONL lesson log')
+    run.add_argument('lessons', help='lesson log (.csv, or .jsonl with one lesson per line)')
+    run.add_argument('--rate', type=float, default=350.0,
+                     help='rate per hour for lessons without a rate column (default: 350)')
+    run.add_argument('--output-dir', default='invoices', help='directory for the PDFs')
+    run.add_argument('--workers', type=int, default=None,
+                     help='worker processes (default: one per CPU)')
+    run.add_argument('--statement-book', action='store_true',
+                     help='write one PDF per client containing all of its invoices')
+    run.add_argument('--per-lesson', action='store_true',
+                     help='list every lesson on the invoice instead of one line per course')
+    run.add_argument('--logo', action='store_true',
+                     help='print the Yolymatics logo at the top of each invoice')
+    run.add_argument('--timings', action='store_true',
+                     help='print per-phase render timings for the batch')
+    run.add_argument('--force', action='store_true',
+                     help='re-render invoices even if their inputs are unchanged')
+    run.add_argument('--reproducible', action='store_true',
+                     help='render identical invoices to byte-identical PDFs (fixed date and document ID)')
+    run.set_defaults(handler=_run_command)
+
+    totals = commands.add_parser('totals', help='print what each student would be billed, without rendering')
+    totals.add_argument('lessons', help='lesson log (.csv or .jsonl)')
+    totals.add_argument('--rate', type=float, default=350.0,
+                        help='rate per hour for lessons without a rate column (default: 350)')
+    totals.add_argument('--per-lesson', action='store_true',
+                        help='round each lesson to the cent, as run --per-lesson bills them')
+    totals.set_defaults(handler=_totals_command)
+
+    validate = commands.add_parser('validate', help='check a lesson log without billing it')
+    validate.add_argument('lessons', help='lesson log (.csv or .jsonl)')
+    validate.set_defaults(handler=_validate_command)
+
+    # Listed for --help; its arguments are parsed by invoice_ledger itself
+    commands.add_parser('ledger', add_help=False,
+                        help='query the invoice ledger (arguments as for invoice_ledger.py)')
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ['ledger']:
+        return _ledger_command(argv[1:])
+    args = parser.parse_args(argv)
+    if args.command is None:
+        return _example()
+    try:
+        return args.handler(args)
+    except ValueError as exc:
+        # A bad lesson log: the message names the record, a traceback adds nothing
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Benchmark the ReportLab and FPDF invoice backends on the same invoices
+
+Usage:
+    python benchmarks/bench_backends.py [invoices] [--lessons N] [--logo]
+
+Renders the same invoices in memory with each backend (ReportLab both with
+and without template mode) and prints the mean story and layout time per
+invoice and the mean PDF size. --lessons bills N lessons per invoice line by
+line instead of one line per course.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from InvoiceMaker import DEFAULT_LOGO_PATH, summarize_timings
+from bench_common import benchmark_generator
+
+
+VARIANTS = [
+    ('reportlab', False),
+    ('reportlab', True),
+    ('fpdf', False),
+]
+
+
+def make_spec(i, lessons):
+    """Invoice spec i: two courses, or a lesson-by-lesson log"""
+    spec = {
+        'student_name': f"Student {i}",
+        'rate_per_lesson': 350.0,
+        'invoice_number': f"BENCH-{i:06d}",
+        'invoice_date': '2024-11-01',
+    }
+    if lessons:
+        spec.update(courses=None, lessons_per_course=None, lesson_items=[
+            {'date': f"2024-10-{day % 28 + 1:02d}", 'course': 'Mathematics', 'hours': 1.5}
+            for day in range(lessons)
+        ])
+    else:
+        spec.update(courses=['Mathematics', 'Physical Sciences'], lessons_per_course=[i % 12 + 1, 4])
+    return spec
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare the invoice rendering backends')
+    parser.add_argument('invoices', type=int, nargs='?', default=200)
+    parser.add_argument('--lessons', type=int, default=0,
+                        help='bill this many lessons per invoice line by line')
+    parser.add_argument('--logo', action='store_true', help='print the logo on every invoice')
+    args = parser.parse_args(argv)
+
+    specs = [make_spec(i, args.lessons) for i in range(args.invoices)]
+    print(f"{args.invoices} invoice(s), {args.lessons or 'per-course'} lesson lines, "
+          f"logo {'on' if args.logo else 'off'}")
+    for backend, template_mode in VARIANTS:
+        generator = benchmark_generator(backend=backend, template_mode=template_mode,
+                                        logo_path=DEFAULT_LOGO_PATH if args.logo else None)
+        # Warm up caches (theme, precompiled blocks, logo) outside the timing
+        generator.generate_invoice_bytes(**specs[0])
+
+        started = time.perf_counter()
+        results = [generator.generate_invoice_bytes(**spec) for spec in specs]
+        elapsed = time.perf_counter() - started
+
+        summary = summarize_timings(results)
+        size = sum(len(result['pdf']) for result in results) / len(results)
+        label = backend + (' (template)' if template_mode else '')
+        print(f"{label:<22} {elapsed / len(results) * 1000:7.2f} ms/invoice  "
+              f"story {summary['story']['mean'] * 1000:6.2f} ms  "
+              f"layout {summary['layout']['mean'] * 1000:6.2f} ms  "
+              f"{size / 1024:7.1f} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+"""
+Setup shared by the benchmark scripts
+
+Benchmark invoices are made up, not real billing, so every benchmark builds
+its generators here, with the ledger turned off, and none of them leave rows
+in an invoice ledger.
+"""
+
+from InvoiceMaker import InvoiceGenerator
+
+
+def benchmark_generator(**options):
+    """An InvoiceGenerator for benchmark invoices (keyword arguments as for InvoiceGenerator)"""
+    return InvoiceGenerator(ledger=False, **options)
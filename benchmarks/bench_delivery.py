@@ -0,0 +1,76 @@
+"""
+Benchmark invoice delivery by email against the local SMTP stand-in
+
+Usage:
+    python benchmarks/bench_delivery.py [--invoices 300] [--clients 60] [--latency 0.005]
+                                        [--connections 4] [--fail-every 0]
+
+Renders --invoices invoices in memory, billed to --clients clients, and
+delivers them to LocalSMTPServer (which adds --latency seconds to every
+round trip, standing in for a remote server) with delivery features turned
+on one at a time, from a connection per message up to batched, pipelined
+messages over --connections pooled connections. Prints messages and
+invoices per second for each.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from bench_common import benchmark_generator
+from invoice_delivery import InvoiceMailer, LocalSMTPServer
+
+
+def make_results(count, clients):
+    """In-memory invoices for count students, spread over clients"""
+    generator = benchmark_generator(template_mode=True)
+    return [generator.generate_invoice_bytes(
+        f"Student {i}", ['Mathematics'], [1 + i % 8], 350.0,
+        client_info={'name': f"Client {i % clients}", 'email': f"client{i % clients}@example.com"},
+        use_tti_default=False, invoice_number=f"BENCH-{i:06d}", invoice_date='2025-01-31')
+        for i in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--invoices', type=int, default=300)
+    parser.add_argument('--clients', type=int, default=60)
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help='seconds added to each SMTP round trip (default: 0.005)')
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--fail-every', type=int, default=0,
+                        help='refuse every nth message with a temporary error, to time retries')
+    args = parser.parse_args(argv)
+
+    results = make_results(args.invoices, args.clients)
+    scenarios = [
+        ('connection per message', dict(connections=1, messages_per_connection=1, pipelining=False,
+                                        max_attachments=1)),
+        ('pooled connection', dict(connections=1, pipelining=False, max_attachments=1)),
+        ('+ pipelining', dict(connections=1, max_attachments=1)),
+        ('+ batching per client', dict(connections=1)),
+        (f"+ {args.connections} connections", dict(connections=args.connections)),
+    ]
+
+    print(f"{args.invoices} invoices for {args.clients} clients, "
+          f"{args.latency * 1000:.1f} ms per round trip")
+    print(f"{'scenario':<26} {'messages':>8} {'seconds':>8} {'msg/s':>8} {'invoices/s':>11}")
+    with tempfile.TemporaryDirectory(prefix='invoice-delivery-') as scratch:
+        for number, (name, options) in enumerate(scenarios):
+            with LocalSMTPServer(latency=args.latency, fail_every=args.fail_every) as server:
+                mailer = InvoiceMailer(host='127.0.0.1', port=server.port, backoff=0.01,
+                                       directory=os.path.join(scratch, str(number)), **options)
+                summary = mailer.deliver(results)
+            if summary['failed'] or summary['invoices'] != len(results):
+                print(f"{name}: {len(summary['failed'])} message(s) failed", file=sys.stderr)
+                return 1
+            print(f"{name:<26} {summary['messages']:>8} {summary['seconds']:>8.2f} "
+                  f"{summary['messages_per_second']:>8.1f} {summary['invoices'] / summary['seconds']:>11.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
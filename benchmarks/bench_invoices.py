@@ -0,0 +1,269 @@
+"""
+Benchmark suite for InvoiceGenerator with a JSON history and regression check
+
+Usage:
+    python benchmarks/bench_invoices.py [--only PATTERN] [--quick] [--workers N]
+                                        [--history FILE] [--threshold 0.1] [--no-record]
+
+Runs every combination of:
+    - 1, 100 and 10,000 invoices
+    - 1 and 500 line items per invoice
+    - one process and a process pool (of at least two workers)
+    - PDF files on disk and PDFs in memory
+
+Each scenario runs in a fresh subprocess so its peak RSS is its own. File
+and memory scenarios are dispatched the same way, and every worker renders
+one throwaway invoice (paying for the lazy ReportLab import) before the
+clock starts, so only the invoices themselves are timed. For every scenario the suite records throughput (invoices/s), per-invoice
+latency (p50/p95 of generate_invoice's own timing), peak RSS (MiB, the
+largest of the runner and its workers) and mean PDF size, appends the run
+to the history file (benchmarks/invoice_history.json by default) and
+compares it with the previous run. A scenario regresses when throughput
+drops, or latency, RSS or PDF size grows, by more than the threshold; the
+exit status is 1 if any scenario regressed.
+
+--only runs the scenarios whose names contain PATTERN (e.g. 'n100-',
+'pool', 'lines500-solo-memory'); --quick runs 1, 10 and 100 invoices
+instead for a fast smoke run.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import functools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+
+from bench_common import benchmark_generator
+
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'invoice_history.json')
+
+INVOICE_COUNTS = (1, 100, 10_000)
+QUICK_INVOICE_COUNTS = (1, 10, 100)
+LINE_COUNTS = (1, 500)
+MODES = ('solo', 'pool')
+OUTPUTS = ('file', 'memory')
+
+# Metrics compared against the baseline, and whether higher is better
+METRICS = {
+    'throughput': True,
+    'latency_p50_ms': False,
+    'latency_p95_ms': False,
+    'peak_rss_mib': False,
+    'mean_pdf_bytes': False,
+}
+
+
+def scenario_name(invoices, lines, mode, output):
+    return f"n{invoices}-lines{lines}-{mode}-{output}"
+
+
+def all_scenarios(quick=False):
+    scenarios = []
+    for invoices in QUICK_INVOICE_COUNTS if quick else INVOICE_COUNTS:
+        for lines in LINE_COUNTS:
+            for mode in MODES:
+                for output in OUTPUTS:
+                    scenarios.append({
+                        'name': scenario_name(invoices, lines, mode, output),
+                        'invoices': invoices,
+                        'lines': lines,
+                        'mode': mode,
+                        'output': output
+                    })
+    return scenarios
+
+
+def make_spec(i, lines):
+    """A reproducible invoice with the given number of line items"""
+    return {
+        'student_name': f"Student {i:05d}",
+        'courses': [f"Course {line:03d}" for line in range(lines)],
+        'lessons_per_course': [(i + line) % 8 / 2 + 0.5 for line in range(lines)],
+        'rate_per_lesson': 350.0,
+        'invoice_date': '2024-11-01',
+    }
+
+
+# Pool workers keep one warm generator each
+_worker_generator = None
+_warm_up_barrier = None
+
+
+def _init_worker(barrier=None):
+    global _worker_generator, _warm_up_barrier
+    _worker_generator = benchmark_generator()
+    _warm_up_barrier = barrier
+
+
+def _warm_up(_=None):
+    """Render a throwaway invoice so the backend import and setup are not timed"""
+    _worker_generator.generate_invoice_bytes(**make_spec(0, 1), invoice_number='WARM-UP')
+    if _warm_up_barrier is not None:
+        # Hold this worker until every worker has taken one warm-up
+        _warm_up_barrier.wait()
+
+
+def _render(spec, output):
+    if output == 'memory':
+        result = _worker_generator.generate_invoice_bytes(**spec)
+    else:
+        result = _worker_generator.generate_invoice(**spec)
+    return {'timings': result['timings'], 'size': result['size']}
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def run_scenario(scenario, workers):
+    """Run one scenario in this process and return its measurements"""
+    # A pool of one would only time the dispatch overhead, so it has two
+    workers = max(2, workers)
+
+    with tempfile.TemporaryDirectory(prefix='invoice-bench-') as output_dir:
+        # Numbered up front, so neither output takes the sequence file lock
+        specs = [dict(make_spec(i, scenario['lines']), invoice_number=f"BENCH-{i:06d}", output_dir=output_dir)
+                 for i in range(scenario['invoices'])]
+        render = functools.partial(_render, output=scenario['output'])
+        if scenario['mode'] == 'pool':
+            barrier = multiprocessing.Barrier(workers)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(barrier,)) as executor:
+                list(executor.map(_warm_up, range(workers)))
+                started = time.perf_counter()
+                rendered = list(executor.map(render, specs, chunksize=max(1, len(specs) // (workers * 4))))
+                elapsed = time.perf_counter() - started
+        else:
+            _init_worker()
+            _warm_up()
+            started = time.perf_counter()
+            rendered = [render(spec) for spec in specs]
+            elapsed = time.perf_counter() - started
+
+    latencies = sorted(item['timings']['total'] for item in rendered)
+    # ru_maxrss is in KiB on Linux (bytes on macOS)
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) / scale
+    return {
+        'invoices': len(rendered),
+        'seconds': elapsed,
+        'throughput': len(rendered) / elapsed,
+        'latency_p50_ms': _percentile(latencies, 0.50) * 1000,
+        'latency_p95_ms': _percentile(latencies, 0.95) * 1000,
+        'peak_rss_mib': peak_rss,
+        'mean_pdf_bytes': sum(item['size'] for item in rendered) / len(rendered),
+    }
+
+
+def run_isolated(scenario, workers):
+    """Run a scenario in a fresh interpreter so peak RSS is not inherited"""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-scenario', json.dumps(scenario),
+         '--workers', str(workers)],
+        stdout=subprocess.PIPE, check=True, text=True)
+    return json.loads(completed.stdout)
+
+
+def compare(current, baseline, threshold):
+    """Return a list of (metric, old, new, change) regressions"""
+    regressions = []
+    for metric, higher_is_better in METRICS.items():
+        old, new = baseline.get(metric), current.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > threshold:
+            regressions.append((metric, old, new, change))
+    return regressions
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def latest_baseline(history, name):
+    """Most recent recorded result for a scenario"""
+    for run in reversed(history):
+        if name in run['results']:
+            return run['results'][name]
+    return None
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='InvoiceGenerator benchmark suite')
+    parser.add_argument('--only', default='', help='run scenarios whose names contain this text')
+    parser.add_argument('--quick', action='store_true', help='run 1, 10 and 100 invoices instead')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='pool size for the pool scenarios (default: one per CPU, at least 2)')
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help='JSON history file')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='relative change that counts as a regression (default: 0.10)')
+    parser.add_argument('--no-record', action='store_true', help='compare only; do not append to the history')
+    parser.add_argument('--run-scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_scenario:
+        print(json.dumps(run_scenario(json.loads(args.run_scenario), args.workers)))
+        return 0
+
+    history = load_history(args.history)
+    scenarios = [scenario for scenario in all_scenarios(args.quick) if args.only in scenario['name']]
+    results = {}
+    regressed = 0
+    print(f"{'scenario':<32} {'inv/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'RSS MiB':>8} {'KiB/pdf':>8}")
+    for scenario in scenarios:
+        result = results[scenario['name']] = run_isolated(scenario, args.workers)
+        print(f"{scenario['name']:<32} {result['throughput']:9.1f} {result['latency_p50_ms']:8.2f} "
+              f"{result['latency_p95_ms']:8.2f} {result['peak_rss_mib']:8.1f} "
+              f"{result['mean_pdf_bytes'] / 1024:8.1f}")
+        baseline = latest_baseline(history, scenario['name'])
+        if baseline is not None:
+            for metric, old, new, change in compare(result, baseline, args.threshold):
+                regressed += 1
+                print(f"  REGRESSION {metric}: {old:.2f} -> {new:.2f} ({change:+.0%})")
+
+    if not args.no_record and results:
+        history.append({
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'workers': args.workers,
+            'results': results
+        })
+        with open(args.history, 'w', encoding='utf-8') as handle:
+            json.dump(history, handle, indent=2)
+        print(f"recorded in {args.history}")
+
+    if regressed:
+        print(f"{regressed} regression(s) over {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Benchmark the Decimal money engine against the original float arithmetic
+
+Usage:
+    python benchmarks/bench_money.py [line_items]
+
+Times compute_invoice_amounts over a batch of line items (100,000 by
+default, with fractional hours and per-line rates) against the float
+expressions the invoice generator used before, and counts how often the
+float path's printed line amounts fail to add up to its printed subtotal.
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from InvoiceMaker import compute_invoice_amounts
+
+
+def float_amounts(quantities, rates, vat_rate):
+    """The original float path: per-line amounts and totals computed separately"""
+    line_amounts = [hours * rate for hours, rate in zip(quantities, rates)]
+    subtotal = sum(hours * rate for hours, rate in zip(quantities, rates))
+    vat_amount = round(subtotal * vat_rate, 2)
+    return line_amounts, subtotal, vat_amount, round(subtotal + vat_amount, 2)
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 100_000
+    rng = random.Random(42)
+    quantities = [rng.choice([0.25, 0.5, 0.75, 1, 1.5, 2, 1 / 3]) for _ in range(count)]
+    rates = [rng.choice([250.0, 333.33, 350.0, 412.5]) for _ in range(count)]
+
+    start = time.perf_counter()
+    line_amounts, subtotal, vat_amount, total = float_amounts(quantities, rates, 0.15)
+    float_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    amounts = compute_invoice_amounts(quantities, rates, 0.15)
+    decimal_seconds = time.perf_counter() - start
+
+    printed_lines = sum(round(amount, 2) for amount in line_amounts)
+    float_drift = abs(round(printed_lines, 2) - round(subtotal, 2))
+
+    print(f"line items:        {count:,}")
+    print(f"float path:        {float_seconds * 1000:8.1f} ms  ({count / float_seconds:,.0f} lines/s)")
+    print(f"decimal engine:    {decimal_seconds * 1000:8.1f} ms  ({count / decimal_seconds:,.0f} lines/s)")
+    print(f"float lines vs subtotal drift:   R {float_drift:,.2f}")
+    print(f"decimal lines vs subtotal drift: R {sum(amounts['line_amounts']) - amounts['subtotal']:,.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,119 @@
+"""
+Load-test the asynchronous invoice service and report latency percentiles
+
+Usage:
+    python benchmarks/bench_service.py [--requests 500] [--concurrency 32]
+                                       [--duplicates 0.2] [--workers N] [--http]
+
+Fires --requests invoice specs at InvoiceService from --concurrency
+concurrent clients, either in-process or through the local HTTP front end
+(--http), and prints throughput, p50/p99 latency and how many duplicate
+specs were coalesced.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from bench_common import benchmark_generator
+from invoice_service import InvoiceService, _handle_http
+
+
+def make_specs(count, duplicate_fraction, seed=7):
+    """Invoice specs with roughly duplicate_fraction repeats of earlier specs"""
+    rng = random.Random(seed)
+    specs = []
+    for i in range(count):
+        if specs and rng.random() < duplicate_fraction:
+            specs.append(rng.choice(specs[-32:]))
+            continue
+        specs.append({
+            'student_name': f"Student {i}",
+            'courses': ['Mathematics', 'Physical Sciences'][:rng.randint(1, 2)],
+            'lessons_per_course': [rng.randint(1, 12), rng.randint(1, 12)],
+            'rate_per_lesson': 350.0,
+            'invoice_number': f"BENCH-{i:06d}",
+            'invoice_date': '2025-01-31',
+        })
+        specs[-1]['lessons_per_course'] = specs[-1]['lessons_per_course'][:len(specs[-1]['courses'])]
+    return specs
+
+
+async def http_submit(port, spec):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(spec).encode('utf-8')
+    writer.write(b"POST /invoices HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 + f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    if not response.startswith(b'HTTP/1.1 200'):
+        raise RuntimeError(response.split(b'\r\n', 1)[0].decode('latin-1'))
+    return response
+
+
+async def run(args):
+    specs = make_specs(args.requests, args.duplicates)
+    latencies = []
+
+    async with InvoiceService(benchmark_generator(template_mode=True), workers=args.workers,
+                              max_queue=args.concurrency * 2) as service:
+        if args.http:
+            server = await asyncio.start_server(
+                lambda reader, writer: _handle_http(service, reader, writer), '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            submit = lambda spec: http_submit(port, spec)
+        else:
+            server = None
+            submit = service.submit
+
+        # Warm the worker processes before measuring
+        await asyncio.gather(*(service.submit(dict(specs[0], invoice_number=f"WARM-{i}"))
+                               for i in range(service.workers)))
+
+        pending = iter(specs)
+
+        async def client():
+            for spec in pending:
+                started = time.perf_counter()
+                await submit(spec)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        stats = service.stats()
+
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+    latencies.sort()
+    print(f"mode:        {'http' if args.http else 'library'}, {service.workers} workers, "
+          f"{args.concurrency} concurrent clients")
+    print(f"requests:    {len(latencies)} in {elapsed:.2f} s ({len(latencies) / elapsed:,.1f} req/s)")
+    print(f"latency p50: {latencies[len(latencies) // 2] * 1000:.1f} ms")
+    print(f"latency p99: {latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000:.1f} ms")
+    print(f"coalesced:   {stats['coalesced']} duplicate spec(s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duplicates', type=float, default=0.2,
+                        help='fraction of requests that repeat a recent spec')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--http', action='store_true', help='go through the local HTTP front end')
+    asyncio.run(run(parser.parse_args(argv)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
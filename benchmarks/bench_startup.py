@@ -0,0 +1,108 @@
+"""
+Cold-start budget check for InvoiceMaker and its non-rendering commands
+
+Usage:
+    python benchmarks/bench_startup.py [--budget-ms 60] [--repeat 5]
+
+Runs each case in a fresh interpreter under 'python -X importtime' and adds
+up the import time of every module the case loads beyond a bare
+interpreter. The cases are importing InvoiceMaker and the validate, totals
+and ledger commands, none of which render a PDF. A case fails if its median
+import time is over the budget, or if it loads a rendering library
+(ReportLab, PIL or FPDF) at all. The exit status is 1 if any case failed,
+so scripted and cron use can gate on it.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+# Top-level packages that only rendering may load
+RENDERING_MODULES = ('reportlab', 'PIL', 'fpdf')
+
+LESSON_LOG = """student,date,course,hours,client
+Bella Grasso,2024-09-03,Discrete Mathematics Tutoring,2,Rosaria Grasso
+Bella Grasso,2024-09-10,Discrete Mathematics Tutoring,1.5,Rosaria Grasso
+Student One,2024-09-04,Calculus,2,
+"""
+
+
+def import_report(arguments):
+    """
+    Run python -X importtime with arguments
+
+    Returns:
+        tuple: (cumulative microseconds of each top-level import by module
+            name, set of every module imported)
+    """
+    completed = subprocess.run([sys.executable, '-X', 'importtime'] + arguments, cwd=ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(arguments)} failed:\n{completed.stderr[-2000:]}")
+    top_level = {}
+    modules = set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.add(name.strip())
+        # Nested imports are indented below the module that triggered them
+        if not name[1:].startswith(' '):
+            top_level[name.strip()] = int(cumulative)
+    return top_level, modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='InvoiceMaker cold-start budget check')
+    parser.add_argument('--budget-ms', type=float, default=60.0,
+                        help='largest median import time allowed per case (default: 60 ms)')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per case (default: 5)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='invoice-startup-') as scratch:
+        lessons = os.path.join(scratch, 'lessons.csv')
+        with open(lessons, 'w', encoding='utf-8') as handle:
+            handle.write(LESSON_LOG)
+        cases = {
+            'import InvoiceMaker': ['-c', 'import InvoiceMaker'],
+            'validate': ['-m', 'InvoiceMaker', 'validate', lessons],
+            'totals': ['-m', 'InvoiceMaker', 'totals', lessons],
+            'ledger totals': ['-m', 'InvoiceMaker', 'ledger', '--dir', scratch, 'totals'],
+        }
+
+        # Whatever a bare interpreter imports is not charged to the cases
+        baseline = set(import_report(['-c', 'pass'])[0])
+
+        failed = 0
+        print(f"{'case':<22} {'median ms':>10} {'min ms':>8}  budget {args.budget_ms:.0f} ms")
+        for name, arguments in cases.items():
+            samples = []
+            loaded = set()
+            for _ in range(args.repeat):
+                times, modules = import_report(arguments)
+                samples.append(sum(us for module, us in times.items() if module not in baseline) / 1000)
+                loaded.update(modules)
+            median = statistics.median(samples)
+            rendering = sorted({module.split('.')[0] for module in loaded}.intersection(RENDERING_MODULES))
+            problems = []
+            if median > args.budget_ms:
+                problems.append('over budget')
+            if rendering:
+                problems.append(f"loads {', '.join(rendering)}")
+            failed += bool(problems)
+            status = '  FAIL: ' + '; '.join(problems) if problems else ''
+            print(f"{name:<22} {median:10.1f} {min(samples):8.1f}{status}")
+
+    if failed:
+        print(f"{failed} case(s) failed the startup budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
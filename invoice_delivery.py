@@ -0,0 +1,743 @@
+"""
+Invoice delivery by email for Yolymatics Tutorials
+Sends generated invoices to the clients they bill over a small pool of
+reused, pipelined SMTP connections, with retries and a delivery log
+
+Requirements:
+- None beyond the standard library (smtplib, email)
+
+Usage:
+    mailer = InvoiceMailer(host='smtp.example.com', port=587, starttls=True,
+                           username='admin@yolymaticstutorials.com', password=password)
+    summary = mailer.deliver(results)   # generate_invoice / generate_invoice_bytes results
+
+    # Send what the ledger holds for September (password from $SMTP_PASSWORD)
+    python invoice_delivery.py send --month 2024-09 --host smtp.example.com --port 587 --starttls
+                                    --user admin@yolymaticstutorials.com
+    python invoice_delivery.py send --month 2024-09 --dry-run   # list the messages only
+
+    # Local SMTP stand-in that accepts everything (and keeps it in --spool)
+    python invoice_delivery.py serve --port 8025 --spool outbox
+    python invoice_delivery.py send --host 127.0.0.1 --port 8025
+
+Invoices go to the email address of the client they bill (bill_to), with
+all of a client's invoices attached to as few messages as possible. Each
+connection is kept open for many messages and, where the server offers
+PIPELINING, sends a message's envelope in one round trip. Temporary
+failures (4xx replies, dropped connections) are retried with exponential
+backoff; permanent ones (5xx) are not. Every message sent or given up on
+is appended to the delivery log (invoices/.invoice_deliveries.jsonl), and
+invoices already sent are skipped unless resend is set.
+"""
+
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formataddr, formatdate, make_msgid
+import argparse
+import json
+import os
+import queue
+import random
+import re
+import smtplib
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+from InvoiceMaker import InvoiceGenerator
+
+
+DELIVERY_LOG_FILENAME = '.invoice_deliveries.jsonl'
+
+
+class DeliveryLog:
+    """
+    Append-only JSON Lines record of delivery attempts in a directory
+
+    Each line is one message: its recipient, the invoice numbers attached,
+    the status ('sent' or 'failed'), attempts made, Message-ID and error.
+    """
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, DELIVERY_LOG_FILENAME)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def record(self, entry):
+        """Append one entry"""
+        line = json.dumps(entry, sort_keys=True) + '\n'
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as handle:
+                handle.write(line)
+
+    def entries(self):
+        """Every entry, oldest first"""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, encoding='utf-8') as handle:
+            return [json.loads(line) for line in handle if line.strip()]
+
+    def delivered(self):
+        """Invoice numbers that have been sent at least once"""
+        return {number for entry in self.entries() if entry['status'] == 'sent'
+                for number in entry['invoice_numbers']}
+
+
+def _attachment_key(result):
+    """What a result attaches: its in-memory PDF, or its file (shared by a statement book's invoices)"""
+    if result.get('pdf') is not None:
+        return 'pdf', result['invoice_number']
+    return 'file', os.path.abspath(result['filename'])
+
+
+def _attachment_size(result):
+    if result.get('pdf') is not None:
+        return len(result['pdf'])
+    # Statement book rows carry no 'size' of their own; the book's file is what is sent
+    try:
+        return os.path.getsize(result['filename'])
+    except OSError:
+        return result.get('size') or 0
+
+
+def _attachment(result):
+    """(file name, PDF bytes) of a generate_invoice result"""
+    if result.get('pdf') is not None:
+        safe_student_name = result['student_name'].replace(" ", "_").replace("/", "_")
+        return f"Invoice_{result['invoice_number']}_{safe_student_name}.pdf", result['pdf']
+    with open(result['filename'], 'rb') as handle:
+        return os.path.basename(result['filename']), handle.read()
+
+
+def plan_batches(results, max_attachments=10, max_bytes=10 * 1024 * 1024):
+    """
+    Group invoices into messages, one recipient per message
+
+    Each client's invoices are sent together, in invoice number order,
+    split only to keep a message within max_attachments PDFs and roughly
+    max_bytes of them. Invoices sharing a PDF (a statement book) attach
+    it once.
+
+    Returns:
+        tuple: (list of batches, each a dict with 'recipient', 'name' and
+            'results'; list of results without an email address; list of
+            results with no PDF to attach, such as in-memory renders
+            recorded in the ledger)
+    """
+    by_recipient = {}
+    unaddressed = []
+    unattached = []
+    for result in results:
+        if result.get('pdf') is None and not result.get('filename'):
+            unattached.append(result)
+            continue
+        email = (result['bill_to'].get('email') or '').strip()
+        if not email:
+            unaddressed.append(result)
+            continue
+        by_recipient.setdefault(email.lower(), (email, result['bill_to']['name'], []))[2].append(result)
+
+    batches = []
+    for email, name, client_results in by_recipient.values():
+        batch = None
+        for result in sorted(client_results, key=lambda result: result['invoice_number']):
+            key = _attachment_key(result)
+            if batch is not None and key in batch['attachments']:
+                batch['results'].append(result)
+                continue
+            size = _attachment_size(result)
+            if (batch is None or len(batch['attachments']) >= max_attachments
+                    or batch['bytes'] + size > max_bytes):
+                batch = {'recipient': email, 'name': name, 'results': [], 'attachments': set(), 'bytes': 0}
+                batches.append(batch)
+            batch['results'].append(result)
+            batch['attachments'].add(key)
+            batch['bytes'] += size
+    for batch in batches:
+        del batch['attachments'], batch['bytes']
+    return batches, unaddressed, unattached
+
+
+def build_message(batch, company_info, message_id_domain=None):
+    """
+    The email for one batch, with every invoice in it attached
+
+    Args:
+        batch (dict): From plan_batches
+        company_info (dict): InvoiceGenerator.company_info; the sender
+        message_id_domain (str, optional): Domain for the Message-ID
+            (defaults to the sender's)
+
+    Returns:
+        EmailMessage: The message
+    """
+    results = batch['results']
+    total = sum(result['total_amount'] for result in results)
+    message = EmailMessage()
+    message['From'] = formataddr((company_info['name'], company_info['email']))
+    message['To'] = formataddr((batch['name'], batch['recipient']))
+    message['Date'] = formatdate(localtime=True)
+    message['Message-ID'] = make_msgid(domain=message_id_domain or company_info['email'].rpartition('@')[2])
+    if len(results) == 1:
+        message['Subject'] = f"Invoice {results[0]['invoice_number']} from {company_info['name']}"
+    else:
+        message['Subject'] = f"{len(results)} invoices from {company_info['name']}"
+
+    lines = [f"Dear {batch['name']},", "",
+             "Please find attached:" if len(results) > 1 else "Please find attached invoice:", ""]
+    for result in results:
+        lines.append(f"  {result['invoice_number']}  {result['student_name']}  R{result['total_amount']:,.2f}")
+    lines += ["", f"Total due: R{total:,.2f}", "", "Kind regards,", company_info['name'], company_info['email']]
+    message.set_content('\n'.join(lines) + '\n')
+    attached = set()
+    for result in results:
+        key = _attachment_key(result)
+        if key in attached:
+            continue
+        attached.add(key)
+        filename, pdf = _attachment(result)
+        message.add_attachment(pdf, maintype='application', subtype='pdf', filename=filename)
+    return message
+
+
+def _dot_stuff(data):
+    """Message bytes as the DATA section: CRLF line ends, leading dots doubled, ending in CRLF"""
+    data = re.sub(rb'\r\n|\r|\n', b'\r\n', data)
+    data = re.sub(rb'(?m)^\.', b'..', data)
+    if not data.endswith(b'\r\n'):
+        data += b'\r\n'
+    return data
+
+
+def send_pipelined(smtp, sender, recipients, data):
+    """
+    Send one message, pipelining its envelope if the server allows it
+
+    With PIPELINING (RFC 2920), MAIL FROM, every RCPT TO and DATA go out
+    together and their replies are read afterwards, so a message costs two
+    round trips instead of three plus one per recipient. Without it, this
+    is smtp.sendmail.
+
+    Raises:
+        smtplib.SMTPResponseException: A command was refused
+    """
+    if not smtp.has_extn('pipelining'):
+        smtp.sendmail(sender, recipients, data)
+        return
+    body = _dot_stuff(data)
+    mail = f"MAIL FROM:<{sender}>"
+    if smtp.has_extn('size'):
+        mail += f" SIZE={len(body)}"
+    commands = [mail] + [f"RCPT TO:<{recipient}>" for recipient in recipients] + ['DATA']
+    smtp.send(''.join(command + '\r\n' for command in commands).encode('utf-8'))
+
+    replies = [smtp.getreply() for _ in commands]
+    (mail_code, mail_reply), *rcpt_replies, (data_code, data_reply) = replies
+    refused = None
+    if mail_code != 250:
+        refused = smtplib.SMTPSenderRefused(mail_code, mail_reply, sender)
+    elif not any(code in (250, 251) for code, _ in rcpt_replies):
+        code, reply = rcpt_replies[0]
+        refused = smtplib.SMTPResponseException(code, reply)
+    elif data_code != 354:
+        refused = smtplib.SMTPDataError(data_code, data_reply)
+    if refused is not None:
+        if data_code == 354:
+            # The server is waiting for a message; end it empty and abandon it
+            smtp.send(b'.\r\n')
+            smtp.getreply()
+        smtp.rset()
+        raise refused
+
+    smtp.send(body + b'.\r\n')
+    code, reply = smtp.getreply()
+    if code != 250:
+        raise smtplib.SMTPDataError(code, reply)
+
+
+class _PooledConnection:
+    """One SMTP session of the pool, opened on first use and reused for many messages"""
+
+    def __init__(self, mailer):
+        self.mailer = mailer
+        self.smtp = None
+        self.sent = 0
+
+    def send(self, sender, recipients, data):
+        if self.smtp is not None and self.sent >= self.mailer.messages_per_connection:
+            self.close()
+        if self.smtp is None:
+            self.smtp = self.mailer._connect()
+            self.sent = 0
+        try:
+            if self.mailer.pipelining:
+                send_pipelined(self.smtp, sender, recipients, data)
+            else:
+                self.smtp.sendmail(sender, recipients, data)
+        except smtplib.SMTPResponseException:
+            # A refused message leaves the session usable (it has been reset)
+            raise
+        except BaseException:
+            self.close()
+            raise
+        self.sent += 1
+
+    def close(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                self.smtp.close()
+            self.smtp = None
+
+
+class InvoiceMailer:
+    """
+    Delivers invoices to their clients by email
+
+    Messages are sent by a fixed number of worker threads, each holding one
+    SMTP connection open for many messages, so the concurrency seen by the
+    server is at most connections sessions at a time.
+    """
+
+    def __init__(self, host='localhost', port=25, username=None, password=None, starttls=False,
+                 company_info=None, directory='invoices', connections=4, messages_per_connection=100,
+                 pipelining=True, max_attachments=10, max_bytes=10 * 1024 * 1024, retries=3, backoff=1.0,
+                 timeout=30, resend=False):
+        """
+        Args:
+            host (str): SMTP server
+            port (int): SMTP port
+            username (str, optional): Log in as this user
+            password (str, optional): Password for username
+            starttls (bool): Upgrade each connection with STARTTLS
+            company_info (dict, optional): Sender details (defaults to
+                InvoiceGenerator's company_info)
+            directory (str): Invoice output directory holding the delivery log
+            connections (int): SMTP connections, and so messages, in flight at once
+            messages_per_connection (int): Reconnect after this many messages
+            pipelining (bool): Pipeline message envelopes when the server
+                offers PIPELINING
+            max_attachments (int): Most invoices attached to one message
+            max_bytes (int): Roughly the most PDF bytes attached to one message
+            retries (int): Further attempts after a temporary failure
+            backoff (float): Seconds before the first retry; doubled (with
+                jitter) for each one after
+            timeout (float): Socket timeout in seconds
+            resend (bool): Send invoices the delivery log shows as sent
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.company_info = company_info or InvoiceGenerator(ledger=False).company_info
+        self.log = DeliveryLog(directory)
+        self.connections = connections
+        self.messages_per_connection = messages_per_connection
+        self.pipelining = pipelining
+        self.max_attachments = max_attachments
+        self.max_bytes = max_bytes
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.resend = resend
+        self._local_hostname = None
+
+    def _connect(self):
+        if self._local_hostname is None:
+            # Looked up once; smtplib would resolve it for every connection
+            self._local_hostname = socket.getfqdn()
+        smtp = smtplib.SMTP(self.host, self.port, local_hostname=self._local_hostname, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.starttls:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.username:
+                smtp.login(self.username, self.password or '')
+        except BaseException:
+            smtp.close()
+            raise
+        return smtp
+
+    def _send_batch(self, connection, batch):
+        """Send one batch, retrying temporary failures; returns its log entry"""
+        entry = {
+            'recipient': batch['recipient'],
+            'invoice_numbers': [result['invoice_number'] for result in batch['results']],
+            'attempts': 0,
+            'message_id': None,
+            'error': None
+        }
+        try:
+            message = build_message(batch, self.company_info)
+        except (OSError, ValueError) as exc:
+            entry.update(status='failed', error=str(exc))
+            return entry
+        entry['message_id'] = message['Message-ID']
+        data = message.as_bytes()
+        entry['bytes'] = len(data)
+
+        while True:
+            entry['attempts'] += 1
+            try:
+                connection.send(self.company_info['email'], [batch['recipient']], data)
+                entry.update(status='sent', error=None)
+                return entry
+            except (smtplib.SMTPException, OSError) as exc:
+                entry['error'] = str(exc) or type(exc).__name__
+                code = getattr(exc, 'smtp_code', None)
+                if (code is not None and code >= 500) or entry['attempts'] > self.retries:
+                    entry['status'] = 'failed'
+                    return entry
+            time.sleep(self.backoff * 2 ** (entry['attempts'] - 1) * random.uniform(0.5, 1.5))
+
+    def deliver(self, results, progress=None):
+        """
+        Email invoices to the clients they bill
+
+        Args:
+            results (list): generate_invoice results (with 'filename') or
+                generate_invoice_bytes results (with 'pdf')
+            progress (callable, optional): Called as progress(done, total, entry)
+                as each message is sent or given up on
+
+        Returns:
+            dict: 'messages' and 'invoices' sent, 'failed' (log entries of
+                messages given up on), 'skipped' (invoices already sent),
+                'unaddressed' (invoice numbers whose client has no email
+                address), 'unattached' (invoice numbers with no PDF to
+                attach), 'seconds' and 'messages_per_second'
+        """
+        started = time.perf_counter()
+        results = list(results)
+        skipped = 0
+        if not self.resend:
+            delivered = self.log.delivered()
+            pending = [result for result in results if result['invoice_number'] not in delivered]
+            skipped = len(results) - len(pending)
+            results = pending
+        batches, unaddressed, unattached = plan_batches(results, self.max_attachments, self.max_bytes)
+
+        work = queue.Queue()
+        for batch in batches:
+            work.put(batch)
+        entries = []
+        lock = threading.Lock()
+
+        def worker():
+            connection = _PooledConnection(self)
+            try:
+                while True:
+                    try:
+                        batch = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    entry = self._send_batch(connection, batch)
+                    entry['time'] = datetime.now().isoformat(timespec='seconds')
+                    self.log.record(entry)
+                    with lock:
+                        entries.append(entry)
+                        done = len(entries)
+                    if progress is not None:
+                        progress(done, len(batches), entry)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, daemon=True)
+                   for _ in range(min(self.connections, len(batches)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        sent = [entry for entry in entries if entry['status'] == 'sent']
+        seconds = time.perf_counter() - started
+        return {
+            'messages': len(sent),
+            'invoices': sum(len(entry['invoice_numbers']) for entry in sent),
+            'failed': [entry for entry in entries if entry['status'] != 'sent'],
+            'skipped': skipped,
+            'unaddressed': [result['invoice_number'] for result in unaddressed],
+            'unattached': [result['invoice_number'] for result in unattached],
+            'seconds': seconds,
+            'messages_per_second': len(sent) / seconds if seconds else 0.0
+        }
+
+
+class _SMTPSession(socketserver.BaseRequestHandler):
+    """One client session of LocalSMTPServer"""
+
+    def setup(self):
+        self._buffer = bytearray()
+        self._replies = []
+
+    def _reply(self, text):
+        self._replies.append(text.encode('utf-8') + b'\r\n')
+
+    def _flush(self):
+        if self._replies:
+            if self.server.latency:
+                time.sleep(self.server.latency)
+            self.request.sendall(b''.join(self._replies))
+            self._replies.clear()
+
+    def _receive(self):
+        # Like a real server, answer every command read so far before waiting
+        # for more, so pipelined commands share one round trip
+        self._flush()
+        chunk = self.request.recv(65536)
+        self._buffer += chunk
+        return bool(chunk)
+
+    def _readline(self):
+        while True:
+            end = self._buffer.find(b'\n')
+            if end >= 0:
+                line = bytes(self._buffer[:end + 1])
+                del self._buffer[:end + 1]
+                return line
+            if not self._receive():
+                return b''
+
+    def _read_data(self):
+        # Everything up to a line holding just '.', with leading dots undoubled
+        while True:
+            if self._buffer.startswith(b'.\r\n'):
+                length, consumed = 0, 3
+                break
+            end = self._buffer.find(b'\r\n.\r\n')
+            if end >= 0:
+                length, consumed = end + 2, end + 5
+                break
+            if not self._receive():
+                return None
+        data = bytes(self._buffer[:length])
+        del self._buffer[:consumed]
+        return re.sub(rb'(?m)^\.\.', b'.', data)
+
+    def handle(self):
+        self._reply('220 localhost invoice delivery stand-in')
+        sender = None
+        recipients = []
+        while True:
+            line = self._readline()
+            if not line:
+                break
+            command = line.decode('utf-8', 'replace').rstrip('\r\n')
+            verb = command[:4].upper()
+            if verb == 'EHLO':
+                self._reply('250-localhost')
+                self._reply('250-PIPELINING')
+                self._reply('250-8BITMIME')
+                self._reply('250 SIZE 52428800')
+            elif verb == 'HELO':
+                self._reply('250 localhost')
+            elif verb == 'MAIL':
+                sender, recipients = command[10:].strip(), []
+                self._reply('250 2.1.0 OK')
+            elif verb == 'RCPT':
+                if sender is None:
+                    self._reply('503 5.5.1 MAIL first')
+                else:
+                    recipients.append(command[8:].strip())
+                    self._reply('250 2.1.5 OK')
+            elif verb == 'DATA':
+                if not recipients:
+                    self._reply('503 5.5.1 No valid recipients')
+                    continue
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+                data = self._read_data()
+                if data is None:
+                    break
+                self._reply(self.server._accept(sender, recipients, data))
+                sender, recipients = None, []
+            elif verb == 'RSET':
+                sender, recipients = None, []
+                self._reply('250 2.0.0 OK')
+            elif verb == 'NOOP':
+                self._reply('250 2.0.0 OK')
+            elif verb == 'QUIT':
+                self._reply('221 2.0.0 Bye')
+                break
+            else:
+                self._reply('502 5.5.2 Command not implemented')
+        try:
+            self._flush()
+        except OSError:
+            pass
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Minimal SMTP server that accepts every message, for testing delivery
+
+    Speaks enough ESMTP (with PIPELINING) for smtplib and InvoiceMailer.
+    Accepted messages are kept in messages, as (sender, recipients, data)
+    tuples, or written to spool_dir as .eml files.
+
+        with LocalSMTPServer() as server:
+            InvoiceMailer(host='127.0.0.1', port=server.port).deliver(results)
+            server.messages
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0, spool_dir=None, latency=0.0, fail_every=0):
+        """
+        Args:
+            host (str): Address to listen on
+            port (int): Port to listen on (0 picks a free one; see port)
+            spool_dir (str, optional): Write messages here instead of keeping them
+            latency (float): Seconds added to every round trip, to stand in
+                for a remote server
+            fail_every (int): Refuse every nth message with a temporary
+                451 reply (0 never does), to exercise retries
+        """
+        super().__init__((host, port), _SMTPSession)
+        self.spool_dir = spool_dir
+        self.latency = latency
+        self.fail_every = fail_every
+        self.messages = []
+        self.received = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def _accept(self, sender, recipients, data):
+        with self._lock:
+            self.received += 1
+            number = self.received
+            if self.fail_every and number % self.fail_every == 0:
+                return '451 4.3.0 Temporary failure, try again'
+            if self.spool_dir is None:
+                self.messages.append((sender, recipients, data))
+        if self.spool_dir is not None:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            with open(os.path.join(self.spool_dir, f"{number:06d}.eml"), 'wb') as handle:
+                handle.write(data)
+        return f"250 2.0.0 OK queued as {number}"
+
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def _send_command(args):
+    from invoice_ledger import InvoiceLedger
+
+    ledger = InvoiceLedger(args.dir)
+    results = [ledger.get(invoice['invoice_number'])
+               for invoice in ledger.find(student=args.student, client=args.client, month=args.month)]
+    mailer = InvoiceMailer(host=args.host, port=args.port, username=args.user,
+                           password=os.environ.get('SMTP_PASSWORD'), starttls=args.starttls,
+                           directory=args.dir, connections=args.connections,
+                           max_attachments=args.max_attachments, retries=args.retries, resend=args.resend)
+
+    if args.dry_run:
+        delivered = set() if args.resend else mailer.log.delivered()
+        batches, unaddressed, unattached = plan_batches(
+            [result for result in results if result['invoice_number'] not in delivered],
+            mailer.max_attachments, mailer.max_bytes)
+        for batch in batches:
+            numbers = ', '.join(result['invoice_number'] for result in batch['results'])
+            print(f"{batch['recipient']:<36} {numbers}")
+        print(f"{len(batches)} message(s), {len(unaddressed)} invoice(s) without an email address, "
+              f"{len(unattached)} without a file to attach")
+        return 0
+
+    def report(done, total, entry):
+        status = 'sent' if entry['status'] == 'sent' else f"FAILED ({entry['error']})"
+        print(f"[{done}/{total}] {entry['recipient']}  {len(entry['invoice_numbers'])} invoice(s)  "
+              f"{status}", file=sys.stdout if entry['status'] == 'sent' else sys.stderr)
+
+    summary = mailer.deliver(results, progress=report)
+    for number in summary['unaddressed']:
+        print(f"{number}: client has no email address", file=sys.stderr)
+    for number in summary['unattached']:
+        print(f"{number}: no file to attach (rendered in memory); skipped", file=sys.stderr)
+    print(f"{summary['messages']} message(s) with {summary['invoices']} invoice(s) sent in "
+          f"{summary['seconds']:.1f} s, {len(summary['failed'])} failed, {summary['skipped']} already sent")
+    return 1 if summary['failed'] else 0
+
+
+def _serve_command(args):
+    server = LocalSMTPServer(host=args.host, port=args.port, spool_dir=args.spool)
+    print(f"SMTP stand-in on {args.host}:{server.port}, "
+          f"{'spooling to ' + args.spool if args.spool else 'discarding messages'} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    print(f"{server.received} message(s) received")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Email invoices to the clients they bill')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    send = commands.add_parser('send', help='email the invoices recorded in the ledger')
+    send.add_argument('--dir', default='invoices', help='invoice output directory (default: invoices)')
+    send.add_argument('--student', help='only this student\'s invoices')
+    send.add_argument('--client', help='only invoices billed to this client')
+    send.add_argument('--month', help='only invoices dated in this month (YYYY-MM)')
+    send.add_argument('--host', default='localhost', help='SMTP server (default: localhost)')
+    send.add_argument('--port', type=int, default=25, help='SMTP port (default: 25)')
+    send.add_argument('--user', help='SMTP user name; the password is read from $SMTP_PASSWORD')
+    send.add_argument('--starttls', action='store_true', help='upgrade connections with STARTTLS')
+    send.add_argument('--connections', type=int, default=4,
+                      help='SMTP connections used at once (default: 4)')
+    send.add_argument('--max-attachments', type=int, default=10,
+                      help='most invoices attached to one message (default: 10)')
+    send.add_argument('--retries', type=int, default=3,
+                      help='retries after a temporary failure (default: 3)')
+    send.add_argument('--resend', action='store_true', help='also send invoices already sent')
+    send.add_argument('--dry-run', action='store_true', help='list the messages without sending them')
+    send.set_defaults(handler=_send_command)
+
+    serve = commands.add_parser('serve', help='run a local SMTP stand-in for testing')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8025)
+    serve.add_argument('--spool', help='directory to write received messages to')
+    serve.set_defaults(handler=_serve_command)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
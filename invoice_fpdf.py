@@ -0,0 +1,368 @@
+"""
+FPDF backend for the Yolymatics Tutorials invoice generator
+Draws the same invoice sections as the ReportLab backend, but straight onto
+the page with FPDF's cell API instead of through a layout engine
+
+Requirements:
+- pip install fpdf (or fpdf2)
+- pip install pillow (for the logo)
+
+Usage:
+    generator = InvoiceGenerator(backend='fpdf')
+    generator.generate_invoice(student_name, courses, lessons, rate_per_lesson)
+"""
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import io
+import os
+import tempfile
+
+from fpdf import FPDF, FPDF_VERSION
+from PIL import Image as PILImage
+
+
+# PyFPDF 1.x returns documents as latin-1 strings, fpdf2 as bytes
+_LEGACY_FPDF = FPDF_VERSION.startswith('1.')
+
+# Page geometry in points, matching the ReportLab backend
+PAGE_MARGIN = 72
+BOTTOM_MARGIN = 18
+INCH = 72
+HEADING_HEIGHT = 30
+
+DARK_BLUE = (0, 0, 139)
+LIGHT_BLUE = (173, 216, 230)
+LIGHT_YELLOW = (255, 255, 224)
+LIGHT_GREY = (211, 211, 211)
+WHITE_SMOKE = (245, 245, 245)
+ALICE_BLUE = (240, 248, 255)
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+
+# Flattened logos as PNG bytes, keyed by source file identity and print size
+_logo_images = {}
+
+# CreationDate of reproducible documents (the date ReportLab's invariant mode uses)
+REPRODUCIBLE_DATE = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+def _latin1(text):
+    """Core PDF fonts only cover latin-1; anything else prints as '?'"""
+    return str(text).encode('latin-1', 'replace').decode('latin-1')
+
+
+def _wrap(pdf, text, width):
+    """Break text into lines that fit width in the current font, splitting overlong words"""
+    lines = []
+    line = ''
+    for word in text.split(' '):
+        candidate = f'{line} {word}' if line else word
+        if pdf.get_string_width(candidate) <= width:
+            line = candidate
+            continue
+        if line:
+            lines.append(line)
+        while pdf.get_string_width(word) > width and len(word) > 1:
+            cut = len(word) - 1
+            while cut > 1 and pdf.get_string_width(word[:cut]) > width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        line = word
+    lines.append(line)
+    return lines
+
+
+def _logo_image(path, width, dpi=200):
+    """
+    Return a PNG of the logo downsampled to print size on a white background
+
+    PyFPDF cannot read PNG alpha channels, so the logo is flattened once per
+    process and the PNG bytes reused by every invoice.
+
+    Returns:
+        tuple: (PNG bytes, height in points at the given width)
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, width, dpi)
+    cached = _logo_images.get(key)
+    if cached is None:
+        target_px = round(width / 72 * dpi)
+        with PILImage.open(path) as source:
+            image = source.convert('RGBA')
+        if image.width > target_px:
+            image = image.resize((target_px, round(image.height * target_px / image.width)), PILImage.LANCZOS)
+        flat = PILImage.new('RGB', image.size, WHITE)
+        flat.paste(image, mask=image.getchannel('A'))
+        buffer = io.BytesIO()
+        flat.save(buffer, 'PNG')
+        _logo_images[key] = cached = (buffer.getvalue(), width * image.height / image.width)
+    return cached
+
+
+@contextmanager
+def _image_source(png):
+    """Something FPDF.image can read the PNG from, for the length of the block"""
+    if not _LEGACY_FPDF:
+        yield io.BytesIO(png)
+        return
+    # PyFPDF 1.x only reads images from a named file; it reads it at once
+    handle, name = tempfile.mkstemp(prefix='invoice_logo_', suffix='.png')
+    try:
+        with os.fdopen(handle, 'wb') as image_file:
+            image_file.write(png)
+        yield name
+    finally:
+        os.remove(name)
+
+
+class _InvoicePDF(FPDF):
+    """A4 page in points with the invoice margins and an optional page count footer"""
+
+    def __init__(self, numbered, reproducible=False, compress=True):
+        FPDF.__init__(self, orientation='P', unit='pt', format='A4')
+        self.numbered = numbered
+        self.reproducible = reproducible
+        self.set_compression(compress)
+        if reproducible and not _LEGACY_FPDF:
+            self.set_creation_date(REPRODUCIBLE_DATE)
+        self.set_margins(PAGE_MARGIN, PAGE_MARGIN, PAGE_MARGIN)
+        # Tables break pages themselves, so they can carry subtotals forward
+        self.set_auto_page_break(False, BOTTOM_MARGIN)
+        if numbered:
+            self.alias_nb_pages()
+
+    def _out(self, s):
+        # PyFPDF 1.x always stamps the current time
+        if self.reproducible and isinstance(s, str) and s.startswith('/CreationDate '):
+            s = '/CreationDate ' + self._textstring('D:' + REPRODUCIBLE_DATE.strftime('%Y%m%d%H%M%S'))
+        FPDF._out(self, s)
+
+    def footer(self):
+        if self.numbered:
+            self.set_y(-26)
+            self.set_font('Helvetica', '', 8)
+            self.set_text_color(128, 128, 128)
+            self.cell(0, 10, f"Page {self.page_no()} of {{nb}}", 0, 0, 'C')
+            self.set_text_color(*BLACK)
+
+    @property
+    def content_width(self):
+        return self.w - 2 * PAGE_MARGIN
+
+    @property
+    def page_bottom(self):
+        return self.h - BOTTOM_MARGIN
+
+    def keep(self, height):
+        """Start a new page unless height more points fit on this one"""
+        if self.get_y() + height > self.page_bottom:
+            self.add_page()
+
+
+class FPDFInvoiceBackend:
+    """
+    Renders invoice sections with FPDF
+
+    Reproducible output gets a fixed creation date; FPDF's output is
+    otherwise already the same for the same invoice.
+    """
+
+    name = 'fpdf'
+
+    def __init__(self, reproducible=False, compress=True):
+        self.reproducible = reproducible
+        self.compress = compress
+
+    def build_story(self, sections):
+        """FPDF draws as it goes, so the story is the sections themselves"""
+        return list(sections)
+
+    def render(self, story, stream, numbered=False):
+        """Draw the sections onto A4 pages and write the PDF to stream"""
+        pdf = _InvoicePDF(numbered, self.reproducible, self.compress)
+        pdf.add_page()
+        for name, content in story:
+            getattr(self, f'_{name}')(pdf, content)
+
+        if _LEGACY_FPDF:
+            stream.write(pdf.output(dest='S').encode('latin-1'))
+        else:
+            stream.write(bytes(pdf.output()))
+
+    def _heading(self, pdf, text):
+        pdf.ln(8)
+        pdf.set_font('Helvetica', 'B', 12)
+        pdf.set_text_color(*DARK_BLUE)
+        pdf.cell(0, 16, _latin1(text), 0, 1)
+        pdf.set_text_color(*BLACK)
+        pdf.ln(6)
+
+    def _header(self, pdf, content):
+        if content['logo_path']:
+            png, height = _logo_image(content['logo_path'], content['logo_width'])
+            with _image_source(png) as source:
+                pdf.image(source, (pdf.w - content['logo_width']) / 2, pdf.get_y(), content['logo_width'], height,
+                          type='png')
+            pdf.set_y(pdf.get_y() + height + 10)
+        pdf.set_font('Helvetica', 'B', 28)
+        pdf.set_text_color(*DARK_BLUE)
+        pdf.cell(0, 34, _latin1(content['title']), 0, 1, 'C')
+        pdf.set_text_color(*BLACK)
+        pdf.ln(30)
+
+    def _parties(self, pdf, content):
+        column = 3.25 * INCH
+        line_height = 12
+        top = pdf.get_y()
+        rows = max(len(content['from']), len(content['bill_to']))
+        height = 31 + rows * line_height + 24
+
+        # BILL TO column: boxed, with a shaded heading band
+        right = PAGE_MARGIN + column
+        pdf.set_fill_color(*LIGHT_BLUE)
+        pdf.rect(right, top, column, 31, 'F')
+        pdf.set_draw_color(*DARK_BLUE)
+        pdf.set_line_width(2)
+        pdf.rect(right, top, column, height)
+        pdf.set_line_width(1)
+        pdf.set_draw_color(*BLACK)
+
+        for x, heading, lines in ((PAGE_MARGIN, 'FROM:', content['from']),
+                                  (right, 'BILL TO:', content['bill_to'])):
+            pdf.set_xy(x + 12, top + 8)
+            pdf.set_font('Helvetica', 'B', 12)
+            pdf.set_text_color(*DARK_BLUE)
+            pdf.cell(column - 24, 15, heading)
+            pdf.set_text_color(*BLACK)
+            for i, line in enumerate(lines):
+                pdf.set_xy(x + 20, top + 43 + i * line_height)
+                pdf.set_font('Helvetica', 'B' if i == 0 else '', 10)
+                pdf.cell(column - 40, line_height, _latin1(line))
+        pdf.set_xy(PAGE_MARGIN, top + height + 30)
+
+    def _details(self, pdf, rows):
+        # Keep the heading with its first row
+        pdf.keep(HEADING_HEIGHT + 28)
+        self._heading(pdf, 'INVOICE DETAILS')
+        pdf.set_fill_color(*LIGHT_YELLOW)
+        pdf.set_draw_color(*LIGHT_GREY)
+        for label, value in rows:
+            pdf.keep(28)
+            pdf.set_font('Helvetica', 'B', 11)
+            pdf.cell(2 * INCH, 28, '  ' + _latin1(label), 1, 0, 'L', True)
+            pdf.set_font('Helvetica', '', 11)
+            pdf.cell(4 * INCH, 28, '  ' + _latin1(value), 1, 1, 'L', True)
+        pdf.set_draw_color(*BLACK)
+        pdf.ln(25)
+
+    def _services(self, pdf, content):
+        if content['per_lesson']:
+            widths = [1.0 * INCH, 2.2 * INCH, 0.8 * INCH, 1.0 * INCH, 1.1 * INCH]
+            row_height, font_size, leading = 20, 9, 11
+            aligns = ['L', 'L', 'R', 'R', 'R']
+        else:
+            widths = [2 * INCH, 2 * INCH, 1.5 * INCH, 1.5 * INCH]
+            row_height, font_size, leading = 35, 11, 13
+            aligns = ['L', 'R', 'R', 'R']
+        padding = 6
+        # Keep the heading with the column headings and a first row
+        pdf.keep(HEADING_HEIGHT + 3 * row_height)
+        self._heading(pdf, 'SERVICE DETAILS')
+
+        def headings():
+            pdf.set_x(PAGE_MARGIN + (pdf.content_width - sum(widths)) / 2)
+            pdf.set_font('Helvetica', 'B', font_size)
+            pdf.set_fill_color(*DARK_BLUE)
+            pdf.set_text_color(*WHITE_SMOKE)
+            for width, heading in zip(widths, content['headings']):
+                pdf.cell(width, row_height, _latin1(heading), 1, 0, 'C', True)
+            pdf.ln()
+            pdf.set_text_color(*BLACK)
+
+        def forward_row(label, amount):
+            pdf.set_x(PAGE_MARGIN + (pdf.content_width - sum(widths)) / 2)
+            pdf.set_font('Helvetica', 'I', font_size)
+            pdf.set_fill_color(*LIGHT_GREY)
+            pdf.cell(widths[0], row_height, '', 1, 0, 'L', True)
+            pdf.cell(sum(widths[1:-1]), row_height, label, 1, 0, 'L', True)
+            pdf.cell(widths[-1], row_height, f'R {amount:,.2f} ', 1, 1, 'R', True)
+
+        headings()
+        running = 0
+        for row, amount in zip(content['rows'], content['amounts']):
+            # Long descriptions wrap, and the row grows to hold their lines
+            pdf.set_font('Helvetica', '', font_size)
+            cells = [_wrap(pdf, _latin1(text), width - 2 * padding) for width, text in zip(widths, row)]
+            height = max(row_height, max(len(lines) for lines in cells) * leading + 8)
+            # Keep room for the carried-forward row below the last row on a page
+            if pdf.get_y() + height + row_height > pdf.page_bottom:
+                forward_row('Carried forward', running)
+                pdf.add_page()
+                headings()
+                forward_row('Brought forward', running)
+                pdf.set_font('Helvetica', '', font_size)
+            x = PAGE_MARGIN + (pdf.content_width - sum(widths)) / 2
+            top = pdf.get_y()
+            for width, align, lines in zip(widths, aligns, cells):
+                pdf.rect(x, top, width, height)
+                pdf.set_xy(x + padding, top + (height - len(lines) * leading) / 2)
+                for line in lines:
+                    pdf.cell(width - 2 * padding, leading, line, 0, 2, align)
+                x += width
+            pdf.set_xy(PAGE_MARGIN, top + height)
+            running += amount
+        pdf.ln(20)
+
+    def _totals(self, pdf, rows):
+        pdf.keep(30 * len(rows))
+        left = PAGE_MARGIN + (pdf.content_width - 6 * INCH) / 2
+        for i, (label, value) in enumerate(rows):
+            last = i == len(rows) - 1
+            pdf.set_x(left)
+            pdf.set_font('Helvetica', 'B' if last else '', 14 if last else 11)
+            if last:
+                pdf.set_fill_color(*LIGHT_GREY)
+                pdf.set_line_width(2)
+                pdf.line(left, pdf.get_y(), left + 6 * INCH, pdf.get_y())
+                pdf.set_line_width(1)
+            height = 32 if last else 27
+            pdf.cell(4.25 * INCH, height, f'{_latin1(label)}   ', 0, 0, 'R', last)
+            pdf.cell(1.75 * INCH, height, f'{_latin1(value)}   ', 0, 1, 'R', last)
+        pdf.ln(30)
+
+    def _terms(self, pdf, content):
+        pdf.keep(70)
+        self._heading(pdf, content['title'])
+        pdf.set_font('Helvetica', '', 10)
+        for line in content['lines']:
+            pdf.cell(0, 12, '- ' + _latin1(line), 0, 1)
+        pdf.ln(20)
+
+    def _banking(self, pdf, content):
+        # Banking details always start a new page
+        pdf.add_page()
+        self._heading(pdf, content['title'])
+        pdf.set_draw_color(*DARK_BLUE)
+        pdf.set_line_width(1.5)
+        left = PAGE_MARGIN + (pdf.content_width - 6 * INCH) / 2
+        for i, (label, value) in enumerate(content['rows']):
+            pdf.set_fill_color(*(ALICE_BLUE if i % 2 == 0 else WHITE))
+            pdf.set_x(left)
+            pdf.set_font('Helvetica', 'B', 11)
+            pdf.cell(2.5 * INCH, 33, '    ' + _latin1(label), 1, 0, 'L', True)
+            pdf.set_font('Helvetica', '', 11)
+            pdf.cell(3.5 * INCH, 33, '    ' + _latin1(value), 1, 1, 'L', True)
+        pdf.set_line_width(1)
+        pdf.set_draw_color(*BLACK)
+        pdf.ln(20)
+
+    def _footer(self, pdf, content):
+        pdf.set_font('Helvetica', 'B', 10)
+        pdf.multi_cell(0, 12, _latin1(content['thank_you']))
+        pdf.ln(30)
+        pdf.set_font('Helvetica', 'I', 10)
+        pdf.set_text_color(*DARK_BLUE)
+        pdf.multi_cell(0, 12, _latin1(content['verse']), 0, 'C')
+        pdf.set_text_color(*BLACK)
@@ -0,0 +1,341 @@
+"""
+Invoice ledger for Yolymatics Tutorials
+Keeps every generated invoice in an SQLite database indexed by student,
+client, invoice number and date, so billing questions are one indexed query
+instead of a listing of invoices/
+
+Requirements:
+- None beyond the standard library (sqlite3)
+
+Usage:
+    ledger = InvoiceLedger('invoices')
+    ledger.find(student='Bella Grasso', month='2024-09')   # what did we bill her in September?
+    ledger.month_totals(year=2024, client='TTI Bursary Management')
+    ledger.duplicates()                                   # the same work billed twice
+
+    python invoice_ledger.py find --student "Bella Grasso" --month 2024-09
+    python invoice_ledger.py totals --year 2024
+    python invoice_ledger.py duplicates
+    python invoice_ledger.py import              # backfill from the incremental-run manifest
+
+InvoiceGenerator records each invoice file in the ledger of its output
+directory (invoices/.invoice_ledger.sqlite3 by default) as it is generated;
+in-memory invoices are only recorded in a ledger passed to them.
+"""
+
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+
+LEDGER_FILENAME = '.invoice_ledger.sqlite3'
+
+# Written by InvoiceMaker.InvoiceManifest; read by import_manifest
+MANIFEST_FILENAME = '.invoice_manifest.jsonl'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS invoices (
+    invoice_number TEXT PRIMARY KEY,
+    invoice_date TEXT NOT NULL,
+    student_name TEXT NOT NULL,
+    client_name TEXT NOT NULL,
+    total_cents INTEGER NOT NULL,
+    filename TEXT,
+    billing_key TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS invoices_by_student ON invoices (student_name, invoice_date);
+CREATE INDEX IF NOT EXISTS invoices_by_client ON invoices (client_name, invoice_date);
+CREATE INDEX IF NOT EXISTS invoices_by_date ON invoices (invoice_date, total_cents);
+CREATE INDEX IF NOT EXISTS invoices_by_billing_key ON invoices (billing_key);
+"""
+
+# Result fields every ledger row is built from
+REQUIRED_FIELDS = ('invoice_number', 'invoice_date', 'student_name', 'bill_to', 'total_amount', 'courses',
+                   'lessons_per_course')
+
+# Columns returned by the query methods (the full result comes from get)
+_SUMMARY_COLUMNS = 'invoice_number, invoice_date, student_name, client_name, total_cents, filename'
+
+
+def _cents(amount):
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def billing_key(result):
+    """
+    Hash what an invoice bills, to recognise the same work billed twice
+
+    Per-lesson invoices are keyed by their dated lessons, so the same
+    lessons show up as duplicates whatever date they were invoiced on;
+    per-course invoices, which legitimately repeat month after month, are
+    keyed by their lines and invoice date.
+    """
+    billed = {
+        'student_name': result['student_name'],
+        'client_name': result['bill_to']['name'],
+    }
+    if result.get('lesson_items') is not None:
+        billed['lessons'] = [[item['date'], item['course'], item['hours'], item['rate']]
+                             for item in result['lesson_items']]
+    else:
+        billed['invoice_date'] = result['invoice_date']
+        # Results from before per-line amounts were recorded key on the rate instead
+        amounts = result.get('line_amounts') or [result.get('rate_per_lesson')] * len(result['courses'])
+        billed['lines'] = [list(line) for line in
+                           zip(result['courses'], result['lessons_per_course'], amounts)]
+    encoded = json.dumps(billed, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _month_range(month):
+    """'YYYY-MM' as a half-open range of ISO dates"""
+    year, number = (int(part) for part in month.split('-'))
+    start = date(year, number, 1)
+    end = date(year + number // 12, number % 12 + 1, 1)
+    return start.isoformat(), end.isoformat()
+
+
+class InvoiceLedger:
+    """
+    SQLite record of every invoice generated into a directory
+
+    Each invoice is one row keyed by its invoice number (recording the same
+    number again replaces the row), with its full result dict stored as
+    JSON. The database runs in WAL mode, so pool workers record invoices
+    concurrently while queries read, and every query is served from an index.
+    """
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, LEDGER_FILENAME)
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Each process opens its own connection
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with connection:
+                connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def record(self, result):
+        """Record one generate_invoice result"""
+        self.record_many([result])
+
+    def record_many(self, results):
+        """Record several results in one transaction"""
+        rows = [(
+            result['invoice_number'],
+            result['invoice_date'],
+            result['student_name'],
+            result['bill_to']['name'],
+            _cents(result['total_amount']),
+            result.get('filename'),
+            billing_key(result),
+            json.dumps(result, sort_keys=True, default=str)
+        ) for result in results]
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.executemany('INSERT OR REPLACE INTO invoices VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def _query(self, sql, parameters=()):
+        with self._lock:
+            return self._connect().execute(sql, parameters).fetchall()
+
+    @staticmethod
+    def _summary(row):
+        number, invoice_date, student_name, client_name, total_cents, filename = row
+        return {
+            'invoice_number': number,
+            'invoice_date': invoice_date,
+            'student_name': student_name,
+            'client_name': client_name,
+            'total_amount': total_cents / 100,
+            'filename': filename
+        }
+
+    def get(self, invoice_number):
+        """Return the recorded result for an invoice number, or None"""
+        rows = self._query('SELECT result FROM invoices WHERE invoice_number = ?', (invoice_number,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def __len__(self):
+        return self._query('SELECT COUNT(*) FROM invoices')[0][0]
+
+    def _filters(self, student=None, client=None, month=None, start=None, end=None):
+        """WHERE clause and parameters; dates are ISO strings, end exclusive"""
+        if month is not None:
+            start, end = _month_range(month)
+        clauses = []
+        parameters = []
+        for column, value, operator in (('student_name', student, '='), ('client_name', client, '='),
+                                        ('invoice_date', start, '>='), ('invoice_date', end, '<')):
+            if value is not None:
+                clauses.append(f"{column} {operator} ?")
+                parameters.append(value)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), parameters
+
+    def find(self, student=None, client=None, month=None, start=None, end=None, limit=None):
+        """
+        Invoices matching every given filter, oldest first
+
+        Args:
+            student (str, optional): Student name
+            client (str, optional): Name of the client billed
+            month (str, optional): 'YYYY-MM'
+            start (str, optional): First invoice date included (YYYY-MM-DD)
+            end (str, optional): First invoice date excluded (YYYY-MM-DD)
+            limit (int, optional): Return at most this many
+
+        Returns:
+            list: Dicts with invoice_number, invoice_date, student_name,
+                client_name, total_amount and filename
+        """
+        where, parameters = self._filters(student, client, month, start, end)
+        sql = f"SELECT {_SUMMARY_COLUMNS} FROM invoices{where} ORDER BY invoice_date, invoice_number"
+        if limit is not None:
+            sql += ' LIMIT ?'
+            parameters.append(limit)
+        return [self._summary(row) for row in self._query(sql, parameters)]
+
+    def month_totals(self, year=None, student=None, client=None):
+        """
+        Number of invoices and amount billed per month
+
+        Returns:
+            list: Dicts with month ('YYYY-MM'), invoices and total_amount, in
+                month order
+        """
+        start, end = (f"{year}-01-01", f"{year + 1}-01-01") if year is not None else (None, None)
+        where, parameters = self._filters(student, client, start=start, end=end)
+        rows = self._query(
+            f"SELECT substr(invoice_date, 1, 7) AS month, COUNT(*), SUM(total_cents) FROM invoices{where} "
+            f"GROUP BY month ORDER BY month", parameters)
+        return [{'month': month, 'invoices': count, 'total_amount': cents / 100} for month, count, cents in rows]
+
+    def duplicates(self):
+        """
+        Groups of invoices that bill the same work (see billing_key)
+
+        Returns:
+            list: One list of find-style dicts per group, oldest first
+        """
+        rows = self._query(
+            f"SELECT billing_key, {_SUMMARY_COLUMNS} FROM invoices WHERE billing_key IN "
+            f"(SELECT billing_key FROM invoices GROUP BY billing_key HAVING COUNT(*) > 1) "
+            f"ORDER BY billing_key, invoice_date, invoice_number")
+        groups = {}
+        for row in rows:
+            groups.setdefault(row[0], []).append(self._summary(row[1:]))
+        return sorted(groups.values(), key=lambda group: (group[0]['invoice_date'], group[0]['invoice_number']))
+
+    def duplicates_of(self, result):
+        """Recorded invoices, other than result itself, that bill the same work"""
+        rows = self._query(
+            f"SELECT {_SUMMARY_COLUMNS} FROM invoices WHERE billing_key = ? AND invoice_number != ? "
+            f"ORDER BY invoice_date, invoice_number", (billing_key(result), result['invoice_number']))
+        return [self._summary(row) for row in rows]
+
+    def import_manifest(self, path=None):
+        """
+        Backfill the ledger from an incremental-run manifest
+
+        Entries written by older versions that lack fields the ledger needs
+        (see REQUIRED_FIELDS) are skipped.
+
+        Returns:
+            tuple: (number of results recorded, number of entries skipped)
+        """
+        path = path or os.path.join(os.path.dirname(self.path), MANIFEST_FILENAME)
+        results = {}
+        skipped = 0
+        with open(path, encoding='utf-8') as handle:
+            for line in handle:
+                if line.strip():
+                    result = json.loads(line)['result']
+                    if any(field not in result for field in REQUIRED_FIELDS):
+                        skipped += 1
+                        continue
+                    results[result['invoice_number']] = result
+        self.record_many(results.values())
+        return len(results), skipped
+
+
+def _print_invoices(invoices):
+    for invoice in invoices:
+        print(f"{invoice['invoice_number']:<24} {invoice['invoice_date']:<10}  {invoice['student_name']:<24} "
+              f"{invoice['client_name']:<28} R{invoice['total_amount']:>12,.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query the invoice ledger')
+    parser.add_argument('--dir', default='invoices', help='invoice output directory (default: invoices)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    find = commands.add_parser('find', help='list invoices')
+    totals = commands.add_parser('totals', help='invoices and amount billed per month')
+    for command in (find, totals):
+        command.add_argument('--student', help='student name')
+        command.add_argument('--client', help='name of the client billed')
+    find.add_argument('--month', help='YYYY-MM')
+    find.add_argument('--limit', type=int, default=None)
+    totals.add_argument('--year', type=int, default=None)
+    commands.add_parser('duplicates', help='invoices that bill the same work')
+    commands.add_parser('import', help='record the invoices in the incremental-run manifest')
+    args = parser.parse_args(argv)
+
+    ledger = InvoiceLedger(args.dir)
+    if args.command == 'find':
+        invoices = ledger.find(student=args.student, client=args.client, month=args.month, limit=args.limit)
+        _print_invoices(invoices)
+        print(f"{len(invoices)} invoice(s), R{sum(invoice['total_amount'] for invoice in invoices):,.2f}")
+    elif args.command == 'totals':
+        for month in ledger.month_totals(year=args.year, student=args.student, client=args.client):
+            print(f"{month['month']}  {month['invoices']:>7} invoice(s)  R{month['total_amount']:>14,.2f}")
+    elif args.command == 'duplicates':
+        groups = ledger.duplicates()
+        for group in groups:
+            _print_invoices(group)
+            print()
+        print(f"{len(groups)} group(s) of duplicate invoices")
+    else:
+        recorded, skipped = ledger.import_manifest()
+        if skipped:
+            print(f"warning: skipped {skipped} manifest entr{'y' if skipped == 1 else 'ies'} from an older "
+                  f"version without the fields the ledger needs", file=sys.stderr)
+        print(f"{recorded} invoice(s) recorded in {ledger.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,611 @@
+"""
+ReportLab backend for the Yolymatics Tutorials invoice generator
+Lays out the invoice sections with ReportLab's platypus engine; imported by
+InvoiceMaker only when an invoice or statement book is rendered, so tools
+that only price, validate or look up invoices never load ReportLab
+
+Requirements:
+- pip install reportlab
+- pip install pillow (for the logo)
+
+Usage:
+    generator = InvoiceGenerator()          # backend='reportlab' is the default
+    generator.generate_invoice(student_name, courses, lessons, rate_per_lesson)
+"""
+
+from decimal import Decimal
+from functools import lru_cache
+import hashlib
+import io
+import os
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Flowable
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.utils import ImageReader, simpleSplit
+from reportlab.pdfgen.canvas import Canvas
+from PIL import Image as PILImage
+
+
+# Width available to the story inside SimpleDocTemplate's frame
+# (A4 less 72pt page margins and the frame's 6pt padding on each side)
+STORY_WIDTH = A4[0] - 2 * 72 - 2 * 6
+
+# Width of the FROM cell in the header table (3.25in column less 12pt padding)
+FROM_CELL_WIDTH = 3.25 * inch - 2 * 12
+
+# Logos are downsampled to this print resolution
+LOGO_DPI = 200
+
+# Downsampled logos, keyed by file identity and print size
+_logo_cache = {}
+
+# Trailer /ID written in reproducible mode and then replaced, at the same
+# length, by a digest of the finished file
+_PLACEHOLDER_ID = b'\n[<' + b'0' * 32 + b'><' + b'0' * 32 + b'>]\n'
+
+
+def _build_invoice_theme():
+    """Build the paragraph and table styles shared by every invoice"""
+    styles = getSampleStyleSheet()
+
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=28,
+            spaceAfter=20,
+            alignment=TA_CENTER,
+            textColor=colors.darkblue,
+            fontName='Helvetica-Bold'
+        ),
+        'header': ParagraphStyle(
+            'HeaderStyle',
+            parent=styles['Normal'],
+            fontSize=12,
+            fontName='Helvetica-Bold',
+            textColor=colors.darkblue,
+            spaceAfter=8,
+            spaceBefore=8
+        ),
+        # Address styles with better spacing
+        'address': ParagraphStyle(
+            'AddressStyle',
+            parent=styles['Normal'],
+            fontSize=10,
+            spaceAfter=4,
+            alignment=TA_LEFT,
+            leftIndent=8,  # Added left indent for better spacing
+            rightIndent=8  # Added right indent for better spacing
+        ),
+        'footer': ParagraphStyle(
+            'FooterStyle',
+            parent=styles['Normal'],
+            fontSize=10,
+            alignment=TA_LEFT,
+            spaceAfter=6
+        ),
+        # Bible verse at the bottom
+        'bible_verse': ParagraphStyle(
+            'BibleVerseStyle',
+            parent=styles['Normal'],
+            fontSize=10,
+            alignment=TA_CENTER,
+            spaceAfter=6,
+            fontName='Helvetica-Oblique',
+            textColor=colors.darkblue
+        ),
+        'header_table': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 12),  # Increased left padding
+            ('RIGHTPADDING', (0, 0), (-1, -1), 12),  # Increased right padding
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            # Enhanced border styling for BILL TO section
+            ('BOX', (1, 0), (1, -1), 2, colors.darkblue),
+            ('BACKGROUND', (1, 0), (1, 0), colors.lightblue),
+            # Add some spacing around the content
+            ('LEFTPADDING', (1, 1), (1, 1), 15),
+            ('RIGHTPADDING', (1, 1), (1, 1), 15),
+            ('TOPPADDING', (1, 1), (1, 1), 12),
+            ('BOTTOMPADDING', (1, 1), (1, 1), 12),
+        ]),
+        'invoice_table': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('LEFTPADDING', (0, 0), (-1, -1), 12),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.lightgrey),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.lightyellow),
+        ]),
+        'service_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('LEFTPADDING', (0, 0), (-1, -1), 8),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+            ('VALIGN', (0, 1), (-1, -1), 'MIDDLE'),
+        ]),
+        'totals_table': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, -2), 'Helvetica'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('FONTSIZE', (0, -1), (-1, -1), 14),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+            ('LEFTPADDING', (0, 0), (-1, -1), 12),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 12),
+            ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+        ]),
+        'ledger_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('LEADING', (0, 0), (-1, -1), 11),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('ALIGN', (2, 1), (-1, -1), 'RIGHT'),
+        ]),
+        'ledger_brought_forward': TableStyle([
+            ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Oblique'),
+            ('BACKGROUND', (0, 1), (-1, 1), colors.lightgrey),
+        ]),
+        'ledger_carried_forward': TableStyle([
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Oblique'),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+        ]),
+        'summary_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+            ('GRID', (0, 0), (-1, -2), 1, colors.black),
+            ('ALIGN', (-1, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('LINEABOVE', (0, -1), (-1, -1), 2, colors.black),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+        ]),
+        'banking_table': TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 0), (-1, -1), 10),
+            ('LEFTPADDING', (0, 0), (-1, -1), 15),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+            ('GRID', (0, 0), (-1, -1), 1.5, colors.darkblue),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.aliceblue),
+            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.aliceblue, colors.white]),
+        ])
+    }
+
+
+@lru_cache(maxsize=None)
+def _invoice_theme():
+    """Return the invoice theme, built once per process"""
+    return _build_invoice_theme()
+
+
+class _PrecompiledBlock(Flowable):
+    """
+    Static flowables laid out once and stamped as a shared Form XObject
+
+    The children are wrapped when the block is created, so later builds skip
+    their layout entirely. The first time a document draws the block its
+    content is recorded as a named form; every further use in that document
+    (e.g. several invoices in one PDF) only references the form.
+    """
+
+    def __init__(self, name, flowables, width):
+        Flowable.__init__(self)
+        self.form_name = name
+        self.width = width
+        self._placed = []
+
+        y = 0
+        last = len(flowables) - 1
+        for i, flowable in enumerate(flowables):
+            if i > 0:
+                y += flowable.getSpaceBefore()
+            w, h = flowable.wrap(width, 10 ** 6)
+            self._placed.append((flowable, w, y, h))
+            y += h
+            if i < last:
+                y += flowable.getSpaceAfter()
+        self.height = y
+
+        # The frame still applies the outer spacing, as it did for the children
+        self._space_before = flowables[0].getSpaceBefore()
+        self._space_after = flowables[-1].getSpaceAfter()
+
+    def getSpaceBefore(self):
+        return self._space_before
+
+    def getSpaceAfter(self):
+        return self._space_after
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        # The block is shared across documents, so forget that this one had
+        # to push it to the next page (platypus never clears the mark itself)
+        self.__dict__.pop('_postponed', None)
+        canv = self.canv
+        if not canv.hasForm(self.form_name):
+            # Leave room for borders drawn on the edge of the block
+            canv.beginForm(self.form_name, -10, -10, self.width + 10, self.height + 10)
+            for flowable, w, y, h in self._placed:
+                flowable.drawOn(canv, 0, self.height - y - h, _sW=self.width - w)
+            canv.endForm()
+        canv.doForm(self.form_name)
+
+
+def _load_logo(path, width, dpi=LOGO_DPI):
+    """
+    Return a logo downsampled to print resolution, decoding it once per process
+
+    Returns:
+        tuple: (ImageReader, height in points) for drawing the logo width wide
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, width, dpi)
+    cached = _logo_cache.get(key)
+    if cached is None:
+        target_px = round(width / 72 * dpi)
+        with PILImage.open(path) as source:
+            image = source.convert('RGBA')
+        if image.width > target_px:
+            image = image.resize((target_px, round(image.height * target_px / image.width)), PILImage.LANCZOS)
+        reader = ImageReader(image)
+        # Decode the pixel data now so every build reuses it
+        reader.getRGBData()
+        cached = _logo_cache[key] = (reader, width * image.height / image.width)
+    return cached
+
+
+class _LogoFlowable(Flowable):
+    """Draws a cached logo; documents that draw it repeatedly embed it once"""
+
+    def __init__(self, reader, width, height):
+        Flowable.__init__(self)
+        self._reader = reader
+        self.width = width
+        self.height = height
+        self.hAlign = 'CENTER'
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self._reader, 0, 0, self.width, self.height, mask='auto')
+
+
+def _wrap_cells(row, widths, font_name, font_size, padding):
+    """Row with each cell's text broken into lines that fit its column"""
+    return ['\n'.join(simpleSplit(str(text), font_name, font_size, width - padding) or [''])
+            for text, width in zip(row, widths)]
+
+
+class _LessonLedger(Flowable):
+    """
+    Per-lesson service table that splits cleanly across pages
+
+    Cell text is wrapped to its column once, up front, and each row's height
+    follows from its line count, so the rows that fit on a page are found by
+    adding up known heights. Each page gets the column headings, a 'Brought
+    forward' row after the first page and a 'Carried forward' row before a
+    page break, showing the running subtotal. Splitting builds a table for
+    one page's rows only, so layout time is linear in the rows.
+    """
+
+    ROW_HEIGHT = 20
+    LEADING = 11
+    COLUMN_WIDTHS = [1.0*inch, 2.2*inch, 0.8*inch, 1.0*inch, 1.1*inch]
+    # Table's default left plus right cell padding
+    CELL_PADDING = 12
+
+    def __init__(self, headings, rows, amounts, start=0, brought_forward=Decimal(0), heights=None):
+        Flowable.__init__(self)
+        self._headings = headings
+        if heights is None:
+            # Wrapped once for the whole table; the pages split off share the result
+            rows = [_wrap_cells(row, self.COLUMN_WIDTHS, 'Helvetica', 9, self.CELL_PADDING) for row in rows]
+            heights = [0]
+            for row in rows:
+                lines = max(cell.count('\n') + 1 for cell in row)
+                heights.append(heights[-1] + max(self.ROW_HEIGHT, lines * self.LEADING + 8))
+        self._rows = rows
+        self._amounts = amounts
+        self._start = start
+        self._brought_forward = brought_forward
+        # Running totals of row heights: rows i..j take heights[j] - heights[i]
+        self._heights = heights
+        self.width = sum(self.COLUMN_WIDTHS)
+        self.hAlign = 'CENTER'
+
+    def _fixed_rows(self):
+        # Heading, plus the brought-forward row after the first page
+        return 1 if self._start == 0 else 2
+
+    def wrap(self, availWidth, availHeight):
+        rows_height = self._heights[len(self._rows)] - self._heights[self._start]
+        self.height = self._fixed_rows() * self.ROW_HEIGHT + rows_height
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        # Room for this page's rows once the fixed rows and carried-forward row are placed
+        room = availHeight - (self._fixed_rows() + 1) * self.ROW_HEIGHT
+        limit = self._heights[self._start] + room
+        stop = self._start
+        while stop < len(self._rows) and self._heights[stop + 1] <= limit:
+            stop += 1
+        if stop == self._start:
+            return []
+        carried = self._brought_forward + sum(self._amounts[self._start:stop])
+        return [
+            self._table(stop, carried),
+            _LessonLedger(self._headings, self._rows, self._amounts, stop, carried, self._heights)
+        ]
+
+    def draw(self):
+        table = self._table(len(self._rows), None)
+        table.wrapOn(self.canv, self.width, self.height)
+        table.drawOn(self.canv, 0, 0)
+
+    def _table(self, stop, carried):
+        """Table for rows start..stop, with a carried-forward total if given"""
+        data = [self._headings]
+        if self._start:
+            data.append(['', 'Brought forward', '', '', f'R {self._brought_forward:,.2f}'])
+        data.extend(self._rows[self._start:stop])
+        if carried is not None:
+            data.append(['', 'Carried forward', '', '', f'R {carried:,.2f}'])
+
+        heights = [self._heights[i + 1] - self._heights[i] for i in range(self._start, stop)]
+        row_heights = [self.ROW_HEIGHT] * (1 if self._start == 0 else 2) + heights
+        if carried is not None:
+            row_heights.append(self.ROW_HEIGHT)
+        table = Table(data, colWidths=self.COLUMN_WIDTHS, rowHeights=row_heights)
+        theme = _invoice_theme()
+        table.setStyle(theme['ledger_table'])
+        if self._start:
+            table.setStyle(theme['ledger_brought_forward'])
+        if carried is not None:
+            table.setStyle(theme['ledger_carried_forward'])
+        return table
+
+
+class _NumberedCanvas(Canvas):
+    """Canvas that adds a 'Page N of M' footer once the page count is known"""
+
+    def __init__(self, *args, **kwargs):
+        Canvas.__init__(self, *args, **kwargs)
+        self._page_states = []
+
+    def showPage(self):
+        # Defer the page until save(), when the total is known
+        self._page_states.append(dict(self.__dict__))
+        self._startPage()
+
+    def save(self):
+        page_count = len(self._page_states)
+        for state in self._page_states:
+            self.__dict__.update(state)
+            self.setFont('Helvetica', 8)
+            self.setFillColor(colors.grey)
+            self.drawCentredString(self._pagesize[0] / 2, 20, f"Page {self._pageNumber} of {page_count}")
+            Canvas.showPage(self)
+        Canvas.save(self)
+
+
+def _with_document_id(canvasmaker, document_id):
+    """Canvas factory that writes document_id as the trailer /ID"""
+    def make(*args, **kwargs):
+        canvas = canvasmaker(*args, **kwargs)
+        canvas._doc._ID = document_id
+        return canvas
+    return make
+
+
+def _stamp_document_id(pdf):
+    """Replace the placeholder /ID with the MD5 of the file around it"""
+    at = pdf.rindex(_PLACEHOLDER_ID)
+    digest = hashlib.md5(pdf, usedforsecurity=False).hexdigest().encode('ascii')
+    return pdf[:at] + b'\n[<' + digest + b'><' + digest + b'>]\n' + pdf[at + len(_PLACEHOLDER_ID):]
+
+
+def _write(stream, data):
+    """Write to a binary stream or, given a path, to that file"""
+    if isinstance(stream, str):
+        with open(stream, 'wb') as handle:
+            handle.write(data)
+    else:
+        stream.write(data)
+
+
+class ReportLabInvoiceBackend:
+    """
+    Renders invoice sections with ReportLab's platypus layout engine
+
+    In template mode the sections that are the same on every invoice are laid
+    out once and stamped as precompiled blocks (see _PrecompiledBlock).
+    Reproducible output uses ReportLab's invariant mode (a fixed 2000-01-01
+    timestamp) and a document ID hashed from the finished file, so the same
+    invoice always renders to the same bytes.
+    """
+
+    name = 'reportlab'
+
+    def __init__(self, template_mode=False, reproducible=False, compress=True):
+        self.template_mode = template_mode
+        self.reproducible = reproducible
+        self.compress = compress
+        self._blocks = {}
+
+    def build_story(self, sections):
+        """Turn (name, content) sections into a platypus story"""
+        theme = _invoice_theme()
+        story = []
+        for name, content in sections:
+            story.extend(getattr(self, f'_{name}')(content, theme))
+        return story
+
+    def render(self, story, stream, numbered=False):
+        """Lay out a story as an A4 PDF; numbered adds 'Page N of M' footers"""
+        canvasmaker = _NumberedCanvas if numbered else Canvas
+        options = dict(pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18,
+                       pageCompression=int(self.compress))
+        if not self.reproducible:
+            SimpleDocTemplate(stream, **options).build(story, canvasmaker=canvasmaker)
+            return
+
+        buffer = io.BytesIO()
+        SimpleDocTemplate(buffer, invariant=1, **options).build(
+            story, canvasmaker=_with_document_id(canvasmaker, _PLACEHOLDER_ID))
+        _write(stream, _stamp_document_id(buffer.getvalue()))
+
+    def build_statement_story(self, statement_date, bill_to, invoices, total_amount, sections):
+        """
+        Story for a statement book: a summary page, then each invoice on new pages
+
+        Args:
+            sections (list): invoice_sections for each of invoices
+        """
+        theme = _invoice_theme()
+        story = [
+            Paragraph("STATEMENT", theme['title']),
+            Spacer(1, 20),
+            Paragraph("<b>BILL TO:</b>", theme['header']),
+            Paragraph(f"<b>{bill_to['name']}</b>", theme['address']),
+            Spacer(1, 10),
+            Paragraph(f"Statement Date: {statement_date}", theme['footer']),
+            Paragraph(f"Invoices enclosed: {len(invoices)}", theme['footer']),
+            Spacer(1, 20),
+            Paragraph("SUMMARY", theme['header'])
+        ]
+
+        summary_data = [['Invoice Number', 'Date', 'Student', 'Amount (ZAR)']]
+        for invoice in invoices:
+            summary_data.append([
+                invoice['invoice_number'],
+                invoice['invoice_date'],
+                invoice['student_name'],
+                f"R {invoice['total_amount']:,.2f}"
+            ])
+        summary_data.append(['', '', 'TOTAL DUE:', f'R {total_amount:,.2f}'])
+
+        summary_table = Table(summary_data, colWidths=[2*inch, 1.25*inch, 1.5*inch, 1.5*inch], repeatRows=1)
+        summary_table.setStyle(theme['summary_table'])
+        story.append(summary_table)
+        for invoice_sections in sections:
+            story.append(PageBreak())
+            story.extend(self.build_story(invoice_sections))
+        return story
+
+    def _static(self, name, content, build, width=STORY_WIDTH):
+        """Flowables for a shared section, precompiled once per content in template mode"""
+        if not self.template_mode:
+            return build()
+        cached = self._blocks.get(name)
+        if cached is None or cached[0] is not content:
+            # Form names are derived from the content so a changed block never
+            # reuses a stale form
+            digest = hashlib.sha1(repr(content).encode('utf-8')).hexdigest()[:12]
+            block = _PrecompiledBlock(f"Invoice{name.title()}{digest}", build(), width)
+            cached = self._blocks[name] = (content, [block])
+        return cached[1]
+
+    def _header(self, content, theme):
+        story = []
+        # Branded header
+        if content['logo_path']:
+            reader, logo_height = _load_logo(content['logo_path'], content['logo_width'])
+            story.append(_LogoFlowable(reader, content['logo_width'], logo_height))
+            story.append(Spacer(1, 10))
+        story.append(Paragraph(content['title'], theme['title']))
+        story.append(Spacer(1, 20))
+        return story
+
+    def _parties(self, content, theme):
+        # FROM and BILL TO side by side, the name of each in bold
+        from_lines = content['from']
+        from_paragraph = self._static(
+            'from', from_lines,
+            lambda: [Paragraph("<br/>".join([f"<b>{from_lines[0]}</b>"] + from_lines[1:]), theme['address'])],
+            FROM_CELL_WIDTH)[0]
+        bill_lines = content['bill_to']
+        bill_paragraph = Paragraph("<br/>".join([f"<b>{bill_lines[0]}</b>"] + bill_lines[1:]), theme['address'])
+
+        header_table = Table([
+            [Paragraph("<b>FROM:</b>", theme['header']), Paragraph("<b>BILL TO:</b>", theme['header'])],
+            [from_paragraph, bill_paragraph]
+        ], colWidths=[3.25*inch, 3.25*inch])
+        header_table.setStyle(theme['header_table'])
+        return [header_table, Spacer(1, 30)]
+
+    def _details(self, rows, theme):
+        invoice_table = Table(rows, colWidths=[2*inch, 4*inch])
+        invoice_table.setStyle(theme['invoice_table'])
+        return [Paragraph("INVOICE DETAILS", theme['header']), invoice_table, Spacer(1, 25)]
+
+    def _services(self, content, theme):
+        if content['per_lesson']:
+            # Splits page by page with carried-forward subtotals
+            table = _LessonLedger(content['headings'], content['rows'], content['amounts'])
+        else:
+            widths = [2*inch, 2*inch, 1.5*inch, 1.5*inch]
+            # Long course names wrap; the table sizes each row to its lines
+            rows = [_wrap_cells(row, widths, 'Helvetica', 11, 16) for row in content['rows']]
+            table = Table([content['headings']] + rows, colWidths=widths)
+            table.setStyle(theme['service_table'])
+        return [Paragraph("SERVICE DETAILS", theme['header']), table, Spacer(1, 20)]
+
+    def _totals(self, rows, theme):
+        totals_table = Table(rows, colWidths=[4.25*inch, 1.75*inch])
+        totals_table.setStyle(theme['totals_table'])
+        return [totals_table, Spacer(1, 30)]
+
+    def _terms(self, content, theme):
+        terms_text = ''.join(f"• {line}<br/>" for line in content['lines'])
+        return self._static('terms', content, lambda: [
+            Paragraph(content['title'], theme['header']),
+            Paragraph(terms_text, theme['footer']),
+            Spacer(1, 20)
+        ])
+
+    def _banking(self, content, theme):
+        def build():
+            banking_table = Table(content['rows'], colWidths=[2.5*inch, 3.5*inch])
+            banking_table.setStyle(theme['banking_table'])
+            return [Paragraph(content['title'], theme['header']), banking_table, Spacer(1, 20)]
+
+        # Banking details always start a new page
+        return [PageBreak()] + self._static('banking', content, build)
+
+    def _footer(self, content, theme):
+        return self._static('footer', content, lambda: [
+            Paragraph(f"<b>{content['thank_you']}</b>", theme['footer']),
+            Spacer(1, 30),
+            Paragraph(f"<i>{content['verse']}</i>", theme['bible_verse'])
+        ])
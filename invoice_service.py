@@ -0,0 +1,284 @@
+"""
+Asynchronous invoice service for Yolymatics Tutorials
+Accepts invoice specs from an asyncio application (or over local HTTP) and
+renders them with InvoiceGenerator in a pool of worker processes
+
+Requirements:
+- pip install reportlab
+
+Usage:
+    async with InvoiceService(workers=4) as service:
+        result = await service.submit({
+            'student_name': 'Bella Grasso',
+            'courses': ['Discrete Mathematics Tutoring'],
+            'lessons_per_course': [2],
+            'rate_per_lesson': 350.0,
+        })
+        pdf_bytes = result['pdf']
+
+    # Local HTTP server: POST a JSON spec to /invoices to get the PDF back,
+    # GET /stats for queue depth and latency percentiles
+    python invoice_service.py --port 8765
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+
+from InvoiceMaker import InvoiceGenerator
+
+
+# Set in each worker process by _init_worker
+_worker_generator = None
+
+
+def _init_worker(generator):
+    """Keep one warm generator per worker process"""
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _render_in_worker(spec, in_memory):
+    """Render one spec inside a worker process"""
+    if in_memory:
+        return _worker_generator.generate_invoice_bytes(**spec)
+    return _worker_generator.generate_invoice(**spec)
+
+
+def spec_key(spec):
+    """Hash a spec so identical requests can share one render"""
+    encoded = json.dumps(spec, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class InvoiceService:
+    """
+    Renders invoice specs submitted from an asyncio event loop
+
+    Specs wait in a bounded queue; once it is full, submit() waits for room,
+    so a burst of requests slows callers down instead of growing memory.
+    Rendering happens in a process pool, never on the event loop. Identical
+    specs submitted while one is queued or rendering share its result.
+    """
+
+    def __init__(self, generator=None, workers=None, max_queue=100, in_memory=True, latency_window=10000):
+        """
+        Args:
+            generator (InvoiceGenerator, optional): Configured generator to copy
+                into every worker (defaults to one in template mode)
+            workers (int, optional): Worker processes (defaults to the CPU count)
+            max_queue (int): Specs allowed to wait before submit() blocks
+            in_memory (bool): Return PDFs as bytes under 'pdf' instead of
+                writing them to the spec's output_dir
+            latency_window (int): Latency percentiles in stats() cover the
+                most recent this many requests
+        """
+        self.generator = generator or InvoiceGenerator(template_mode=True)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.in_memory = in_memory
+
+        self._queue = None
+        self._pool = None
+        self._dispatchers = []
+        self._inflight = {}
+        self._latencies = deque(maxlen=latency_window)
+        self._requests = 0
+        self._coalesced = 0
+        self._failed = 0
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def start(self):
+        """Start the worker pool and the dispatchers that feed it"""
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                         initargs=(self.generator,))
+        # One dispatcher per worker keeps every process busy without
+        # handing the pool more work than it can start
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Finish queued specs, then shut down the dispatchers and the pool"""
+        if self._pool is None:
+            return  # never started, or already stopped
+        await self._queue.join()
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        self._dispatchers = []
+        self._pool.shutdown()
+        self._pool = None
+
+    async def submit(self, spec):
+        """
+        Queue an invoice spec and wait for it to be rendered
+
+        Args:
+            spec (dict): Keyword arguments for InvoiceGenerator.generate_invoice
+
+        Returns:
+            dict: The generate_invoice result ('pdf' holds the document when
+                the service renders in memory)
+        """
+        started = time.perf_counter()
+        key = spec_key(spec)
+        future = self._inflight.get(key)
+        if future is not None:
+            self._coalesced += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            try:
+                await self._queue.put((key, spec, future))
+            except BaseException:
+                # Never queued: release anyone who joined this request meanwhile
+                del self._inflight[key]
+                future.cancel()
+                raise
+        try:
+            # Shielded so one caller giving up does not cancel the shared render
+            return await asyncio.shield(future)
+        finally:
+            self._latencies.append(time.perf_counter() - started)
+            self._requests += 1
+
+    def stats(self):
+        """Return queue depth, request counts and latency percentiles (seconds) over the latency window"""
+        latencies = sorted(self._latencies)
+        return {
+            'queued': self._queue.qsize() if self._queue else 0,
+            'in_flight': len(self._inflight),
+            'requests': self._requests,
+            'coalesced': self._coalesced,
+            'failed': self._failed,
+            'p50': _percentile(latencies, 0.50),
+            'p99': _percentile(latencies, 0.99),
+            'max': latencies[-1] if latencies else None
+        }
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            key, spec, future = await self._queue.get()
+            try:
+                result = await loop.run_in_executor(self._pool, _render_in_worker, spec, self.in_memory)
+            except Exception as exc:
+                self._failed += 1
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self._inflight.pop(key, None)
+                self._queue.task_done()
+
+
+async def _read_request(reader):
+    """Read one HTTP/1.1 request; returns (method, path, body) or None on EOF"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value.strip())
+    body = await reader.readexactly(length) if length else b''
+    return method, path, body
+
+
+def _response(status, body, content_type='application/json', headers=None):
+    lines = [f"HTTP/1.1 {status}", f"Content-Type: {content_type}",
+             f"Content-Length: {len(body)}", "Connection: close"]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+
+def _json_response(status, payload):
+    return _response(status, json.dumps(payload, default=str).encode('utf-8'))
+
+
+async def _handle_http(service, reader, writer):
+    try:
+        request = await _read_request(reader)
+        if request is None:
+            return
+        method, path, body = request
+        if method == 'GET' and path == '/stats':
+            response = _json_response('200 OK', service.stats())
+        elif method == 'POST' and path == '/invoices':
+            try:
+                spec = json.loads(body)
+                result = await service.submit(spec)
+            except (ValueError, TypeError, KeyError) as exc:
+                response = _json_response('400 Bad Request', {'error': f"{type(exc).__name__}: {exc}"})
+            else:
+                if 'pdf' in result:
+                    response = _response('200 OK', result['pdf'], 'application/pdf', {
+                        'X-Invoice-Number': result['invoice_number'],
+                        'X-Total-Amount': f"{result['total_amount']:.2f}"
+                    })
+                else:
+                    response = _json_response('200 OK', result)
+        else:
+            response = _json_response('404 Not Found', {'error': f"no route for {method} {path}"})
+    except Exception as exc:
+        response = _json_response('500 Internal Server Error', {'error': f"{type(exc).__name__}: {exc}"})
+    writer.write(response)
+    try:
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(host='127.0.0.1', port=8765, **service_options):
+    """Run the HTTP front end until cancelled"""
+    async with InvoiceService(**service_options) as service:
+        server = await asyncio.start_server(
+            lambda reader, writer: _handle_http(service, reader, writer), host, port)
+        print(f"Invoice service listening on http://{host}:{port} ({service.workers} workers)")
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local HTTP invoice service')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: one per CPU)')
+    parser.add_argument('--max-queue', type=int, default=100,
+                        help='specs allowed to wait before clients are held back')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers, max_queue=args.max_queue))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""
+Draft invoice watch mode for Yolymatics Tutorials
+Tails a lesson log and, each time it is saved, re-renders only the draft
+invoices of the students whose lessons changed, in one warm process
+
+Requirements:
+- pip install reportlab
+
+Usage:
+    python invoice_watch.py lessons.csv [--rate 350] [--per-lesson] [--drafts invoices/drafts]
+                                        [--debounce 0.3] [--interval 0.1]
+
+    # From Python, e.g. with a configured generator
+    DraftWatcher('lessons.csv', generator=InvoiceGenerator(template_mode=True, ledger=False)).run()
+
+The lesson log has the same format as for 'python -m InvoiceMaker run'
+(CSV with a header row, or JSON Lines). Lines appended to the log are parsed
+on their own; any other edit re-reads it. Lessons are grouped per student
+and client, as run groups them, and a draft is rendered only when its
+group's invoice would change. A burst of saves within the debounce
+interval is handled once.
+
+Drafts are numbered DRAFT-<student>, dated today and written to the drafts
+directory (invoices/drafts by default), replacing the previous draft. They
+take no invoice numbers and are not recorded in the ledger or the
+incremental-run manifest.
+"""
+
+from datetime import datetime
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+
+from InvoiceMaker import InvoiceGenerator, group_lessons, is_jsonl_log, parse_lesson_rows
+
+
+class LessonLogTail:
+    """
+    Reads a lesson log incrementally
+
+    Each read parses only the lines added since the previous one, as long
+    as everything read before is byte for byte unchanged; otherwise (an
+    edited or truncated log) it parses the whole log again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.is_jsonl = is_jsonl_log(path)
+        self._offset = 0
+        self._prefix_digest = None
+        self._fieldnames = None
+        self._records = 0
+        self._stat = None
+
+    def stat(self):
+        """Identity, size and modification time of the log (None if it is missing)"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def changed(self):
+        """True if the log was written since the last read"""
+        return self.stat() != self._stat
+
+    def read(self):
+        """
+        Read what changed since the last read
+
+        Returns:
+            tuple: (lessons, reset). With reset False, lessons are the ones
+                appended since the last read; with reset True the log was
+                rewritten and lessons are all of it.
+        """
+        self._stat = self.stat()
+        if self._stat is None:
+            return [], True
+        with open(self.path, 'rb') as handle:
+            data = handle.read()
+
+        reset = (self._prefix_digest is None or len(data) < self._offset
+                 or hashlib.sha256(data[:self._offset]).digest() != self._prefix_digest)
+        start = 0 if reset else self._offset
+        text = data[start:].decode('utf-8')
+        if reset:
+            self._records = 0
+            self._fieldnames = None
+            if not self.is_jsonl:
+                header = next(csv.reader(io.StringIO(text)), None)
+                self._fieldnames = header
+                text = text.split('\n', 1)[1] if '\n' in text else ''
+
+        lessons = list(parse_lesson_rows(io.StringIO(text, newline=''), self.is_jsonl, source=self.path,
+                                         fieldnames=self._fieldnames, first_record=self._records + 1))
+        self._records += len(lessons)
+        # A last line without a newline may still grow, so it is re-read in full next time
+        self._offset = len(data) if data.endswith(b'\n') else 0
+        self._prefix_digest = hashlib.sha256(data[:self._offset]).digest() if self._offset else None
+        return lessons, reset
+
+
+def _draft_number(student, client):
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', f"{student} {client}").strip('-')
+    return f"DRAFT-{slug}"
+
+
+class DraftWatcher:
+    """
+    Keeps draft invoices in step with a lesson log
+
+    Holds every lesson in memory, grouped per student and client, together
+    with a digest of the spec each draft was last rendered from, so an edit
+    renders only the drafts it changes.
+    """
+
+    def __init__(self, lessons_path, generator=None, rate_per_lesson=350.0, per_lesson=False,
+                 drafts_dir=os.path.join('invoices', 'drafts'), debounce=0.3, interval=0.1, report=None):
+        """
+        Args:
+            lessons_path (str): Lesson log to watch
+            generator (InvoiceGenerator, optional): Renders the drafts
+                (defaults to one in template mode that keeps no ledger)
+            rate_per_lesson (float): Rate for lessons without their own 'rate'
+            per_lesson (bool): List every lesson, as run --per-lesson does
+            drafts_dir (str): Directory for the draft PDFs
+            debounce (float): Seconds the log must stay unchanged before
+                drafts are rendered
+            interval (float): Seconds between checks of the log
+            report (callable, optional): Called as report(result) for each
+                draft rendered or removed (defaults to printing a line)
+        """
+        self.generator = generator or InvoiceGenerator(template_mode=True, ledger=False)
+        self.rate_per_lesson = rate_per_lesson
+        self.per_lesson = per_lesson
+        self.drafts_dir = drafts_dir
+        self.debounce = debounce
+        self.interval = interval
+        self.report = report or _print_result
+        self._tail = LessonLogTail(lessons_path)
+        self._default_client = self.generator.default_client_info['name']
+        self._lessons = {}
+        self._drafts = {}
+
+    def _key(self, lesson):
+        client = lesson['client']
+        return lesson['student'], '' if client == self._default_client else client
+
+    def refresh(self):
+        """
+        Read the log and render the drafts whose invoices changed
+
+        Returns:
+            list: A result per draft rendered (generate_invoice's, plus
+                'seconds') or removed ({'student_name', 'removed': True})
+        """
+        lessons, reset = self._tail.read()
+        if reset:
+            self._lessons = {}
+        candidates = set()
+        for lesson in lessons:
+            key = self._key(lesson)
+            self._lessons.setdefault(key, []).append(lesson)
+            candidates.add(key)
+
+        results = []
+        for key in sorted(candidates):
+            results.append(self._render(key))
+        # Students no longer in a rewritten log lose their draft
+        for key in sorted(set(self._drafts) - set(self._lessons)):
+            digest, filename = self._drafts.pop(key)
+            if filename and os.path.exists(filename):
+                os.remove(filename)
+            results.append({'student_name': key[0], 'filename': filename, 'removed': True})
+        return [result for result in results if result is not None]
+
+    def _render(self, key):
+        """Render one group's draft unless its spec is unchanged"""
+        spec, = group_lessons(self._lessons[key], rate_per_lesson=self.rate_per_lesson,
+                              default_client_name=self._default_client, per_lesson=self.per_lesson)
+        digest = hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        if self._drafts.get(key, (None,))[0] == digest:
+            return None
+        started = time.perf_counter()
+        # Rendered in memory so previews leave no manifest or ledger entries
+        result = self.generator.generate_invoice_bytes(
+            **spec, invoice_number=_draft_number(*key), invoice_date=datetime.now().strftime('%Y-%m-%d'))
+        safe_student_name = spec['student_name'].replace(" ", "_").replace("/", "_")
+        filename = os.path.join(self.drafts_dir, f"Invoice_{result['invoice_number']}_{safe_student_name}.pdf")
+        os.makedirs(self.drafts_dir, exist_ok=True)
+        # Replace the previous draft in one step, so a viewer never reads half a file
+        with open(filename + '.partial', 'wb') as handle:
+            handle.write(result.pop('pdf'))
+        os.replace(filename + '.partial', filename)
+        result['filename'] = filename
+        self._drafts[key] = (digest, filename)
+        return dict(result, seconds=time.perf_counter() - started)
+
+    def run(self, stop=None):
+        """
+        Render every draft, then keep them up to date until interrupted
+
+        Args:
+            stop (callable, optional): Checked between polls; the watch ends
+                once it returns True
+        """
+        while stop is None or not stop():
+            if self._tail.changed():
+                # Wait for the log to settle so a burst of saves renders once
+                last = self._tail.stat()
+                quiet_since = time.monotonic()
+                while time.monotonic() - quiet_since < self.debounce:
+                    time.sleep(self.interval)
+                    current = self._tail.stat()
+                    if current != last:
+                        last, quiet_since = current, time.monotonic()
+                try:
+                    results = self.refresh()
+                except ValueError as exc:
+                    # A half-typed line; wait for the next save
+                    print(exc, file=sys.stderr)
+                    continue
+                for result in results:
+                    self.report(result)
+            time.sleep(self.interval)
+
+
+def _print_result(result):
+    stamp = datetime.now().strftime('%H:%M:%S')
+    if result.get('removed'):
+        print(f"[{stamp}] {result['student_name']}: draft removed")
+    else:
+        print(f"[{stamp}] {result['student_name']}: R{result['total_amount']:,.2f} -> {result['filename']} "
+              f"({result['seconds'] * 1000:.0f} ms)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-render draft invoices as a lesson log changes')
+    parser.add_argument('lessons', help='lesson log (.csv, or .jsonl with one lesson per line)')
+    parser.add_argument('--rate', type=float, default=350.0,
+                        help='rate per hour for lessons without a rate column (default: 350)')
+    parser.add_argument('--per-lesson', action='store_true',
+                        help='list every lesson on the invoice instead of one line per course')
+    parser.add_argument('--drafts', default=os.path.join('invoices', 'drafts'),
+                        help='directory for the draft PDFs (default: invoices/drafts)')
+    parser.add_argument('--debounce', type=float, default=0.3,
+                        help='seconds the log must be quiet before rendering (default: 0.3)')
+    parser.add_argument('--interval', type=float, default=0.1,
+                        help='seconds between checks of the log (default: 0.1)')
+    args = parser.parse_args(argv)
+
+    watcher = DraftWatcher(args.lessons, rate_per_lesson=args.rate, per_lesson=args.per_lesson,
+                           drafts_dir=args.drafts, debounce=args.debounce, interval=args.interval)
+    print(f"Watching {args.lessons}; drafts go to {args.drafts} (Ctrl+C to stop)")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
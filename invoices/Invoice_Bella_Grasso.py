@@ -1,9 +1,11 @@
-from fpdf import FPDF
-from datetime import datetime
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from InvoiceMaker import InvoiceGenerator
 
 # Invoice details
-invoice_number = f"INV-{datetime.now().strftime('%Y%m%d-%H%M%S')}_Bella_Grasso"
-invoice_date = datetime.now().strftime('%d/%m/%Y')
 student_name = "Bella Grasso"
 parent_name = "Rosaria Grasso"
 subject = "Discrete Maths (Number Theory and Groups)"
@@ -19,53 +21,18 @@ lessons = [
     ("Sunday (28/09)", 2),
 ]
 
-total_hours = sum(hours for _, hours in lessons)
-total_amount = total_hours * rate_per_hour
-
-class PDF(FPDF):
-    def header(self):
-        self.set_font('Arial', 'B', 16)
-        self.cell(0, 10, 'Invoice', ln=True, align='C')
-        self.ln(10)
-
-    def footer(self):
-        self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
-
-pdf = PDF()
-pdf.add_page()
-
-# Invoice header
-pdf.set_font('Arial', '', 12)
-pdf.cell(0, 10, f"Invoice Number: {invoice_number}", ln=True)
-pdf.cell(0, 10, f"Invoice Date: {invoice_date}", ln=True)
-pdf.cell(0, 10, f"Invoiced To: {parent_name}", ln=True)
-pdf.cell(0, 10, f"Student: {student_name}", ln=True)
-pdf.cell(0, 10, f"Subject: {subject}", ln=True)
-pdf.ln(10)
-
-# Lessons table header
-pdf.set_font('Arial', 'B', 12)
-pdf.cell(60, 10, 'Date', 1)
-pdf.cell(40, 10, 'Hours', 1)
-pdf.cell(40, 10, 'Rate (R)', 1)
-pdf.cell(40, 10, 'Amount (R)', 1, ln=True)
-
-pdf.set_font('Arial', '', 12)
-for date, hours in lessons:
-    amount = hours * rate_per_hour
-    pdf.cell(60, 10, date, 1)
-    pdf.cell(40, 10, str(hours), 1)
-    pdf.cell(40, 10, f"{rate_per_hour}", 1)
-    pdf.cell(40, 10, f"{amount}", 1, ln=True)
-
-# Total
-pdf.set_font('Arial', 'B', 12)
-pdf.cell(140, 10, 'Total', 1)
-pdf.cell(40, 10, f"{total_amount}", 1, ln=True)
-
-# Save PDF
-output_path = f"invoices/Invoice_{invoice_number}.pdf"
-pdf.output(output_path)
-print(f"Invoice generated: {output_path}")
+# Same sections as every other invoice, drawn with the FPDF backend
+generator = InvoiceGenerator(backend='fpdf')
+result = generator.generate_invoice(
+    student_name=student_name,
+    courses=None,
+    lessons_per_course=None,
+    rate_per_lesson=rate_per_hour,
+    lesson_items=[{'date': date, 'course': subject, 'hours': hours} for date, hours in lessons],
+    client_info={'name': parent_name, 'postal_code': '7441'},
+    use_tti_default=False,
+    output_dir=os.path.dirname(os.path.abspath(__file__))
+)
+
+print(f"Invoice generated: {result['filename']}")
+print(f"Total Amount: R{result['total_amount']:,.2f}")
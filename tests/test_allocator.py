@@ -0,0 +1,39 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from InvoiceMaker import InvoiceNumberAllocator
+
+
+def _take_numbers(directory, count, block_size):
+    allocator = InvoiceNumberAllocator(directory, block_size)
+    return [allocator.next_number() for _ in range(count)]
+
+
+def test_numbers_follow_on_across_allocators(tmp_path):
+    assert _take_numbers(str(tmp_path), 3, 1) == [1, 2, 3]
+    assert _take_numbers(str(tmp_path), 2, 1) == [4, 5]
+
+
+def test_reserve_returns_consecutive_numbers(tmp_path):
+    allocator = InvoiceNumberAllocator(str(tmp_path))
+    assert list(allocator.reserve(3)) == [1, 2, 3]
+    assert list(allocator.reserve(0)) == []
+    assert allocator.next_number() == 4
+
+
+def test_unused_block_numbers_are_skipped(tmp_path):
+    assert _take_numbers(str(tmp_path), 2, 5) == [1, 2]
+    assert _take_numbers(str(tmp_path), 1, 5) == [6]
+
+
+def test_threads_never_share_a_number(tmp_path):
+    allocator = InvoiceNumberAllocator(str(tmp_path), block_size=3)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        numbers = list(executor.map(lambda _: allocator.next_number(), range(400)))
+    assert len(set(numbers)) == len(numbers)
+
+
+def test_processes_never_share_a_number(tmp_path):
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        batches = list(executor.map(_take_numbers, [str(tmp_path)] * 8, [50] * 8, [1, 4] * 4))
+    numbers = [number for batch in batches for number in batch]
+    assert len(set(numbers)) == len(numbers) == 400
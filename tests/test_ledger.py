@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from invoice_ledger import InvoiceLedger, MANIFEST_FILENAME
+
+
+def make_result(number, invoice_date, student='Bella Grasso', client='TTI Bursary Management', hours=2,
+                total=700.0, lesson_items=None):
+    return {
+        'invoice_number': number,
+        'invoice_date': invoice_date,
+        'student_name': student,
+        'bill_to': {'name': client},
+        'courses': ['Mathematics'],
+        'lessons_per_course': [hours],
+        'line_amounts': [total],
+        'total_amount': total,
+        'lesson_items': lesson_items,
+        'filename': None,
+    }
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = InvoiceLedger(str(tmp_path))
+    yield ledger
+    ledger.close()
+
+
+def test_recording_a_number_again_replaces_it(ledger):
+    ledger.record(make_result('INV-1', '2024-09-30'))
+    ledger.record(make_result('INV-1', '2024-09-30', total=350.0))
+    assert len(ledger) == 1
+    assert ledger.get('INV-1')['total_amount'] == 350.0
+    assert ledger.get('INV-2') is None
+
+
+def test_find_filters_by_month_and_student(ledger):
+    ledger.record_many([
+        make_result('INV-1', '2024-09-01'),
+        make_result('INV-2', '2024-09-30', student='Mtuma Moagi'),
+        make_result('INV-3', '2024-10-01'),
+    ])
+    assert [row['invoice_number'] for row in ledger.find(month='2024-09')] == ['INV-1', 'INV-2']
+    assert [row['invoice_number'] for row in ledger.find(student='Bella Grasso')] == ['INV-1', 'INV-3']
+    assert [row['invoice_number'] for row in ledger.find(month='2024-12')] == []
+
+
+def test_month_totals_sum_in_cents(ledger):
+    ledger.record_many([
+        make_result('INV-1', '2024-11-03', total=0.1),
+        make_result('INV-2', '2024-11-20', total=0.2),
+        make_result('INV-3', '2024-12-01', total=350.0),
+        make_result('INV-4', '2025-01-01', total=1.0),
+    ])
+    assert ledger.month_totals(year=2024) == [
+        {'month': '2024-11', 'invoices': 2, 'total_amount': 0.3},
+        {'month': '2024-12', 'invoices': 1, 'total_amount': 350.0},
+    ]
+
+
+def test_duplicates_group_the_same_work(ledger):
+    ledger.record_many([
+        make_result('INV-1', '2024-09-30'),
+        make_result('INV-2', '2024-09-30'),
+        # The same lines a month later are the next month's bill, not a duplicate
+        make_result('INV-3', '2024-10-31'),
+        make_result('INV-4', '2024-09-30', student='Mtuma Moagi'),
+    ])
+    groups = ledger.duplicates()
+    assert [[row['invoice_number'] for row in group] for group in groups] == [['INV-1', 'INV-2']]
+    assert [row['invoice_number'] for row in ledger.duplicates_of(make_result('INV-2', '2024-09-30'))] == ['INV-1']
+
+
+def test_per_lesson_duplicates_ignore_the_invoice_date(ledger):
+    lessons = [{'date': '2024-09-02', 'course': 'Mathematics', 'hours': 2, 'rate': 350.0}]
+    ledger.record_many([
+        make_result('INV-1', '2024-09-30', lesson_items=lessons),
+        make_result('INV-2', '2024-10-31', lesson_items=lessons),
+    ])
+    assert [[row['invoice_number'] for row in group] for group in ledger.duplicates()] == [['INV-1', 'INV-2']]
+
+
+def test_import_manifest_skips_entries_missing_fields(ledger, tmp_path):
+    old = {'invoice_number': 'INV-0', 'invoice_date': '2024-01-31', 'student_name': 'Bella Grasso'}
+    with open(tmp_path / MANIFEST_FILENAME, 'w', encoding='utf-8') as handle:
+        for key, result in (('a', old), ('b', make_result('INV-1', '2024-09-30'))):
+            handle.write(json.dumps({'key': key, 'result': result}) + '\n')
+    assert ledger.import_manifest() == (1, 1)
+    assert [row['invoice_number'] for row in ledger.find()] == ['INV-1']
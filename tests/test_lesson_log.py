@@ -0,0 +1,49 @@
+import pytest
+
+from InvoiceMaker import group_lessons, main, parse_lesson_rows
+
+
+CSV_HEADER = 'student,date,course,hours,client,rate\n'
+
+
+def parse(text, is_jsonl=False):
+    return list(parse_lesson_rows(text.splitlines(keepends=True), is_jsonl, source='lessons.csv'))
+
+
+def test_parses_csv_and_jsonl_alike():
+    csv_lessons = parse(CSV_HEADER + 'Bella Grasso,2024-09-02,Maths,1.5,,400\n')
+    jsonl_lessons = parse('{"student": "Bella Grasso", "date": "2024-09-02", "course": "Maths", '
+                          '"hours": 1.5, "rate": "400"}\n', is_jsonl=True)
+    assert csv_lessons == jsonl_lessons == [{'student': 'Bella Grasso', 'date': '2024-09-02', 'course': 'Maths',
+                                             'hours': 1.5, 'client': '', 'rate': 400.0}]
+
+
+@pytest.mark.parametrize('row', [
+    'Bella Grasso,2024-09-02,Maths,two,,',
+    'Bella Grasso,2024-09-02,Maths,2,,abc',
+])
+def test_bad_records_are_reported_by_number(row):
+    with pytest.raises(ValueError, match=r'lessons\.csv: bad lesson record 2'):
+        parse(CSV_HEADER + 'Bella Grasso,2024-09-01,Maths,1,,\n' + row + '\n')
+
+
+def test_missing_column_is_reported_by_number():
+    with pytest.raises(ValueError, match='bad lesson record 1'):
+        parse('student,date,hours\nBella Grasso,2024-09-02,2\n')
+
+
+def test_run_reports_a_bad_log_without_a_traceback(tmp_path, capsys):
+    log = tmp_path / 'lessons.csv'
+    log.write_text(CSV_HEADER + 'Bella Grasso,2024-09-02,Maths,2,,abc\n')
+    assert main(['run', str(log), '--output-dir', str(tmp_path / 'invoices')]) == 1
+    assert 'bad lesson record 1' in capsys.readouterr().err
+
+
+def test_lessons_group_per_student_client_and_rate():
+    lessons = parse(CSV_HEADER + 'A,2024-09-02,Maths,1,,\nA,2024-09-03,Maths,0.5,,\n'
+                    'A,2024-09-04,Maths,1,,400\nA,2024-09-05,Maths,1,Acme,\n')
+    specs = group_lessons(lessons, rate_per_lesson=350)
+    assert [(spec['courses'], spec['lessons_per_course'], spec['rate_per_lesson']) for spec in specs] == [
+        (['Maths', 'Maths'], [1.5, 1], [350, 400.0]),
+        (['Maths'], [1], 350),
+    ]
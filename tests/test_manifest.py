@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+from InvoiceMaker import InvoiceGenerator
+
+
+SPEC = {
+    'student_name': 'Bella Grasso',
+    'courses': ['Mathematics'],
+    'lessons_per_course': [2],
+    'rate_per_lesson': 350,
+    'invoice_date': '2024-09-30',
+}
+
+
+@pytest.fixture
+def generator():
+    return InvoiceGenerator(template_mode=True, ledger=False)
+
+
+def test_unchanged_invoice_is_not_rendered_again(generator, tmp_path):
+    first = generator.generate_invoice(**SPEC, output_dir=str(tmp_path), skip_unchanged=True)
+    # The same amounts spelt differently, as from a CSV rather than the API
+    again = generator.generate_invoice(**dict(SPEC, lessons_per_course=['2.0'], rate_per_lesson=350.0),
+                                       output_dir=str(tmp_path), skip_unchanged=True)
+    assert again['unchanged'] is True
+    assert again['invoice_number'] == first['invoice_number']
+
+
+def test_changed_inputs_or_a_missing_pdf_render_again(generator, tmp_path):
+    first = generator.generate_invoice(**SPEC, output_dir=str(tmp_path), skip_unchanged=True)
+    changed = generator.generate_invoice(**dict(SPEC, lessons_per_course=[3]), output_dir=str(tmp_path),
+                                         skip_unchanged=True)
+    assert not changed.get('unchanged')
+    assert changed['invoice_number'] != first['invoice_number']
+
+    os.remove(first['filename'])
+    redone = generator.generate_invoice(**SPEC, output_dir=str(tmp_path), skip_unchanged=True)
+    assert not redone.get('unchanged')
+
+
+def test_without_skip_unchanged_every_run_renders(generator, tmp_path):
+    first = generator.generate_invoice(**SPEC, output_dir=str(tmp_path))
+    again = generator.generate_invoice(**SPEC, output_dir=str(tmp_path))
+    assert not again.get('unchanged')
+    assert again['invoice_number'] != first['invoice_number']
+
+
+def test_batches_answer_unchanged_specs_without_a_worker(generator, tmp_path):
+    specs = [dict(SPEC, student_name=name, output_dir=str(tmp_path), skip_unchanged=True)
+             for name in ('Bella Grasso', 'Mtuma Moagi')]
+    first = generator.generate_invoices(specs, workers=1)
+    again = generator.generate_invoices(specs, workers=1)
+    assert all(result.get('unchanged') for result in again)
+    assert [result['invoice_number'] for result in again] == [result['invoice_number'] for result in first]
+
+
+def test_statement_book_rerun_bills_nothing_new(generator, tmp_path):
+    batch = [dict(SPEC, student_name=name) for name in ('Bella Grasso', 'Mtuma Moagi')]
+    first = generator.generate_statement_book(batch, output_dir=str(tmp_path), statement_date='2024-09-30',
+                                              skip_unchanged=True)
+    again = generator.generate_statement_book(batch, output_dir=str(tmp_path), statement_date='2024-09-30',
+                                              skip_unchanged=True)
+    assert again['unchanged'] is True
+    assert ([invoice['invoice_number'] for invoice in again['invoices']]
+            == [invoice['invoice_number'] for invoice in first['invoices']])
@@ -0,0 +1,39 @@
+from decimal import Decimal
+
+import pytest
+
+from InvoiceMaker import compute_invoice_amounts
+
+
+def test_lines_round_half_up_to_the_cent():
+    # 2.675 is just below 2.675 as a binary float; the shortest repr is used
+    amounts = compute_invoice_amounts([1, 0.5], [2.675, 0.01])
+    assert amounts['line_amounts'] == [Decimal('2.68'), Decimal('0.01')]
+
+
+def test_subtotal_is_the_sum_of_rounded_lines():
+    amounts = compute_invoice_amounts([1 / 3] * 3, 100)
+    assert amounts['line_amounts'] == [Decimal('33.33')] * 3
+    assert amounts['subtotal'] == Decimal('99.99')
+    assert amounts['total_amount'] == Decimal('99.99')
+
+
+def test_fractional_hours_pick_up_no_float_noise():
+    amounts = compute_invoice_amounts([0.1, 0.2], 350)
+    assert amounts['subtotal'] == Decimal('105.00')
+
+
+def test_vat_is_rounded_once_on_the_subtotal():
+    amounts = compute_invoice_amounts([1], 100.03, vat_rate=0.15)
+    assert amounts['vat_amount'] == Decimal('15.00')
+    assert amounts['total_amount'] == Decimal('115.03')
+
+
+def test_rate_per_line():
+    amounts = compute_invoice_amounts([2, 3], [350, 400.5])
+    assert amounts['line_amounts'] == [Decimal('700.00'), Decimal('1201.50')]
+
+
+def test_rate_count_must_match_lines():
+    with pytest.raises(ValueError):
+        compute_invoice_amounts([1, 2], [350])
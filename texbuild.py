@@ -0,0 +1,462 @@
+"""
+Parallel, incremental LaTeX build driver for Yolymatics Tutorials
+Builds every slide deck and worksheet across all cores, skipping documents
+whose source and inputs are unchanged since their last build
+
+Requirements:
+- A TeX distribution with pdflatex (TeX Live, MiKTeX or MacTeX)
+
+Usage:
+    python texbuild.py                        # everything under slides/ and worksheets/
+    python texbuild.py slides/chi-squared     # only documents under these paths
+    python texbuild.py M344_Final_Exam_Study_Guide.tex --force --jobs 4
+
+Each document is compiled in its own directory under .texbuild/ (so the
+aux, log, nav, ... files stay out of the source tree) and the finished PDF
+is copied next to its .tex source. pdflatex is re-run only while the files
+it feeds back to itself (aux, toc, nav, out, snm, ...) still change between
+passes, so a rebuild whose cross-references are stable takes one pass.
+
+Finished builds are also stored in a content-addressed cache outside the
+source tree ($TEXBUILD_CACHE, default ~/.cache/yolymatics-texbuild), keyed
+by the hash of the source, its \\input/\\includegraphics files and the TeX
+engine version. A fresh checkout restores every unchanged PDF from the
+cache instead of running pdflatex.
+
+TikZ pictures in worksheets and other non-beamer documents are externalized
+(see texfigures.py): each is compiled once, in parallel with the others,
+into a PDF named by its source hash, which every pass and later build then
+includes instead of redrawing it. --no-externalize compiles them inline.
+
+The package-loading head of each preamble is dumped once into a pdflatex
+format (see texformat.py), shared by every document with the same head and
+kept in the build cache, so passes skip loading beamer, TikZ and friends.
+--no-precompile loads the whole preamble on every pass.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from functools import lru_cache
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from texdeps import DependencyIndex
+from texfigures import externalize
+from texformat import FORMAT_DIR, ensure_format, format_env, write_source
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Where documents are looked for when no paths are given
+SOURCE_DIRS = ('slides', 'worksheets')
+
+BUILD_DIR = os.path.join(ROOT, '.texbuild')
+STATE_FILENAME = 'state.json'
+
+PDFLATEX = os.environ.get('PDFLATEX', 'pdflatex')
+MAX_PASSES = 5
+
+# Content-addressed store of finished builds, shared by every checkout
+CACHE_DIR = os.environ.get('TEXBUILD_CACHE') or os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'yolymatics-texbuild')
+
+# Files pdflatex writes on one pass and reads back on the next
+FEEDBACK_EXTENSIONS = ('.aux', '.toc', '.nav', '.out', '.snm', '.vrb', '.lof', '.lot')
+
+
+
+def is_document(path):
+    """A .tex file is a document (not a fragment) if it has a \\documentclass"""
+    with open(path, encoding='utf-8', errors='replace') as handle:
+        for line in handle:
+            line = line.split('%', 1)[0]
+            if '\\documentclass' in line:
+                return True
+            if '\\begin{document}' in line:
+                return False
+    return False
+
+
+def find_documents(paths=None):
+    """
+    Find the LaTeX documents to build
+
+    Args:
+        paths (list, optional): .tex files or directories to search
+            (defaults to SOURCE_DIRS under the repository root)
+
+    Returns:
+        list: Absolute paths of the documents, sorted
+    """
+    documents = set()
+    for path in paths or [os.path.join(ROOT, name) for name in SOURCE_DIRS]:
+        path = os.path.abspath(path)
+        if os.path.isfile(path):
+            documents.add(path)
+            continue
+        for directory, subdirs, files in os.walk(path):
+            subdirs[:] = [name for name in subdirs if not name.startswith('.')]
+            for name in files:
+                candidate = os.path.join(directory, name)
+                if name.endswith('.tex') and is_document(candidate):
+                    documents.add(candidate)
+    return sorted(documents)
+
+
+@lru_cache(maxsize=None)
+def engine_version():
+    """First line of 'pdflatex --version', or the command name if it cannot run"""
+    try:
+        completed = subprocess.run([PDFLATEX, '--version'], stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, text=True)
+    except OSError:
+        return PDFLATEX
+    lines = completed.stdout.splitlines()
+    return lines[0].strip() if lines else PDFLATEX
+
+
+def document_digest(document, inputs):
+    """Hash a document's source, its inputs and the TeX engine that builds it"""
+    digest = hashlib.sha256(engine_version().encode('utf-8') + b'\0')
+    for path in [document] + list(inputs):
+        digest.update(os.path.relpath(path, ROOT).encode('utf-8') + b'\0')
+        with open(path, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(1 << 16), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _build_dir(document):
+    """Per-document build directory, mirroring the source layout"""
+    relative = os.path.splitext(os.path.relpath(document, ROOT))[0]
+    return os.path.join(BUILD_DIR, relative.replace('..', '_'))
+
+
+def _snapshot(build_dir, stem):
+    """Hash the files pdflatex feeds back to itself between passes"""
+    snapshot = {}
+    for extension in FEEDBACK_EXTENSIONS:
+        path = os.path.join(build_dir, stem + extension)
+        if os.path.exists(path):
+            with open(path, 'rb') as handle:
+                snapshot[extension] = hashlib.sha256(handle.read()).hexdigest()
+    return snapshot
+
+
+def _log_tail(build_dir, stem, lines=20):
+    path = os.path.join(build_dir, stem + '.log')
+    if not os.path.exists(path):
+        return ''
+    with open(path, encoding='utf-8', errors='replace') as handle:
+        return ''.join(handle.readlines()[-lines:])
+
+
+def _pdflatex_env(document, formats_dir=None):
+    env = dict(os.environ)
+    # Run in the build directory but find inputs next to the source
+    env['TEXINPUTS'] = os.path.dirname(document) + os.pathsep + env.get('TEXINPUTS', '')
+    return format_env(env, formats_dir) if formats_dir else env
+
+
+def _formats_dir(cache_dir):
+    """Formats are shared through the build cache, or kept in .texbuild without one"""
+    return os.path.join(cache_dir or BUILD_DIR, FORMAT_DIR)
+
+
+def run_pdflatex(document, build_dir, source=None, fmt=None, formats_dir=None, slots=None):
+    """
+    Compile a document until its cross-reference files stop changing
+
+    Args:
+        document (str): Absolute path of the .tex source
+        build_dir (str): Directory to compile in
+        source (str, optional): File to compile instead of the document
+            itself, such as its externalized copy in build_dir
+        fmt (str, optional): Precompiled preamble format to start from;
+            source must then be marked for it (see texformat.py)
+        formats_dir (str, optional): Directory holding fmt
+        slots (threading.Semaphore, optional): Held during each pass
+
+    Returns:
+        tuple: (passes run, True if the last pass succeeded)
+    """
+    stem = os.path.splitext(os.path.basename(document))[0]
+    env = _pdflatex_env(document, formats_dir if fmt else None)
+    command = [PDFLATEX] + ([f'-fmt={fmt}'] if fmt else []) + [
+        '-interaction=nonstopmode', '-halt-on-error', '-file-line-error', f'-jobname={stem}',
+        source or document]
+
+    for passes in range(1, MAX_PASSES + 1):
+        before = _snapshot(build_dir, stem)
+        with slots or nullcontext():
+            completed = subprocess.run(command, cwd=build_dir, env=env,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if completed.returncode != 0:
+            return passes, False
+        if _snapshot(build_dir, stem) == before:
+            break
+    return passes, True
+
+
+def _cache_entry(digest, cache_dir):
+    return os.path.join(cache_dir, digest[:2], digest)
+
+
+def restore_cached(digest, document, build_dir, cache_dir=CACHE_DIR):
+    """
+    Restore a cached build of a document, if there is one
+
+    The PDF is published next to the source and the cross-reference files
+    go to the build directory, so a later edit still starts from them.
+
+    Returns:
+        bool: True on a cache hit
+    """
+    entry = _cache_entry(digest, cache_dir)
+    stem = os.path.splitext(os.path.basename(document))[0]
+    cached_pdf = os.path.join(entry, stem + '.pdf')
+    if not os.path.exists(cached_pdf):
+        return False
+    os.makedirs(build_dir, exist_ok=True)
+    for name in os.listdir(entry):
+        if name != stem + '.pdf':
+            shutil.copyfile(os.path.join(entry, name), os.path.join(build_dir, name))
+    _publish(cached_pdf, os.path.join(os.path.dirname(document), stem + '.pdf'))
+    return True
+
+
+def store_cached(digest, document, build_dir, cache_dir=CACHE_DIR):
+    """Copy a finished build into the cache under its content digest"""
+    entry = _cache_entry(digest, cache_dir)
+    if os.path.exists(entry):
+        return
+    stem = os.path.splitext(os.path.basename(document))[0]
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    # Fill a private directory and rename it into place, so concurrent
+    # builds and interrupted copies never leave a partial entry
+    staging = tempfile.mkdtemp(prefix='.partial-', dir=os.path.dirname(entry))
+    try:
+        for extension in ('.pdf',) + FEEDBACK_EXTENSIONS:
+            path = os.path.join(build_dir, stem + extension)
+            if os.path.exists(path):
+                shutil.copyfile(path, os.path.join(staging, stem + extension))
+        os.rename(staging, entry)
+    except OSError:
+        # Another build stored the same digest first
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _publish(source, pdf):
+    """Replace the published PDF in one step so readers never see half a file"""
+    partial = pdf + '.partial'
+    shutil.copyfile(source, partial)
+    os.replace(partial, pdf)
+
+
+def build_document(document, inputs, state, force=False, cache_dir=CACHE_DIR, figures=True, jobs=None,
+                   precompile=True, slots=None):
+    """
+    Build one document unless it is up to date
+
+    Args:
+        document (str): Absolute path of the .tex source
+        inputs (list): Files it depends on (see texdeps.DependencyIndex)
+        state (dict): Digests of the last successful builds, keyed by
+            document path relative to the repository root
+        force (bool): Build even if nothing changed (bypasses the cache)
+        cache_dir (str, optional): Content-addressed build cache, or None
+            to build without one
+        figures (bool): Externalize TikZ pictures (see texfigures.py)
+        jobs (int, optional): Figures compiled at once
+        precompile (bool): Start every pass from a precompiled format of the
+            preamble's head (see texformat.py)
+        slots (threading.Semaphore, optional): Held by every pdflatex run
+            (passes, figures and format dumps), so documents built side by
+            side share one limit on pdflatex processes
+
+    Returns:
+        dict: 'document', 'status' ('unchanged', 'cached', 'built' or 'failed'),
+            'passes', 'seconds', 'digest', 'figures', 'figures_compiled',
+            'precompiled' (True if the passes used a format) and, on
+            failure, 'log'
+    """
+    started = time.perf_counter()
+    key = os.path.relpath(document, ROOT)
+    stem = os.path.splitext(os.path.basename(document))[0]
+    pdf = os.path.join(os.path.dirname(document), stem + '.pdf')
+    digest = document_digest(document, inputs)
+    result = {'document': key, 'digest': digest, 'passes': 0, 'figures': 0, 'figures_compiled': 0,
+              'precompiled': False}
+
+    if not force and state.get(key) == digest and os.path.exists(pdf):
+        result.update(status='unchanged', seconds=time.perf_counter() - started)
+        return result
+
+    build_dir = _build_dir(document)
+    if not force and cache_dir and restore_cached(digest, document, build_dir, cache_dir):
+        result.update(status='cached', seconds=time.perf_counter() - started)
+        return result
+
+    os.makedirs(build_dir, exist_ok=True)
+    formats_dir = _formats_dir(cache_dir)
+    fmt = None
+    if precompile:
+        fmt = ensure_format(document, formats_dir, PDFLATEX, _pdflatex_env(document), salt=engine_version(),
+                            slots=slots)
+    source = None
+    if figures:
+        externalized = externalize(document, build_dir, PDFLATEX,
+                                   _pdflatex_env(document, formats_dir if fmt else None),
+                                   salt=engine_version(), jobs=jobs,
+                                   cache_dir=os.path.join(cache_dir, 'figures') if cache_dir else None,
+                                   fmt=fmt, slots=slots)
+        if externalized is not None:
+            source = externalized['source']
+            result.update(figures=externalized['figures'], figures_compiled=externalized['compiled'])
+    if fmt and source is None:
+        source = write_source(document, build_dir)
+    passes, ok = run_pdflatex(document, build_dir, source, fmt, formats_dir, slots)
+    if not ok and fmt:
+        # A preamble that misbehaves once dumped still builds the usual way;
+        # the marked source is valid LaTeX without the format too
+        retried, ok = run_pdflatex(document, build_dir, source, slots=slots)
+        passes += retried
+        fmt = None
+    result.update(passes=passes, precompiled=fmt is not None)
+    if ok:
+        _publish(os.path.join(build_dir, stem + '.pdf'), pdf)
+        if cache_dir:
+            store_cached(digest, document, build_dir, cache_dir)
+        result['status'] = 'built'
+    else:
+        result.update(status='failed', log=_log_tail(build_dir, stem))
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def load_state():
+    path = os.path.join(BUILD_DIR, STATE_FILENAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
+
+
+def save_state(state):
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    path = os.path.join(BUILD_DIR, STATE_FILENAME)
+    with open(path + '.partial', 'w', encoding='utf-8') as handle:
+        json.dump(state, handle, indent=1, sort_keys=True)
+    os.replace(path + '.partial', path)
+
+
+def build_all(documents, jobs=None, force=False, progress=None, cache_dir=CACHE_DIR, figures=True,
+              precompile=True):
+    """
+    Build documents in parallel, one pdflatex per core
+
+    Args:
+        documents (list): Absolute .tex paths (see find_documents)
+        jobs (int, optional): pdflatex processes run at once, across all
+            documents, figures and format dumps (defaults to the CPU count)
+        force (bool): Rebuild even unchanged documents
+        progress (callable, optional): Called as progress(result) as each
+            document finishes
+        cache_dir (str, optional): Content-addressed build cache, or None
+        figures (bool): Externalize TikZ pictures, compiling a document's
+            figures in parallel
+        precompile (bool): Use precompiled preamble formats
+
+    Returns:
+        list: build_document results, in completion order
+    """
+    state = load_state()
+    index = DependencyIndex()
+    inputs = {document: index.dependencies(document) for document in documents}
+    index.save()
+
+    jobs = jobs or os.cpu_count() or 1
+    # Documents, and the figures within them, run side by side; every
+    # pdflatex takes a slot, so at most jobs of them run at once in total
+    slots = threading.Semaphore(jobs)
+    lock = threading.Lock()
+    results = []
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(build_document, document, inputs[document], state, force, cache_dir,
+                                   figures, jobs, precompile, slots)
+                   for document in documents]
+        for future in as_completed(futures):
+            result = future.result()
+            with lock:
+                if result['status'] in ('built', 'cached'):
+                    state[result['document']] = result['digest']
+                elif result['status'] == 'failed':
+                    state.pop(result['document'], None)
+                results.append(result)
+            if progress is not None:
+                progress(result)
+    save_state(state)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build the slides and worksheets in parallel')
+    parser.add_argument('paths', nargs='*',
+                        help='.tex files or directories (default: slides/ and worksheets/)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='pdflatex processes to run at once (default: one per CPU)')
+    parser.add_argument('--force', action='store_true', help='rebuild even unchanged documents')
+    parser.add_argument('--changed', nargs='+', metavar='FILE',
+                        help='only build the documents that depend on these files')
+    parser.add_argument('--cache-dir', default=CACHE_DIR,
+                        help=f'content-addressed build cache (default: {CACHE_DIR})')
+    parser.add_argument('--no-cache', action='store_true', help='neither use nor fill the build cache')
+    parser.add_argument('--no-externalize', action='store_true',
+                        help='draw TikZ pictures on every pass instead of compiling them once')
+    parser.add_argument('--no-precompile', action='store_true',
+                        help='load the whole preamble on every pass instead of a precompiled format')
+    args = parser.parse_args(argv)
+
+    if shutil.which(PDFLATEX) is None:
+        print(f"{PDFLATEX} not found; install a TeX distribution or set PDFLATEX", file=sys.stderr)
+        return 2
+
+    def report(result):
+        passes = f", {result['passes']} pass(es)" if result['passes'] else ''
+        if result['figures']:
+            passes += f", {result['figures_compiled']}/{result['figures']} figure(s) compiled"
+        if result['precompiled']:
+            passes += ', precompiled preamble'
+        print(f"{result['status']:>9}  {result['document']}  ({result['seconds']:.1f} s{passes})")
+        if result['status'] == 'failed':
+            print(result['log'], file=sys.stderr)
+
+    started = time.perf_counter()
+    documents = find_documents(args.paths)
+    if args.changed:
+        index = DependencyIndex()
+        documents = index.affected(args.changed, documents)
+        index.save()
+    results = build_all(documents, jobs=args.jobs, force=args.force, progress=report,
+                        cache_dir=None if args.no_cache else args.cache_dir,
+                        figures=not args.no_externalize, precompile=not args.no_precompile)
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    print(f"{counts.get('built', 0)} built, {counts.get('cached', 0)} from cache, "
+          f"{counts.get('unchanged', 0)} unchanged, "
+          f"{counts.get('failed', 0)} failed in {time.perf_counter() - started:.1f} s")
+    return 1 if counts.get('failed') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
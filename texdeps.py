@@ -0,0 +1,238 @@
+"""
+Dependency scanner for LaTeX sources
+Finds the files each document reads (\\input, \\include, \\includegraphics,
+bibliographies and local classes/packages) and keeps them in a persisted
+index, so tools can tell which documents a changed file affects
+
+Usage:
+    python texdeps.py                                   # dependencies of every document
+    python texdeps.py worksheets/gcse_distance_speed_time_graphs.tex
+    python texdeps.py --affected Yolymatics_logo_transparent.png
+
+Files are read line by line and only rescanned when their size or
+modification time changes; the index lives in .texbuild/deps.json.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+INDEX_PATH = os.path.join(ROOT, '.texbuild', 'deps.json')
+
+# Bump when the scanner changes what it extracts, to discard old indexes
+INDEX_VERSION = 1
+
+# Extensions tried, in order, for each kind of reference
+EXTENSIONS = {
+    'input': ('.tex', ''),
+    'include': ('.tex',),
+    'graphics': ('', '.pdf', '.png', '.jpg', '.jpeg', '.eps'),
+    'bibliography': ('.bib', ''),
+    'package': ('.sty',),
+    'class': ('.cls',),
+}
+
+_COMMAND_PATTERN = re.compile(
+    r'\\(input|include|includegraphics|bibliography|addbibresource|usepackage|RequirePackage'
+    r'|documentclass|graphicspath)\*?\s*(?:\[[^\]]*\]\s*)*(?:\{([^}]*)\}|(?<=input)\s+([^\s\\{}]+))')
+_GRAPHICSPATH_PATTERN = re.compile(r'\{([^{}]*)\}')
+_KINDS = {
+    'input': 'input',
+    'include': 'include',
+    'includegraphics': 'graphics',
+    'bibliography': 'bibliography',
+    'addbibresource': 'bibliography',
+    'usepackage': 'package',
+    'RequirePackage': 'package',
+    'documentclass': 'class',
+}
+
+
+def _strip_comment(line):
+    """Drop a TeX comment, keeping escaped percent signs"""
+    index = line.find('%')
+    while index != -1:
+        backslashes = len(line[:index]) - len(line[:index].rstrip('\\'))
+        if backslashes % 2 == 0:
+            return line[:index]
+        index = line.find('%', index + 1)
+    return line
+
+
+def scan_file(path):
+    """
+    Stream a .tex file and extract what it references
+
+    Returns:
+        dict: 'refs', a list of [kind, name] pairs in source order, and
+            'graphicspath', the directories given to \\graphicspath
+    """
+    refs = []
+    graphicspath = []
+    with open(path, encoding='utf-8', errors='replace') as handle:
+        for line in handle:
+            if '\\' not in line:
+                continue
+            line = _strip_comment(line)
+            for match in _COMMAND_PATTERN.finditer(line):
+                command, braced, bare = match.groups()
+                if command == 'graphicspath':
+                    # \graphicspath{{a/}{b/}}: the outer group ends at the first '}'
+                    rest = line[match.start(2) - 1:]
+                    graphicspath.extend(_GRAPHICSPATH_PATTERN.findall(rest[1:]))
+                    continue
+                argument = braced if braced is not None else bare
+                for name in argument.split(','):
+                    name = name.strip()
+                    if name:
+                        refs.append([_KINDS[command], name])
+    return {'refs': refs, 'graphicspath': graphicspath}
+
+
+def _resolve(directories, name, kind):
+    for directory in directories:
+        for extension in EXTENSIONS[kind]:
+            candidate = os.path.normpath(os.path.join(directory, name + extension))
+            if os.path.isfile(candidate):
+                return candidate
+    return None
+
+
+class DependencyIndex:
+    """
+    Persisted map from each document to the files it depends on
+
+    Scan results are cached per file, keyed by size and modification time,
+    so refreshing the index after an edit only rereads the edited files.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self._files = {}
+        self._documents = {}
+        self._dirty = False
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as handle:
+                data = json.load(handle)
+            if data.get('version') == INDEX_VERSION:
+                self._files = data['files']
+                self._documents = data['documents']
+
+    def save(self):
+        """Write the index back if anything was rescanned"""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + '.partial', 'w', encoding='utf-8') as handle:
+            json.dump({'version': INDEX_VERSION, 'files': self._files, 'documents': self._documents},
+                      handle, indent=1, sort_keys=True)
+        os.replace(self.path + '.partial', self.path)
+        self._dirty = False
+
+    def _scan(self, path):
+        """Scan results for a file, rescanning only if it changed"""
+        key = os.path.relpath(path, ROOT)
+        stat = os.stat(path)
+        entry = self._files.get(key)
+        if entry is None or entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+            entry = dict(scan_file(path), mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            self._files[key] = entry
+            self._dirty = True
+        return entry
+
+    def dependencies(self, document):
+        """
+        Files a document depends on, following \\input and \\include
+
+        References are resolved against the document's directory (where
+        pdflatex is run) and any \\graphicspath; ones that do not resolve
+        to a local file, such as installed packages, are left out.
+
+        Returns:
+            list: Absolute paths, sorted, excluding the document itself
+        """
+        document = os.path.abspath(document)
+        directory = os.path.dirname(document)
+        graphicspath = []
+        found = set()
+        pending = [document]
+        seen = {document}
+        while pending:
+            entry = self._scan(pending.pop())
+            graphicspath.extend(os.path.join(directory, path) for path in entry['graphicspath'])
+            for kind, name in entry['refs']:
+                directories = [directory] + graphicspath if kind == 'graphics' else [directory]
+                path = _resolve(directories, name, kind)
+                if path is None or path in seen:
+                    continue
+                seen.add(path)
+                found.add(path)
+                if path.endswith('.tex'):
+                    pending.append(path)
+
+        key = os.path.relpath(document, ROOT)
+        relative = sorted(os.path.relpath(path, ROOT) for path in found)
+        if self._documents.get(key) != relative:
+            self._documents[key] = relative
+            self._dirty = True
+        return sorted(found)
+
+    def affected(self, changed, documents=None):
+        """
+        Documents that must be rebuilt after the given files changed
+
+        Args:
+            changed (list): Paths of changed files
+            documents (list, optional): Documents to consider (defaults to
+                every document in the index); their dependencies are
+                refreshed first
+
+        Returns:
+            list: Absolute paths of the affected documents, sorted
+        """
+        if documents is None:
+            candidates = self._documents
+        else:
+            candidates = {}
+            for document in documents:
+                self.dependencies(document)
+                key = os.path.relpath(os.path.abspath(document), ROOT)
+                candidates[key] = self._documents[key]
+        changed = {os.path.relpath(os.path.abspath(path), ROOT) for path in changed}
+        return sorted(
+            os.path.join(ROOT, document) for document, dependencies in candidates.items()
+            if document in changed or changed.intersection(dependencies)
+        )
+
+
+def main(argv=None):
+    # Imported here so the two tools can use each other
+    from texbuild import find_documents
+
+    parser = argparse.ArgumentParser(description='List the files LaTeX documents depend on')
+    parser.add_argument('paths', nargs='*',
+                        help='.tex files or directories (default: slides/ and worksheets/)')
+    parser.add_argument('--affected', nargs='+', metavar='FILE',
+                        help='print the documents that depend on these files instead')
+    args = parser.parse_args(argv)
+
+    index = DependencyIndex()
+    documents = find_documents(args.paths)
+    if args.affected:
+        for document in index.affected(args.affected, documents):
+            print(os.path.relpath(document, ROOT))
+    else:
+        for document in documents:
+            print(os.path.relpath(document, ROOT))
+            for path in index.dependencies(document):
+                print(f"    {os.path.relpath(path, ROOT)}")
+    index.save()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,200 @@
+"""
+TikZ figure externalization for the LaTeX build driver
+Compiles each tikzpicture of a document once into its own PDF, named by a
+hash of the figure and the preamble, and has every later pdflatex pass and
+build include that PDF instead of redrawing the figure
+
+Requirements:
+- A TeX distribution with pdflatex and PGF/TikZ (for the 'external' library)
+
+Usage:
+    Used by texbuild.py; 'python texbuild.py --no-externalize' turns it off.
+
+How it works: texbuild compiles a copy of the document that loads TikZ's
+'external' library in 'graphics if exists' mode and names each picture
+with \\tikzsetnextfilename{fig-<hash>}. Figures whose PDF is missing are
+compiled first, in parallel, with the same per-figure pdflatex command the
+library's own makefile uses; the main passes then include them. Figure PDFs
+are kept in the document's build directory and in the shared build cache,
+so an unchanged figure is never compiled twice, even on a fresh checkout.
+
+Beamer decks are left alone: pictures with overlays (\\only, \\pause, ...)
+differ from slide to slide and cannot be reduced to one PDF.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+
+from texdeps import _strip_comment
+from texformat import mark_dump_end
+
+
+FIGURE_DIR = 'figures'
+
+_BEGIN_FIGURE = re.compile(r'\\begin\s*\{tikzpicture\}')
+_END_FIGURE = re.compile(r'\\end\s*\{tikzpicture\}')
+_BEGIN_DOCUMENT = re.compile(r'\\begin\s*\{document\}')
+_BEAMER = re.compile(r'\\documentclass\s*(?:\[[^\]]*\])?\s*\{beamer\}')
+
+# Loaded just before \begin{document}; pictures without a PDF yet are
+# typeset as usual, so a pass never fails for want of a figure
+EXTERNALIZE_PREAMBLE = (
+    '\\usetikzlibrary{external}%\n'
+    f'\\tikzexternalize[mode=graphics if exists, prefix={FIGURE_DIR}/]%\n'
+)
+
+
+def plan_externalization(document, salt=''):
+    """
+    Find a document's TikZ pictures and write out the externalized source
+
+    Args:
+        document (str): Path of the .tex source
+        salt (str): Extra text folded into every figure hash (the TeX
+            engine version, so a new engine recompiles the figures)
+
+    Returns:
+        tuple: (externalized source text, list of figure names in order),
+            or None for beamer decks and documents without pictures
+    """
+    with open(document, encoding='utf-8', errors='replace') as handle:
+        lines = handle.readlines()
+
+    preamble = []
+    output = []
+    names = []
+    figure = None
+    in_body = False
+    for line in lines:
+        code = _strip_comment(line)
+        if not in_body:
+            if _BEAMER.search(code):
+                return None
+            if _BEGIN_DOCUMENT.search(code):
+                in_body = True
+                output.append(EXTERNALIZE_PREAMBLE)
+            else:
+                preamble.append(line)
+            output.append(line)
+            continue
+
+        if figure is None and _BEGIN_FIGURE.search(code):
+            figure = {'start': len(output), 'lines': [], 'depth': 0}
+        if figure is not None:
+            figure['lines'].append(line)
+            figure['depth'] += len(_BEGIN_FIGURE.findall(code)) - len(_END_FIGURE.findall(code))
+            if figure['depth'] <= 0:
+                # Name the outermost picture after everything that determines it
+                digest = hashlib.sha256(salt.encode('utf-8') + b'\0')
+                digest.update(''.join(preamble).encode('utf-8') + b'\0')
+                digest.update(''.join(figure['lines']).encode('utf-8'))
+                name = f"fig-{digest.hexdigest()[:20]}"
+                names.append(name)
+                output.insert(figure['start'], f'\\tikzsetnextfilename{{{name}}}%\n')
+                figure = None
+        output.append(line)
+
+    if not names:
+        return None
+    return ''.join(output), names
+
+
+def _figure_command(pdflatex, name, stem, source, fmt=None):
+    """The per-figure job the 'external' library's makefile would run"""
+    return [pdflatex] + ([f'-fmt={fmt}'] if fmt else []) + [
+        '-interaction=batchmode', '-halt-on-error', f'-jobname={FIGURE_DIR}/{name}',
+        f'\\def\\tikzexternalrealjob{{{stem}}}\\input{{{source}}}']
+
+
+def externalize(document, build_dir, pdflatex, env, salt='', jobs=None, cache_dir=None, fmt=None,
+                slots=None):
+    """
+    Prepare a document's figures and its externalized source
+
+    Every figure PDF comes from the build directory, else from the cache,
+    else is compiled (figures in parallel, jobs at a time) and cached.
+    Figure PDFs the document no longer uses are removed from the build
+    directory.
+
+    Args:
+        document (str): Absolute path of the .tex source
+        build_dir (str): Directory pdflatex runs in
+        pdflatex (str): The pdflatex command
+        env (dict): Environment for pdflatex (with TEXINPUTS set)
+        salt (str): See plan_externalization
+        jobs (int, optional): Figures compiled at once (defaults to the CPU count)
+        cache_dir (str, optional): Shared figure cache directory
+        fmt (str, optional): Precompiled preamble format (see texformat.py)
+            for the source and the figure jobs; env must find it
+        slots (threading.Semaphore, optional): Held by each figure job while
+            pdflatex runs, so builds running side by side share one limit
+
+    Returns:
+        dict: 'source' (file name of the externalized copy in build_dir),
+            'figures' (count), 'compiled' (figures compiled now) and
+            'failed' (names of figures that did not compile; they are
+            drawn inline instead), or None if there is nothing to externalize
+    """
+    plan = plan_externalization(document, salt)
+    if plan is None:
+        return None
+    text, names = plan
+
+    stem = os.path.splitext(os.path.basename(document))[0]
+    source = f"{stem}-externalized.tex"
+    figure_dir = os.path.join(build_dir, FIGURE_DIR)
+    os.makedirs(figure_dir, exist_ok=True)
+    if fmt:
+        text = mark_dump_end(text, os.path.dirname(document))
+    with open(os.path.join(build_dir, source), 'w', encoding='utf-8') as handle:
+        handle.write(text)
+
+    wanted = set(names)
+    for entry in os.listdir(figure_dir):
+        if os.path.splitext(entry)[0] not in wanted:
+            os.remove(os.path.join(figure_dir, entry))
+
+    missing = []
+    for name in dict.fromkeys(names):
+        pdf = os.path.join(figure_dir, name + '.pdf')
+        cached = os.path.join(cache_dir, name + '.pdf') if cache_dir else None
+        if os.path.exists(pdf):
+            continue
+        if cached and os.path.exists(cached):
+            shutil.copyfile(cached, pdf)
+        else:
+            missing.append(name)
+
+    def compile_figure(name):
+        with slots or nullcontext():
+            completed = subprocess.run(_figure_command(pdflatex, name, stem, source, fmt), cwd=build_dir,
+                                       env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        pdf = os.path.join(figure_dir, name + '.pdf')
+        if completed.returncode != 0 or not os.path.exists(pdf):
+            # Leave no partial PDF behind; the picture is typeset inline instead
+            if os.path.exists(pdf):
+                os.remove(pdf)
+            return name, False
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            partial = os.path.join(cache_dir, f".{name}.{os.getpid()}.partial")
+            shutil.copyfile(pdf, partial)
+            os.replace(partial, os.path.join(cache_dir, name + '.pdf'))
+        return name, True
+
+    failed = []
+    if missing:
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+            failed = [name for name, ok in executor.map(compile_figure, missing) if not ok]
+
+    return {
+        'source': source,
+        'figures': len(names),
+        'compiled': len(missing) - len(failed),
+        'failed': failed
+    }
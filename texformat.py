@@ -0,0 +1,195 @@
+"""
+Precompiled preamble formats for the LaTeX build driver
+Dumps the package-loading head of a document's preamble (beamer and its
+themes, TikZ, tcolorbox, pgfplots, ...) into a pdflatex format file once,
+so every pass starts with those packages already loaded
+
+Requirements:
+- A TeX distribution with pdflatex and the mylatexformat package
+
+Usage:
+    Used by texbuild.py; 'python texbuild.py --no-precompile' turns it off.
+
+How it works: the static head of a preamble is the \\documentclass line and
+the \\usepackage, \\usetikzlibrary, \\usetheme, ... lines that directly
+follow it. texbuild dumps it with mylatexformat into a format named by its
+hash, so documents with the same head share one format and an edited head
+gets a new one; formats live in the shared build cache. Each document is
+compiled from a copy with \\csname endofdump\\endcsname after its head, where
+the format takes over and the rest of the preamble runs as usual.
+
+The head ends early at packages that must be loaded at run time (hyperref
+and its companions) and at packages or classes kept next to the document,
+whose edits the format's hash would not see.
+"""
+
+from contextlib import nullcontext
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from texdeps import _strip_comment
+
+
+FORMAT_DIR = 'formats'
+
+# Where the format's preamble ends; \relax when compiled without a format
+DUMP_END = '\\csname endofdump\\endcsname\n'
+
+# Commands that only load code, so can be run once into a format
+_LOAD_COMMAND = re.compile(
+    r'\\(documentclass|usepackage|RequirePackage|usetikzlibrary|usepgfplotslibrary|tcbuselibrary'
+    r'|use(?:color|font|inner|outer)?theme)\*?\s*(\[[^\[\]{}]*\])?\s*\{([^{}]*)\}$')
+
+# Packages that hook into the output file or the job and must not be dumped
+RUNTIME_PACKAGES = {'hyperref', 'bookmark', 'cleveref', 'hypcap', 'minted', 'glossaries'}
+
+# File each kind of command loads, to recognise local ones
+_LOCAL_FILES = {
+    'documentclass': '{}.cls',
+    'usepackage': '{}.sty',
+    'RequirePackage': '{}.sty',
+    'usetheme': 'beamertheme{}.sty',
+    'usecolortheme': 'beamercolortheme{}.sty',
+    'usefonttheme': 'beamerfonttheme{}.sty',
+    'useinnertheme': 'beamerinnertheme{}.sty',
+    'useoutertheme': 'beameroutertheme{}.sty',
+}
+
+# Formats that could not be dumped in this process, so are not retried
+_failed = set()
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def static_preamble(lines, directory):
+    """
+    Count the lines at the start of a document that a format can hold
+
+    Args:
+        lines (list): The document's lines
+        directory (str): The document's directory, for local packages
+
+    Returns:
+        int: Lines up to and including the last load command of the
+            static head, or 0 if the document does not start with one
+    """
+    end = 0
+    for number, line in enumerate(lines):
+        code = _strip_comment(line).strip()
+        if not code:
+            continue
+        match = _LOAD_COMMAND.match(code)
+        if match is None:
+            break
+        command, _, argument = match.groups()
+        if (command == 'documentclass') != (end == 0):
+            break
+        names = [name.strip() for name in argument.split(',') if name.strip()]
+        pattern = _LOCAL_FILES.get(command)
+        if pattern and any(os.path.exists(os.path.join(directory, pattern.format(name))) for name in names):
+            break
+        if command in ('usepackage', 'RequirePackage') and RUNTIME_PACKAGES.intersection(names):
+            break
+        end = number + 1
+    return end
+
+
+def mark_dump_end(text, directory):
+    """Source text with DUMP_END after its static head (unchanged if it has none)"""
+    lines = text.splitlines(keepends=True)
+    end = static_preamble(lines, directory)
+    if not end:
+        return text
+    if not lines[end - 1].endswith('\n'):
+        lines[end - 1] += '\n'
+    return ''.join(lines[:end] + [DUMP_END] + lines[end:])
+
+
+def format_name(head, salt=''):
+    """Name a format after its head, ignoring comments and blank lines"""
+    code = [_strip_comment(line).strip() for line in head]
+    digest = hashlib.sha256(salt.encode('utf-8') + b'\0')
+    digest.update('\n'.join(line for line in code if line).encode('utf-8'))
+    return f"preamble-{digest.hexdigest()[:20]}"
+
+
+def format_env(env, formats_dir):
+    """env with formats_dir searched for formats first"""
+    env = dict(env)
+    env['TEXFORMATS'] = formats_dir + os.pathsep + env.get('TEXFORMATS', '')
+    return env
+
+
+def ensure_format(document, formats_dir, pdflatex, env, salt='', slots=None):
+    """
+    The format for a document's static head, dumping it if need be
+
+    Args:
+        document (str): Absolute path of the .tex source
+        formats_dir (str): Directory formats are kept in
+        pdflatex (str): The pdflatex command
+        env (dict): Environment for pdflatex (with TEXINPUTS set)
+        salt (str): Extra text folded into the format name (the TeX engine
+            version, since formats only load in the engine that made them)
+        slots (threading.Semaphore, optional): Held while pdflatex runs, to
+            share a limit on pdflatex processes with other builds
+
+    Returns:
+        str: Format name to pass to -fmt (with TEXFORMATS from format_env),
+            or None if the document has no static head or it would not dump
+    """
+    with open(document, encoding='utf-8', errors='replace') as handle:
+        lines = handle.readlines()
+    end = static_preamble(lines, os.path.dirname(document))
+    if not end:
+        return None
+    name = format_name(lines[:end], salt)
+    path = os.path.join(formats_dir, name + '.fmt')
+
+    with _locks_lock:
+        lock = _locks.setdefault(name, threading.Lock())
+    # Documents sharing a head wait for one dump instead of each making it
+    with lock:
+        if os.path.exists(path):
+            return name
+        if name in _failed:
+            return None
+        os.makedirs(formats_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.partial-', dir=formats_dir)
+        try:
+            with open(os.path.join(staging, name + '.tex'), 'w', encoding='utf-8') as handle:
+                handle.write(''.join(lines[:end]) + '\\begin{document}\n')
+            with slots or nullcontext():
+                completed = subprocess.run(
+                    [pdflatex, '-ini', '-interaction=batchmode', '-halt-on-error', f'-jobname={name}',
+                     '&pdflatex', 'mylatexformat.ltx', name + '.tex'],
+                    cwd=staging, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            dumped = os.path.join(staging, name + '.fmt')
+            if completed.returncode != 0 or not os.path.exists(dumped):
+                _failed.add(name)
+                return None
+            os.replace(dumped, path)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+    return name
+
+
+def write_source(document, build_dir):
+    """
+    Write a copy of a document marked for its format into build_dir
+
+    Returns:
+        str: File name of the copy in build_dir
+    """
+    with open(document, encoding='utf-8', errors='replace') as handle:
+        text = handle.read()
+    stem = os.path.splitext(os.path.basename(document))[0]
+    source = f"{stem}-precompiled.tex"
+    with open(os.path.join(build_dir, source), 'w', encoding='utf-8') as handle:
+        handle.write(mark_dump_end(text, os.path.dirname(document)))
+    return source